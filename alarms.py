@@ -0,0 +1,200 @@
+"""Alarm / tell-tale rule engine, evaluated on the CAN thread as fields change.
+
+Each ``Rule`` declares a threshold on one field (or the hottest/lowest of a
+group), a release threshold for hysteresis, optional enable conditions such as
+"rpm > 1500", and debounce times. ``AlarmEngine`` compiles the rules once into
+slot-indexed tuples and registers as a ``SensorState`` listener: every commit
+re-evaluates only the rules whose inputs were written, so an alarm raises the
+moment the data arrives rather than on the next 30 Hz render tick. The UI just
+reads ``engine.active`` (a bitmask) or ``engine.names(kind)``.
+
+Hysteresis keeps a lambda hovering at the LEAN limit from flickering the
+banner: a rule raises past ``on`` and only clears once the value is back past
+``off``. ``debounce`` is how long the condition must hold before raising,
+``release`` how long it must be gone before clearing. A rule whose enable
+conditions stop holding clears immediately (e.g. the engine is switched off).
+
+A rule also clears when any of its inputs goes stale (no write within its
+``STALE_AFTER`` limit): a wideband that dropped off the bus mid-LEAN must not
+hold the banner on its last reading. The "stale" rule op raises an alarm of
+its own instead (SENSOR LOST) while an alarm input that was arriving has
+stopped. Staleness needs no write to notice it, so ``tick(now)`` re-evaluates
+every rule and is called periodically as well (the UI frame scheduler, or the
+SHM ingest loop).
+"""
+
+import operator
+from collections import namedtuple
+from threading import Lock
+
+from model import FIELD_NAMES, SENSOR_FIELDS, STALE_AFTER, STALE_AFTER_FIELD
+
+# Critical alarm thresholds (the bottom red banner)
+ALARM_LEAN_LAMBDA = 1.05       # lean mixture
+ALARM_OVERHEAT_C = 110         # coolant overheat
+ALARM_OIL_PRESS_BAR = 1.0      # minimum oil pressure...
+ALARM_OIL_PRESS_RPM = 1500     # ...only checked above this rpm (idle runs lower)
+ALARM_EGT_C = 750              # any cylinder EGT above this is too hot
+ENGINE_RUNNING_RPM = 500       # below this (off / cranking) readings aren't meaningful
+
+EGT_FIELDS = ("egt1", "egt2", "egt3", "egt4")
+
+Rule = namedtuple("Rule", "name kind field op on off when debounce release",
+                  defaults=((), 0.0, 0.0))
+Rule.__doc__ = """One alarm / tell-tale.
+
+    name      banner text (``kind="alarm"``) or TopAlerts pill key (``"telltale"``)
+    field     SensorState field, or a tuple of fields (max for ">", min for "<")
+    op        ">" raises above ``on``; "<" raises below ``on``; "stale" raises
+              while any of ``field`` has stopped arriving (``on`` / ``off`` unused)
+    off       release threshold (hysteresis): clears once back past it
+    when      enable conditions, ``((field, op, value), ...)``, all must hold
+    debounce  seconds the condition must hold before raising
+    release   seconds it must be gone before clearing
+"""
+
+_RUNNING = ("rpm", ">=", ENGINE_RUNNING_RPM)
+
+RULES = (
+    # banner — only while the engine is running (lambda pegs lean on ambient O2
+    # with the engine off, etc.)
+    Rule("LEAN", "alarm", "lambda_afr", ">", ALARM_LEAN_LAMBDA, 1.02,
+         when=(_RUNNING,), debounce=0.15, release=0.5),
+    Rule("OVERHEAT", "alarm", "engine_temp", ">", ALARM_OVERHEAT_C, 107,
+         when=(_RUNNING,), debounce=0.5, release=1.0),
+    # low oil pressure, but only above idle (idle naturally runs lower)
+    Rule("OIL PRESSURE", "alarm", "oil_pressure_bar", "<", ALARM_OIL_PRESS_BAR, 1.2,
+         when=(("rpm", ">", ALARM_OIL_PRESS_RPM),), debounce=0.2, release=0.5),
+    Rule("EGT", "alarm", EGT_FIELDS, ">", ALARM_EGT_C, 730,
+         when=(_RUNNING,), debounce=0.2, release=0.5),
+    # an alarm input went silent: those alarms can no longer raise
+    Rule("SENSOR LOST", "alarm", ("lambda_afr", "engine_temp", "oil_pressure_bar") + EGT_FIELDS,
+         "stale", 0, 0, debounce=0.5),
+    # tell-tale pills
+    Rule("temp", "telltale", "engine_temp", ">", 100, 98),
+    # genuine loss of oil pressure only (avoid false alarms at rest)
+    Rule("oil", "telltale", "oil_pressure_bar", "<", 0.8, 1.0,
+         when=(("rpm", ">", ENGINE_RUNNING_RPM), ("oil_pressure_bar", ">", 0)),
+         debounce=0.2),
+    Rule("fuel", "telltale", "fuel_level", "<", 15, 17,
+         when=(("fuel_level", ">", 0),), debounce=2.0, release=2.0),
+    Rule("boost", "telltale", "map", ">", 1.32, 1.28),
+)
+
+_OPS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le}
+
+
+class AlarmEngine:
+    """Compiled ``RULES``; a ``SensorState`` listener keeping ``active`` current.
+
+    ``record`` runs on the writer's thread and ``tick`` on whichever thread
+    polls staleness; a lock keeps the two from interleaving."""
+
+    def __init__(self, rules=RULES):
+        self.rules = tuple(rules)
+        slot = {name: i for i, name in enumerate(FIELD_NAMES)}
+        # local mirror of every field, kept current from the commits we observe
+        self._vals = [default for _, default in SENSOR_FIELDS]
+        self._stamps = [0.0] * len(FIELD_NAMES)     # last write time per slot (0 = never)
+        self._stale_after = tuple(STALE_AFTER_FIELD.get(name, STALE_AFTER)
+                                  for name in FIELD_NAMES)
+        self._compiled = []
+        by_slot = [[] for _ in FIELD_NAMES]   # slot -> indexes of the rules it feeds
+        for index, rule in enumerate(self.rules):
+            fields = rule.field if isinstance(rule.field, tuple) else (rule.field,)
+            above = None if rule.op == "stale" else rule.op == ">"
+            when = tuple((slot[f], _OPS[op], v) for f, op, v in rule.when)
+            inputs = tuple({*(slot[f] for f in fields), *(w[0] for w in when)})
+            self._compiled.append((1 << index, tuple(slot[f] for f in fields), above,
+                                   rule.on, rule.off, when, rule.debounce, rule.release,
+                                   inputs))
+            for s in inputs:
+                by_slot[s].append(index)
+        self._by_slot = tuple(tuple(r) for r in by_slot)
+        self._pending = {}        # rule bit -> monotonic time a state flip was first seen
+        self._kind_mask = {}
+        for bit, rule in enumerate(self.rules):
+            self._kind_mask[rule.kind] = self._kind_mask.get(rule.kind, 0) | (1 << bit)
+        self._names = {}          # (mask, kind) -> names, cached per distinct mask
+        self._lock = Lock()
+        self.active = 0           # bitmask over ``rules``
+
+    def record(self, now, written):
+        """``SensorState`` listener: re-evaluate rules fed by the written slots."""
+        vals, stamps, by_slot = self._vals, self._stamps, self._by_slot
+        touched = None
+        with self._lock:
+            for slot, value in written:
+                vals[slot] = value
+                stamps[slot] = now
+                rules = by_slot[slot]
+                if rules:
+                    if touched is None:
+                        touched = set()
+                    touched.update(rules)
+            if touched:
+                compiled = self._compiled
+                for index in touched:
+                    self._evaluate(compiled[index], now)
+
+    def tick(self, now):
+        """Re-evaluate every rule at ``now`` (monotonic), so inputs that stop
+        arriving clear their alarms and raise SENSOR LOST without a write."""
+        with self._lock:
+            for rule in self._compiled:
+                self._evaluate(rule, now)
+
+    def _stale(self, slots, now):
+        stamps, limits = self._stamps, self._stale_after
+        for s in slots:
+            t = stamps[s]
+            if t and now - t > limits[s]:
+                return True
+        return False
+
+    def _evaluate(self, rule, now):
+        bit, slots, above, on, off, when, debounce, release, inputs = rule
+        vals = self._vals
+        active = bool(self.active & bit)
+        if above is None:
+            cond = self._stale(slots, now)
+        else:
+            if self._stale(inputs, now):
+                ok = False              # can't hold (or raise) on a reading that stopped
+            else:
+                ok = True
+                for s, op, v in when:
+                    if not op(vals[s], v):
+                        ok = False
+                        break
+            if not ok:
+                if active:
+                    self.active &= ~bit
+                self._pending.pop(bit, None)
+                return
+            if len(slots) == 1:
+                x = vals[slots[0]]
+            else:
+                x = max(vals[s] for s in slots) if above else min(vals[s] for s in slots)
+            limit = off if active else on
+            cond = x > limit if above else x < limit
+        if cond == active:
+            self._pending.pop(bit, None)
+            return
+        first = self._pending.setdefault(bit, now)
+        if now - first >= (debounce if cond else release):
+            self.active ^= bit
+            del self._pending[bit]
+
+    def names(self, kind, mask=None):
+        """Names of the active rules of ``kind`` ("alarm" / "telltale"), in
+        rule order. Cached per distinct mask, so polling it every frame is free."""
+        if mask is None:
+            mask = self.active
+        key = (mask & self._kind_mask.get(kind, 0), kind)
+        names = self._names.get(key)
+        if names is None:
+            names = tuple(r.name for bit, r in enumerate(self.rules)
+                          if key[0] & (1 << bit))
+            self._names[key] = names
+        return names
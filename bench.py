@@ -0,0 +1,266 @@
+"""Decode / ingest benchmarks on ``dump.txt``, scaled to a saturated bus.
+
+How much headroom does the Pi have before another ECU or sensor module goes
+on the bus? ``dump.txt`` is replayed as one ``--seconds`` stretch of traffic at
+``BUS_BITRATE``: its frames are cycled back to back at their wire time, plus an
+EGT-4 frame every 1/``EGT4_RATE`` s. The wideband / EGT values drift so the
+change paths run too. Against that stream:
+
+    decode          ``_decode`` per frame (reassembly + pair walk)
+    decode_egt4     ``_decode_egt4`` per EGT-4 frame
+    apply           ``_apply`` per frame (dispatch + one commit each)
+    update          ``SensorState.update`` per burst (``BURST_WINDOW`` of frames)
+    update_app      the same with the app's deriver, peak and alarm listeners
+    read_can        the complete ``CanFanout`` loop on a max-speed ``ReplayBus``
+
+Each reports ops/s (best of ``--repeat``), mean ns/op, per-call p50 / p99,
+and ``headroom``, the rate relative to what the saturated bus demands (1.0 =
+just keeps up). The JSON results go to stdout and the table to stderr.
+Frame bits are counted without stuffing, so the demand is an upper bound.
+
+Results are compared with ``BASELINE`` for this machine. Any rate more than
+``TOLERANCE`` below it fails the run (exit 1). ``--save`` stores the current
+rates as the new baseline, with ``--note`` describing the machine. A machine
+with no baseline only warns, unless ``--check`` (a CI gate) makes that a
+failure too (exit 2). The committed ``bench_baseline.json`` holds a reference
+entry from the x86 development VM; the Pi needs its own.
+
+    python bench.py > results.json
+    python bench.py --save --note "Pi 4, 1.8 GHz, Bookworm"   # after an intended change
+    python bench.py --check           # CI: fail without a baseline or on a regression
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import can
+
+from alarms import AlarmEngine
+from can_helper import (EGT4_ID, EGT4_SCALE, CanFanout, Reassembler, _apply, _decode,
+                        _decode_egt4, _decode_into, _state_writer)
+from derived import Deriver
+from model import SensorState
+from peaks import PeakTracker
+from replay import ReplayBus, load
+
+BUS_BITRATE = 1_000_000      # bit/s of the saturated bus
+EGT4_RATE = 50               # EGT-4 module broadcasts per second
+BURST_WINDOW = 0.001         # bus time drained into one commit (reader wakes ~1 kHz)
+TOLERANCE = 0.2              # fractional slowdown vs the baseline that fails the run
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+
+
+def _frame_bits(msg):
+    """Nominal bits on the wire (SOF..EOF + 3-bit intermission, no stuffing)."""
+    return (67 if msg.is_extended_id else 47) + 8 * msg.dlc
+
+
+def saturate(frames, seconds=1.0, bitrate=BUS_BITRATE, egt_rate=EGT4_RATE):
+    """``seconds`` of back-to-back traffic cycled from ``frames``, timestamped."""
+    out = []
+    t = 0.0
+    next_egt = 0.0
+    k = 0
+    n = len(frames)
+    while t < seconds:
+        if t >= next_egt:
+            temps = (int((700 + 50 * (i + 1) + (k % 40)) / EGT4_SCALE) for i in range(4))
+            data = b"".join(v.to_bytes(2, "big", signed=True) for v in temps)
+            msg = can.Message(arbitration_id=EGT4_ID, data=data, is_extended_id=True)
+            next_egt += 1 / egt_rate
+        else:
+            src = frames[k % n]
+            data = bytearray(src.data)
+            if len(data) == 4:                # lone pair (wideband): drift the value
+                data[3] = (data[3] + k // n) & 0xFF
+            msg = can.Message(arbitration_id=src.arbitration_id, data=data,
+                              is_extended_id=src.is_extended_id)
+            k += 1
+        msg.timestamp = t
+        out.append(msg)
+        t += _frame_bits(msg) / bitrate
+    return out
+
+
+def _bursts(frames, window=BURST_WINDOW):
+    """Decoded update dicts, one per ``window`` of bus time (as ``_drain`` builds them)."""
+    seg = Reassembler()
+    bursts, updates, edge = [], {}, window
+    for msg in frames:
+        if msg.timestamp >= edge:
+            if updates:
+                bursts.append(updates)
+            updates, edge = {}, edge + window
+        if msg.arbitration_id == EGT4_ID:
+            _decode_egt4(msg.data, updates)
+        else:
+            _decode_into(msg.arbitration_id, msg.data, seg, updates)
+    if updates:
+        bursts.append(updates)
+    return bursts
+
+
+def _app_state():
+    """A ``SensorState`` wired like ``CarClusterApp`` does it."""
+    state = SensorState()
+    state.set_deriver(Deriver())
+    state.add_listener(PeakTracker().record)
+    state.add_listener(AlarmEngine().record)
+    return state
+
+
+def _measure(name, make_call, items, demand, repeat):
+    """Best-of-``repeat`` throughput of ``call(item)`` over ``items``, plus a
+    per-call latency pass. ``make_call()`` returns a fresh call (fresh state)."""
+    best = float("inf")
+    for _ in range(repeat):
+        call = make_call()
+        t = time.perf_counter()
+        for item in items:
+            call(item)
+        best = min(best, time.perf_counter() - t)
+    call = make_call()
+    clock = time.perf_counter_ns
+    lat = []
+    for item in items:
+        t = clock()
+        call(item)
+        lat.append(clock() - t)
+    lat.sort()
+    rate = len(items) / best
+    return name, {
+        "ops": len(items),
+        "per_s": round(rate, 1),
+        "mean_ns": round(best / len(items) * 1e9, 1),
+        "p50_ns": lat[len(lat) // 2],
+        "p99_ns": lat[min(len(lat) - 1, len(lat) * 99 // 100)],
+        "headroom": round(rate / demand, 2),
+    }
+
+
+def run(path="dump.txt", seconds=5.0, repeat=5):
+    """Every benchmark; returns the results mapping."""
+    frames = saturate(list(load(path)), seconds)
+    fps = len(frames) / seconds
+    ext = [(m.arbitration_id, bytes(m.data)) for m in frames
+           if m.is_extended_id and m.arbitration_id != EGT4_ID]
+    egt = [bytes(m.data) for m in frames if m.arbitration_id == EGT4_ID]
+    seg = Reassembler()
+    pairs = [p for p in (_decode(cid, data, seg) for cid, data in ext) if p]
+    bursts = _bursts(frames)
+
+    def decode():
+        seg = Reassembler()
+        return lambda f: _decode(f[0], f[1], seg)
+
+    def apply():
+        state = SensorState()
+        return lambda p: _apply(state, p)
+
+    results = dict((
+        _measure("decode", decode, ext, fps, repeat),
+        _measure("decode_egt4", lambda: _decode_egt4, egt, EGT4_RATE, repeat),
+        _measure("apply", apply, pairs, len(pairs) / seconds, repeat),
+        _measure("update", lambda: SensorState().update, bursts, len(bursts) / seconds, repeat),
+        _measure("update_app", lambda: _app_state().update, bursts, len(bursts) / seconds,
+                 repeat),
+    ))
+
+    best = float("inf")
+    for _ in range(repeat):
+        fanout = CanFanout("virtual", "bench")
+        fanout.subscribe(_state_writer(_app_state()), "state", maxsize=0, raw=False,
+                         samples=True)
+        bus = ReplayBus(frames, None, can_filters=fanout.filters)
+        t = time.perf_counter()
+        fanout.run(bus)
+        best = min(best, time.perf_counter() - t)
+    rate = fanout.frames / best
+    results["read_can"] = {"ops": fanout.frames, "per_s": round(rate, 1),
+                           "mean_ns": round(best / fanout.frames * 1e9, 1),
+                           "headroom": round(rate / fps, 2)}
+    return {
+        "machine": machine(),
+        "python": platform.python_version(),
+        "bus": {"bitrate": BUS_BITRATE, "frames_per_s": round(fps, 1),
+                "bursts_per_s": round(len(bursts) / seconds, 1)},
+        "results": results,
+    }
+
+
+def machine():
+    """Baseline key: architecture + CPU model (+ Python minor version)."""
+    model = platform.processor() or ""
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key.strip() in ("Model", "model name"):
+                    model = value.strip()
+    except OSError:
+        pass
+    return f"{platform.machine()} {model} py{sys.version_info[0]}.{sys.version_info[1]}"
+
+
+def regressions(report, baseline):
+    """``[(name, rate, baseline rate)]`` for every rate more than ``TOLERANCE`` down."""
+    base = baseline.get(report["machine"], {})
+    return [(name, r["per_s"], base[name]) for name, r in report["results"].items()
+            if name in base and r["per_s"] < base[name] * (1 - TOLERANCE)]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Decode / ingest benchmarks.")
+    ap.add_argument("path", nargs="?", default="dump.txt", help="capture to scale up")
+    ap.add_argument("--seconds", type=float, default=5.0, help="bus time to synthesise")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--baseline", default=BASELINE)
+    ap.add_argument("--save", action="store_true", help="store these rates as the baseline")
+    ap.add_argument("--note", help="with --save: what this machine is (stored with the rates)")
+    ap.add_argument("--check", action="store_true",
+                    help="fail (exit 2) if this machine has no baseline")
+    args = ap.parse_args(argv)
+
+    report = run(args.path, args.seconds, args.repeat)
+    err = sys.stderr
+    bus = report["bus"]
+    print(f"{report['machine']}: {bus['frames_per_s']:.0f} frames/s at "
+          f"{bus['bitrate'] // 1000} kbit/s", file=err)
+    for name, r in report["results"].items():
+        p = f"{r['p50_ns'] / 1000:7.2f} {r['p99_ns'] / 1000:7.2f} us" if "p50_ns" in r else ""
+        print(f"  {name:12s} {r['per_s']:>12,.0f}/s {r['mean_ns'] / 1000:7.2f} us  "
+              f"headroom {r['headroom']:8.1f}x  {'p50/p99 ' + p if p else ''}", file=err)
+
+    try:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        baseline = {}
+    failed = regressions(report, baseline)
+    report["regressions"] = [name for name, _, _ in failed]
+    json.dump(report, sys.stdout, indent=2)
+    print()
+    if args.save:
+        entry = {n: r["per_s"] for n, r in report["results"].items()}
+        if args.note:
+            entry["note"] = args.note
+        baseline[report["machine"]] = entry
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baseline saved for {report['machine']}", file=err)
+    elif report["machine"] not in baseline:
+        print(f"no baseline for {report['machine']} (run with --save)", file=err)
+        if args.check:
+            return 2
+    for name, rate, base in failed:
+        print(f"REGRESSION {name}: {rate:,.0f}/s vs baseline {base:,.0f}/s", file=err)
+    return 1 if failed and not args.save else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -18,7 +18,10 @@ log_realtime() below to discover still-unmapped signals like the fan output.)
 """
 
 import can
+import struct
 import time
+from collections import deque, namedtuple
+from threading import Event, Thread
 
 from model import SensorState
 
@@ -55,56 +58,196 @@ def _signed(v):
     return v - 65536 if v >= 32768 else v
 
 
-def _pairs(payload, out):
-    """Append (measure_id, raw_value) for each 4-byte pair in the payload."""
-    for i in range(0, len(payload) - 3, 4):
-        mid = (payload[i] << 8) | payload[i + 1]
-        val = (payload[i + 2] << 8) | payload[i + 3]
-        if mid:
-            out.append((mid, val))
+# Dispatch table: MeasureID -> (SensorState field, multiplier, signed). Built
+# once from MEASURE_MAP / DATAID_* so the hot loop is one dict probe per pair,
+# with no shift or per-pair helper call. Both status-bit variants of a DataID
+# share an entry (the old decoder ignored the status bit too). A multiplier of
+# None marks the special DataIDs converted in _special(). Fields in `skip` are
+# left out (taken from the simplified packets instead, see SIMPLE_LAYOUTS).
+def _build_dispatch(skip=()):
+    table = {}
+
+    def add(did, entry):
+        if entry[0] not in skip:
+            table[did << 1] = table[(did << 1) | 1] = entry
+
+    for did, (field, scale) in MEASURE_MAP.items():
+        add(did, (field, scale, True))
+    add(DATAID_GEAR, ("gear", None, True))
+    add(DATAID_LAUNCH, ("two_step", None, True))
+    add(DATAID_DAYNIGHT, ("night", None, True))
+    return table
+
+
+_DISPATCH = _build_dispatch()
+
+
+def _special(field, val, out):
+    """Non-numeric DataIDs: gear index + label, launch armed, day/night."""
+    if field == "gear":
+        out["gear"] = val
+        out["gear_label"] = GEAR_LABEL.get(val, str(val))
+    elif field == "two_step":
+        out["two_step"] = (val != 0)
+    elif field == "night":
+        out["night"] = (val == 1)
+    elif field == "pit_limit":
+        out["pit_limit"] = (val != 0)
+
+
+_PAIR = struct.Struct(">HH")
+
+
+class Reassembler:
+    """Segmented FTCAN packets, reassembled per CAN ID and decoded as they land.
+
+    Segment 0 announces the payload's total length, and each ID keeps one
+    buffer at least that large, allocated once and reused for every later
+    packet. Continuations are copied into it in place. Every frame returns the
+    4-byte pairs it completed, so a measure near the start of a long page
+    reaches the dash a few frames before the page ends. Segment indexes must
+    run 0, 1, 2, …. A missing or out-of-order one drops the rest of that packet
+    (counted in ``gaps``) rather than letting misaligned bytes decode as garbage.
+    """
+
+    def __init__(self):
+        self._rx = {}        # cid -> [buf, total, filled, decoded, next index (-1 = idle)]
+        self.packets = 0     # packets received complete
+        self.gaps = 0        # packets dropped on a lost / out-of-order segment
+        self.orphans = 0     # continuations with no packet open (segment 0 missed / dropped)
+
+    def feed(self, cid, data):
+        """Add one segment frame; returns (buffer, start, end) of the pairs it
+        completed, or None if it completed none."""
+        rx = self._rx.get(cid)
+        index = data[0]
+        if index == 0:
+            total = (data[1] << 8) | data[2]
+            if rx is None:
+                rx = self._rx[cid] = [bytearray(total), total, 0, 0, 0]
+            else:
+                if rx[4] > 0:                   # previous packet never finished
+                    self.gaps += 1
+                if len(rx[0]) < total:          # new object: never resize under a view
+                    rx[0] = bytearray(total)
+                rx[1] = total
+            filled = decoded = 0
+            chunk = memoryview(data)[3:]
+        else:
+            if rx is None or rx[4] < 0:
+                self.orphans += 1
+                return None
+            if index != rx[4]:
+                self.gaps += 1
+                rx[4] = -1
+                return None
+            total, filled, decoded = rx[1], rx[2], rx[3]
+            chunk = memoryview(data)[1:]
+        n = min(len(chunk), total - filled)
+        buf = rx[0]
+        buf[filled:filled + n] = chunk[:n]
+        filled += n
+        if filled >= total:
+            self.packets += 1
+            rx[4] = -1
+        else:
+            rx[4] = index + 1
+        rx[2] = filled
+        end = filled & ~3
+        if end <= decoded:
+            return None
+        rx[3] = end
+        return buf, decoded, end
+
+    def pending(self, cid):
+        """True while ``cid`` has a packet in progress."""
+        rx = self._rx.get(cid)
+        return rx is not None and rx[4] > 0
+
+    def open_ids(self):
+        """IDs with a packet in progress."""
+        return {cid for cid, rx in self._rx.items() if rx[4] > 0}
+
+    def drop(self, cid):
+        """Abandon ``cid``'s packet in progress (not counted as a gap)."""
+        rx = self._rx.get(cid)
+        if rx is not None:
+            rx[4] = -1
+
+
+def _payload(cid, data, seg):
+    """Locate the complete MeasureID/Value pairs carried by one frame.
+
+    Returns (buffer, start, end) with end - start a multiple of 4, or None if
+    the frame completed no pair. Standard and single-packet frames are
+    addressed in place (no copy); segmented frames go through the `seg`
+    Reassembler, which returns the pairs each segment completes.
+    """
+    n = len(data)
+    if not n:
+        return None
+    if not (cid >> 11) & 0x7:                  # standard CAN (DataFieldID 0)
+        return data, 0, n & ~3
+    if data[0] == 0xFF:                         # FTCAN single packet (0x02 / 0x03 bridge)
+        return data, 1, 1 + ((n - 1) & ~3)
+    return seg.feed(cid, data)                  # FTCAN segmented
+
+
+def _pairs(buf, start, end):
+    """Iterate (measure_id, raw_value) over buf[start:end] without copying.
+    Single-pair frames (the common standard-CAN case) skip the iterator."""
+    if end - start == 4:
+        return (_PAIR.unpack_from(buf, start),)
+    return struct.iter_unpack(">HH", memoryview(buf)[start:end])
 
 
 def _decode(cid, data, seg):
     """Decode one frame into a list of (measure_id, raw_value), reassembling
-    segmented FTCAN packets via the per-id `seg` buffer."""
-    out = []
-    if not data:
-        return out
-    data_field_id = (cid >> 11) & 0x7
-    if data_field_id == 0x00:                  # standard CAN
-        _pairs(bytes(data), out)
-    else:                                       # FTCAN (0x02 / 0x03 bridge)
-        b0 = data[0]
-        if b0 == 0xFF:                          # single packet
-            _pairs(bytes(data[1:]), out)
-        elif b0 == 0x00:                        # segment 0: total length + payload start
-            total = (data[1] << 8) | data[2]
-            seg[cid] = [total, bytearray(data[3:])]
-        elif cid in seg:                        # continuation segment
-            seg[cid][1] += bytes(data[1:])
-            total, buf = seg[cid]
-            if len(buf) >= total:
-                _pairs(bytes(buf[:total]), out)
-                del seg[cid]
-    return out
+    segmented FTCAN packets via the `seg` Reassembler. Used by the discovery
+    logger, which wants every pair; the display path uses _decode_into()."""
+    loc = _payload(cid, data, seg)
+    if loc is None:
+        return []
+    return [(mid, val) for mid, val in _pairs(*loc) if mid]
+
+
+def _dispatch(pairs, out, table=_DISPATCH):
+    """Scale each (measure_id, raw_value) pair through `table` into `out`."""
+    lookup = table.get
+    for mid, val in pairs:
+        entry = lookup(mid)
+        if entry is None:
+            continue
+        field, scale, signed = entry
+        if signed and val >= 0x8000:
+            val -= 0x10000
+        if scale is None:
+            _special(field, val, out)
+        else:
+            out[field] = val * scale
+
+
+def _decode_into(cid, data, seg, out, table=_DISPATCH):
+    """Decode one frame straight into the pending update mapping `out`.
+
+    Walks the pairs in place and dispatches each MeasureID through _DISPATCH —
+    no intermediate list, and unmapped measures cost a single failed dict probe.
+    A lone standard-CAN pair (the wideband's 4-byte frame, most of the bus) is
+    unpacked inline without going through _payload().
+    """
+    if len(data) == 4 and not (cid >> 11) & 0x7:
+        _dispatch((_PAIR.unpack(data),), out, table)
+        return
+    loc = _payload(cid, data, seg)
+    if loc is not None:
+        _dispatch(_pairs(*loc), out, table)
 
 
 def _apply(state, measures):
-    """Map decoded measures into a SensorState update (stamps the CAN clock)."""
+    """Map decoded (measure_id, raw_value) pairs into a SensorState update
+    (stamps the CAN clock)."""
     updates = {}
-    for mid, raw in measures:
-        did = mid >> 1
-        val = _signed(raw)
-        if did in MEASURE_MAP:
-            field, scale = MEASURE_MAP[did]
-            updates[field] = val * scale
-        elif did == DATAID_GEAR:
-            updates["gear"] = val
-            updates["gear_label"] = GEAR_LABEL.get(val, str(val))
-        elif did == DATAID_LAUNCH:
-            updates["two_step"] = (val != 0)
-        elif did == DATAID_DAYNIGHT:
-            updates["night"] = (val == 1)
+    _dispatch(measures, updates)
     if updates:
         state.update(updates)
 
@@ -117,46 +260,362 @@ EGT4_ID = 0x02400000        # FuelTech EGT-4 model A
 EGT4_SCALE = 0.125          # degC per bit
 
 
-def _decode_egt4(data):
-    """Decode the EGT-4 simplified packet into {egt1..egt4} (°C)."""
+_EGT4 = struct.Struct(">4h")
+
+
+def _decode_egt4(data, out=None):
+    """Decode the EGT-4 simplified packet into {egt1..egt4} (°C), writing into
+    `out` when given (returns the mapping either way)."""
+    if out is None:
+        out = {}
     if len(data) < 8:
-        return {}
-    out = {}
-    for i in range(4):
-        raw = (data[i * 2] << 8) | data[i * 2 + 1]
-        out[f"egt{i + 1}"] = _signed(raw) * EGT4_SCALE
+        return out
+    e1, e2, e3, e4 = _EGT4.unpack_from(data)
+    out["egt1"] = e1 * EGT4_SCALE
+    out["egt2"] = e2 * EGT4_SCALE
+    out["egt3"] = e3 * EGT4_SCALE
+    out["egt4"] = e4 * EGT4_SCALE
     return out
 
 
-def read_can(interface="socketcan", channel="can0", state=None):
+# FTCAN simplified packets (FT450/550/600 "simplified broadcast"): fixed
+# layouts of four big-endian int16 words, one frame each, so a channel updates
+# the moment its frame lands instead of once a whole segmented page has been
+# reassembled. Words use the same units as the tagged stream (scales come from
+# MEASURE_MAP). 0x14080604-0x14080608 (traction, suspension, g-force, injection)
+# carry nothing SensorState shows, so they aren't decoded.
+SIMPLE_LAYOUTS = {
+    0x14080600: ("tps", "map", "air_temp", "engine_temp"),
+    0x14080601: ("oil_pressure_bar", "fuel_pressure_bar", "water_pressure_bar", "gear"),
+    0x14080602: ("lambda_afr", "rpm", "oil_temp", "pit_limit"),
+    0x14080603: ("wheel_speed_fr_kmh", "wheel_speed_fl_kmh",
+                 "wheel_speed_rr_kmh", "wheel_speed_rl_kmh"),
+}
+SIMPLE_BASE = 0x14080600      # the simplified block is 0x140806xx
+SIMPLE_MASK = 0x1FFFFF00
+
+# Hot channels taken from the simplified packets in simplified mode; every other
+# field still comes from the segmented stream.
+SIMPLE_FIELDS = ("rpm", "wheel_speed_fr_kmh", "wheel_speed_fl_kmh",
+                 "wheel_speed_rr_kmh", "wheel_speed_rl_kmh", "lambda_afr", "oil_temp")
+
+
+def _build_simple(fields):
+    """Simplified ID -> (Struct, ((field, scale), ...)) for the words in `fields`.
+
+    Each Struct unpacks only the taken words (the rest are pad bytes), so a
+    frame is one unpack_from and one multiply per taken field."""
+    scale_of = {field: scale for field, scale in MEASURE_MAP.values()}
+    table = {}
+    for cid, layout in SIMPLE_LAYOUTS.items():
+        fmt = ">"
+        taken = []
+        for field in layout:
+            if field in fields:
+                fmt += "h"
+                taken.append((field, scale_of.get(field)))
+            else:
+                fmt += "2x"
+        if taken:
+            table[cid] = (struct.Struct(fmt), tuple(taken))
+    return table
+
+
+def simple_filters(fields=SIMPLE_FIELDS):
+    """Exact-ID bus filters for the simplified packets that carry `fields`."""
+    return [{"can_id": cid, "can_mask": 0x1FFFFFFF, "extended": True}
+            for cid in _build_simple(fields)]
+
+
+def _decode_simple(entry, data, out):
+    """Decode one simplified packet through its precomputed `entry` into `out`."""
+    if len(data) < 8:
+        return
+    layout, taken = entry
+    for (field, scale), val in zip(taken, layout.unpack_from(data)):
+        if scale is None:
+            _special(field, val, out)
+        else:
+            out[field] = val * scale
+
+
+# Upper bound on frames merged into one SensorState commit, so a saturated bus
+# still publishes at least every few milliseconds instead of draining forever.
+DRAIN_MAX = 256
+
+
+def _drain(bus, msg, seg, updates, table=_DISPATCH, simple=None):
+    """Decode `msg` plus every frame already queued behind it into `updates`.
+
+    The segmented broadcast arrives as back-to-back bursts; pulling the whole
+    burst with non-blocking recv() and committing it once costs one lock, one
+    dict and one clock read per burst instead of per frame. Later frames in a
+    burst overwrite earlier values of the same field. `simple` is the
+    _build_simple() table in simplified mode; any other simplified packet
+    (0x140806xx) is dropped, never decoded as standard-CAN pairs.
+    Returns the frame count.
+    """
+    n = 0
+    while msg is not None:
+        if msg.is_extended_id:
+            cid = msg.arbitration_id
+            if cid == EGT4_ID:
+                _decode_egt4(msg.data, updates)
+            elif simple is not None and cid in simple:
+                _decode_simple(simple[cid], msg.data, updates)
+            elif cid & SIMPLE_MASK != SIMPLE_BASE:
+                _decode_into(cid, msg.data, seg, updates, table)
+        n += 1
+        if n >= DRAIN_MAX:
+            break
+        msg = bus.recv(timeout=0)
+    return n
+
+
+def _drain_pairs(bus, msg, seg, pairs, updates, table=_DISPATCH, simple=None):
+    """``_drain()`` that also keeps every decoded (measure_id, raw_value) pair
+    in ``pairs`` (unmapped ones included) for subscribers that want the raw
+    stream. Each frame is still decoded once; the pairs are dispatched into
+    ``updates`` as a batch at the end."""
+    n = 0
+    while msg is not None:
+        if msg.is_extended_id:
+            cid = msg.arbitration_id
+            if cid == EGT4_ID:
+                _decode_egt4(msg.data, updates)
+            elif simple is not None and cid in simple:
+                _decode_simple(simple[cid], msg.data, updates)
+            elif cid & SIMPLE_MASK != SIMPLE_BASE:
+                loc = _payload(cid, msg.data, seg)
+                if loc is not None:
+                    pairs.extend(p for p in _pairs(*loc) if p[0])
+        n += 1
+        if n >= DRAIN_MAX:
+            break
+        msg = bus.recv(timeout=0)
+    _dispatch(pairs, updates, table)
+    return n
+
+
+# --- Fan-out: one socket, decoded once, delivered to every consumer ---
+# Real-time broadcast frames have a low byte of 0xFF (any FuelTech device); plus
+# the EGT-4 module's simplified packet (a fixed extended ID).
+CAN_FILTERS = [
+    {"can_id": 0x000000FF, "can_mask": 0x000000FF, "extended": True},
+    {"can_id": EGT4_ID, "can_mask": 0x1FFFFFFF, "extended": True},
+]
+
+# A drained burst: monotonic receive time, the raw (measure_id, raw_value) pairs
+# (None unless some subscriber asked for them), the mapped SensorState fields,
+# the channel it was read from and the can.Message frames themselves (None
+# unless some subscriber asked for them).
+Burst = namedtuple("Burst", "time pairs updates channel frames")
+
+
+class Samples(dict):
+    """A burst's update mapping that also keeps every value written into it.
+
+    The mapping holds the latest value per field; ``samples`` lists every
+    (field, value) in decode order, so a spike that a later frame of the same
+    burst overwrites still reaches full-rate consumers (peaks, history)."""
+
+    __slots__ = ("samples",)
+
+    def __init__(self):
+        super().__init__()
+        self.samples = []
+
+    def __setitem__(self, key, value):
+        self.samples.append((key, value))
+        dict.__setitem__(self, key, value)
+
+
+DROP_OLDEST = "drop_oldest"   # full queue: discard the oldest burst (consumer sees the latest)
+DROP_NEWEST = "drop_newest"   # full queue: discard the incoming burst (keeps a contiguous run)
+SUBSCRIBER_QUEUE = 64         # default bursts buffered per subscriber
+
+
+class Subscriber:
+    """One consumer of a ``CanFanout``: a callable fed ``Burst``s.
+
+    With ``maxsize`` > 0 bursts go through the subscriber's own bounded queue
+    and worker thread, so a slow consumer (printing, disk) only ever drops its
+    own data per ``policy`` and never stalls the socket. ``maxsize=0`` calls it
+    inline on the reader thread — for the state writer, which must be fast.
+    """
+
+    def __init__(self, fn, name, maxsize=SUBSCRIBER_QUEUE, policy=DROP_OLDEST, raw=True,
+                 frames=False, samples=False):
+        if policy not in (DROP_OLDEST, DROP_NEWEST):
+            raise ValueError(f"unknown drop policy {policy!r}")
+        self.fn = fn
+        self.name = name
+        self.raw = raw             # wants Burst.pairs
+        self.frames = frames       # wants Burst.frames
+        self.samples = samples     # wants Burst.updates as ``Samples`` (every value)
+        self.maxsize = maxsize
+        self.policy = policy
+        self.delivered = 0
+        self.dropped = 0
+        self._queue = deque(maxlen=maxsize if policy == DROP_OLDEST else None)
+        self._wake = Event()
+        if maxsize:
+            Thread(target=self._run, name=f"ftcan-{name}", daemon=True).start()
+
+    def offer(self, burst):
+        """Hand over a burst (reader thread); never blocks."""
+        if not self.maxsize:
+            self.fn(burst)
+            self.delivered += 1
+            return
+        if len(self._queue) >= self.maxsize:
+            self.dropped += 1
+            if self.policy == DROP_NEWEST:
+                return
+        self._queue.append(burst)
+        self._wake.set()
+
+    def _run(self):
+        queue, wake, fn = self._queue, self._wake, self.fn
+        while True:
+            wake.wait()
+            wake.clear()
+            while queue:
+                try:
+                    fn(queue.popleft())
+                except Exception as e:
+                    print(f"[can] subscriber {self.name} error:", e, flush=True)
+                self.delivered += 1
+
+
+class _Tap:
+    """Bus proxy that keeps every frame ``recv()`` returns (for ``Burst.frames``)."""
+
+    def __init__(self, bus, frames):
+        self._bus = bus
+        self._frames = frames
+
+    def recv(self, timeout=None):
+        msg = self._bus.recv(timeout)
+        if msg is not None:
+            self._frames.append(msg)
+        return msg
+
+
+class CanFanout:
+    """Single reader of the CAN socket, fanning decoded bursts out to subscribers.
+
+    Owns the bus and the segment ``Reassembler``; each drained burst is
+    decoded once and offered to every ``Subscriber``. The raw pair list is only
+    built while some subscriber asked for it (``raw=True``), so the state
+    writer alone runs the plain ``_drain()`` path.
+
+    ``simple`` switches on simplified-packet mode: True for ``SIMPLE_FIELDS``,
+    or an iterable of fields to take from the simplified packets (which are
+    then ignored in the segmented stream).
+    """
+
+    def __init__(self, interface="socketcan", channel="can0", filters=CAN_FILTERS, simple=()):
+        if simple is True:
+            simple = SIMPLE_FIELDS
+        self.interface = interface
+        self.channel = channel
+        self.filters = filters + simple_filters(simple) if simple else filters
+        self._table = _build_dispatch(skip=frozenset(simple)) if simple else _DISPATCH
+        self._simple = _build_simple(simple) if simple else None
+        self.subscribers = ()
+        self._want = (False, False, False)   # any subscriber with raw / frames / samples
+        self.frames = 0
+        self.bursts = 0
+        self.errors = 0
+        self.reassembler = Reassembler()
+
+    def subscribe(self, fn, name=None, maxsize=SUBSCRIBER_QUEUE, policy=DROP_OLDEST, raw=True,
+                  frames=False, samples=False):
+        """Register ``fn(burst)``; returns its ``Subscriber`` (for the counters)."""
+        sub = Subscriber(fn, name or getattr(fn, "__name__", "sub"), maxsize, policy, raw, frames,
+                         samples)
+        self.subscribers = subs = self.subscribers + (sub,)
+        self._want = (any(s.raw for s in subs), any(s.frames for s in subs),
+                      any(s.samples for s in subs))
+        return sub
+
+    def open(self):
+        """Open the configured bus (with its filters)."""
+        return can.Bus(interface=self.interface, channel=self.channel,
+                       receive_own_messages=False, can_filters=self.filters)
+
+    def pump(self, bus, msg):
+        """Drain the burst starting at ``msg``, decode it once and offer it to
+        every subscriber."""
+        subs = self.subscribers
+        raw, tap, samples = self._want
+        updates = Samples() if samples else {}
+        frames = None
+        if tap:
+            frames = [msg]
+            bus = _Tap(bus, frames)
+        if raw:
+            pairs = []
+            self.frames += _drain_pairs(bus, msg, self.reassembler, pairs, updates,
+                                        self._table, self._simple)
+        else:
+            pairs = None
+            self.frames += _drain(bus, msg, self.reassembler, updates,
+                                  self._table, self._simple)
+        self.bursts += 1
+        burst = Burst(time.monotonic(), pairs, updates, self.channel, frames)
+        for sub in subs:
+            sub.offer(burst)
+
+    def run(self, bus=None):
+        """Read, decode and fan out until interrupted (blocking). ``bus`` is an
+        already open bus to read instead (e.g. a ``replay.ReplayBus``, which
+        ends the run by raising ``CanOperationError`` when the capture runs out)."""
+        bus = bus or self.open()
+        try:
+            while True:
+                msg = bus.recv(timeout=1.0)
+                if msg is not None:
+                    self.pump(bus, msg)
+        except can.CanOperationError:
+            pass                              # bus shut down (end of a replay)
+        except KeyboardInterrupt:
+            print("\nStopped.")
+        finally:
+            bus.shutdown()
+
+
+def _state_writer(state):
+    """Subscriber committing each burst to ``state``; subscribe it with
+    ``samples=True`` so the state's listeners see every decoded value."""
+    def write(burst):
+        updates = burst.updates
+        if updates:
+            # the burst's clock read is the commit's stamp too
+            state.update(updates, samples=getattr(updates, "samples", None), now=burst.time)
+    return write
+
+
+def read_can(interface="socketcan", channel="can0", state=None, log=False, simple=False,
+             subscribers=(), bus=None):
+    """Feed the FTCAN broadcast into ``state``; with ``log`` the discovery
+    logger rides the same socket (see ``RealtimeLog``). ``simple`` takes the hot
+    channels from the simplified packets (see ``CanFanout``). ``subscribers``
+    are extra ``CanFanout.subscribe`` keyword sets (e.g. a recorder's). ``bus``
+    replaces the socket with an open bus (see ``replay.py``)."""
     if state is None:
         state = SensorState()
-    print("Starting FTCAN 2.0 tagged-broadcast listener on", channel, flush=True)
-
-    # Real-time broadcast frames have a low byte of 0xFF (any FuelTech device); plus
-    # the EGT-4 module's simplified packet (a fixed extended ID).
-    filters = [
-        {"can_id": 0x000000FF, "can_mask": 0x000000FF, "extended": True},
-        {"can_id": EGT4_ID, "can_mask": 0x1FFFFFFF, "extended": True},
-    ]
-    bus = can.Bus(interface=interface, channel=channel,
-                  receive_own_messages=False, can_filters=filters)
-    seg = {}
-    try:
-        while True:
-            msg = bus.recv(timeout=1.0)
-            if msg is None:
-                continue
-            if not msg.is_extended_id:
-                continue
-            if msg.arbitration_id == EGT4_ID:
-                state.update(_decode_egt4(msg.data))
-                continue
-            _apply(state, _decode(msg.arbitration_id, msg.data, seg))
-    except KeyboardInterrupt:
-        print("\nStopped.")
-    finally:
-        bus.shutdown()
+    print("Starting FTCAN 2.0 tagged-broadcast listener on", channel,
+          "(simplified packets for hot channels)" if simple else "", flush=True)
+    fanout = CanFanout(interface, channel, simple=simple)
+    fanout.subscribe(_state_writer(state), "state", maxsize=0, raw=False, samples=True)
+    if log:
+        fanout.subscribe(RealtimeLog(), "canrt")
+        print("[canrt] real-time broadcast logger on", channel, flush=True)
+    for sub in subscribers:
+        fanout.subscribe(**sub)
+    fanout.run(bus)
 
 
 # --- Discovery logger: dump unmapped real-time measures (find fan, day/night) ---
@@ -164,33 +623,34 @@ RT_NAMES = {did: f[0] for did, f in MEASURE_MAP.items()}
 RT_NAMES.update({DATAID_GEAR: "gear", DATAID_LAUNCH: "launch/2step", DATAID_DAYNIGHT: "day/night?"})
 
 
+class RealtimeLog:
+    """``CanFanout`` subscriber logging real-time measures on change (tag: [canrt])."""
+
+    def __init__(self):
+        self._last = {}
+
+    def __call__(self, burst):
+        last = self._last
+        now = burst.time
+        for mid, raw in burst.pairs:
+            did = mid >> 1
+            prev = last.get(did)
+            if prev and prev[0] == raw and now - prev[1] < 1.5:
+                continue
+            last[did] = (raw, now)
+            name = RT_NAMES.get(did, "")
+            print(f"[canrt] DataID=0x{did:04X} {name} = {_signed(raw)} (0x{raw:04X})",
+                  flush=True)
+
+
 def log_realtime(interface="socketcan", channel="can0"):
-    """Log real-time broadcast measures on change (tag: [canrt]) for discovery."""
-    filters = [{"can_id": 0x000000FF, "can_mask": 0x000000FF, "extended": True}]
-    try:
-        bus = can.Bus(interface=interface, channel=channel,
-                      receive_own_messages=False, can_filters=filters)
-    except Exception as e:
-        print("[canrt] could not open bus:", e, flush=True)
-        return
+    """Standalone discovery logger on its own socket, for running without the
+    cluster. Alongside ``read_can`` use its ``log`` flag instead."""
+    fanout = CanFanout(interface, channel,
+                       filters=[{"can_id": 0x000000FF, "can_mask": 0x000000FF, "extended": True}])
+    fanout.subscribe(RealtimeLog(), "canrt")
     print("[canrt] real-time broadcast logger on", channel, flush=True)
-    seg, last = {}, {}
     try:
-        while True:
-            msg = bus.recv(timeout=1.0)
-            if msg is None:
-                continue
-            for mid, raw in _decode(msg.arbitration_id, msg.data, seg):
-                did = mid >> 1
-                now = time.monotonic()
-                prev = last.get(did)
-                if prev and prev[0] == raw and now - prev[1] < 1.5:
-                    continue
-                last[did] = (raw, now)
-                name = RT_NAMES.get(did, "")
-                print(f"[canrt] DataID=0x{did:04X} {name} = {_signed(raw)} (0x{raw:04X})",
-                      flush=True)
+        fanout.run()
     except Exception as e:
-        print("[canrt] error:", e, flush=True)
-    finally:
-        bus.shutdown()
+        print("[canrt] could not read bus:", e, flush=True)
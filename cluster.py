@@ -12,6 +12,10 @@ from theme import WINDOW_WIDTH, WINDOW_HEIGHT, BG
 
 # Development mode flag
 DEV = os.environ.get('DEV', 'true').lower() == 'true'
+# Draw the gauges' needle, arc and shift flash with a GLSL shader
+GAUGE_SHADER = os.environ.get('GAUGE_SHADER', 'false').lower() == 'true'
+# Print the frame scheduler's frame rate and per-phase cost every few seconds
+FRAME_STATS = os.environ.get('FRAME_STATS', 'false').lower() == 'true'
 
 if DEV:
     os.environ['KIVY_METRICS_DENSITY'] = '1'
@@ -29,8 +33,12 @@ from kivy.core.window import Window
 from kivy.core.text import LabelBase, DEFAULT_FONT
 
 from widgets import CenterInfo, Gauge, TopAlerts, AlarmBar, NightDim
-from model import SensorState
-from demo import simulate
+from model import FIELD_NAMES, SensorState
+from peaks import PeakTracker
+from alarms import AlarmEngine
+from derived import Deriver
+from demo import feed
+from frames import DATA, PAINT, scheduler
 
 kivy.require("2.0.0")
 
@@ -81,13 +89,6 @@ RPM_GAUGE_CONFIG = {
 # Shift light: flash the RPM gauge above this engine speed
 SHIFT_RPM_THRESHOLD = 6000
 
-# Critical alarm thresholds (the bottom red banner)
-ALARM_LEAN_LAMBDA = 1.05       # lean mixture
-ALARM_OVERHEAT_C = 110         # coolant overheat
-ALARM_OIL_PRESS_BAR = 1.0      # minimum oil pressure...
-ALARM_OIL_PRESS_RPM = 1500     # ...only checked above this rpm (idle runs lower)
-ALARM_EGT_C = 750              # any cylinder EGT above this is too hot
-
 # After this many seconds with no CAN frame, run the animated demo loop so the
 # cluster shows live values on a bench / when not connected to the car.
 NO_CAN_DEMO_DELAY = 3.0
@@ -95,6 +96,22 @@ NO_CAN_DEMO_DELAY = 3.0
 # Start rendering live data once the gauges' startup sweep has finished.
 RENDER_START_DELAY = 5.0
 
+# Pull the state snapshot at this rate (a DATA hook on the frame scheduler).
+RENDER_RATE = 30
+# Seconds between FRAME_STATS printouts.
+FRAME_STATS_EVERY = 5.0
+
+# With HISTORY=true: amber the ENGINE readout while coolant above
+# ENGINE_CLIMB_FROM (°C) climbs faster than ENGINE_CLIMB_WARN (°C/min) over the
+# last ENGINE_CLIMB_WINDOW seconds (fan or coolant trouble, before the red limit).
+ENGINE_CLIMB_FROM = 95.0
+ENGINE_CLIMB_WARN = 3.0
+ENGINE_CLIMB_WINDOW = 20.0
+# Seconds between trend checks (a DATA hook on the frame scheduler).
+TREND_EVERY = 1.0
+# Seconds between alarm re-checks between writes (clears alarms on stale inputs).
+ALARM_TICK = 0.25
+
 # ============================================================================
 # Application Setup
 # ============================================================================
@@ -114,24 +131,31 @@ LabelBase.register(DEFAULT_FONT, "fonts/Compagnon-Medium.otf")
 class Dashboard(Widget):
     """Main dashboard widget containing all gauge and info displays."""
 
-    def __init__(self, **kwargs):
+    def __init__(self, alarms=None, peaks=None, history=None, **kwargs):
         super().__init__(**kwargs)
+        # rule engine evaluated on the CAN thread; we only read its active set
+        self.alarms = alarms or AlarmEngine()
+        # full-rate peak hold (PeakTracker, or its view under SHM); optional
+        self.peaks = peaks
+        # rolling per-channel history (history.History) for trend alerts; optional
+        self.history = history
 
         self._setup_gauges()
         self._setup_center_info()
         self._setup_top_alerts()
         self._setup_night_dim()
         self._setup_alarms()
+        self._stale = 0   # stale-field mask of the last rendered snapshot
 
         if DEV:
             Window.size = (WINDOW_WIDTH / 2, WINDOW_HEIGHT / 2)
 
     def _setup_gauges(self):
         """Initialize speed and RPM gauges."""
-        self.speed_gauge = Gauge(**SPEED_GAUGE_CONFIG)
+        self.speed_gauge = Gauge(**SPEED_GAUGE_CONFIG, shader=GAUGE_SHADER)
         self.add_widget(self.speed_gauge)
 
-        self.rpm_gauge = Gauge(**RPM_GAUGE_CONFIG)
+        self.rpm_gauge = Gauge(**RPM_GAUGE_CONFIG, shader=GAUGE_SHADER)
         self.add_widget(self.rpm_gauge)
 
     def _setup_center_info(self):
@@ -159,50 +183,63 @@ class Dashboard(Widget):
         Update all dashboard displays from the shared sensor state.
 
         Args:
-            state: A ``SensorState`` instance, continuously updated by the CAN
-                and GPIO reader threads (see model.py for the full schema).
+            state: A ``Snapshot`` of the shared ``SensorState`` taken once for
+                this frame, so every widget sees the same burst (see model.py
+                for the full schema). Only fields flagged in its ``dirty`` mask
+                are pushed, so unchanged labels keep their textures.
         """
-        self.rpm_gauge.update_value(state.rpm)
-        self.speed_gauge.update_value(state.wheel_speed_fl_kmh)
-
-        self.rpm_gauge.set_shift(state.rpm >= SHIFT_RPM_THRESHOLD)
+        changed = state.changed
+        # the gauges lead their samples by the time since they were read off the bus
+        if changed("rpm"):
+            self.rpm_gauge.update_value(state.rpm, stamp=state.stamp("rpm"))
+            self.rpm_gauge.set_shift(state.rpm >= SHIFT_RPM_THRESHOLD)
+        if changed("wheel_speed_fl_kmh"):
+            self.speed_gauge.update_value(state.wheel_speed_fl_kmh,
+                                          stamp=state.stamp("wheel_speed_fl_kmh"))
+
+        def pick(name):
+            # ``None`` tells the centre readout to leave that value untouched
+            return getattr(state, name) if changed(name) else None
 
         self.center_info.set_values(
-            intake_c=state.air_temp,
-            water_c=state.engine_temp,
-            oil_press_bar=state.oil_pressure_bar,
-            lambda_val=state.lambda_afr,
-            boost_bar=max(0.0, state.map),  # boost only; vacuum clamps to 0.00
-            fuel_level=state.fuel_level,
-            fuel_press_bar=state.fuel_pressure_bar,
-            gear=state.gear_label,
+            intake_c=pick("air_temp"),
+            water_c=pick("engine_temp"),
+            oil_press_bar=pick("oil_pressure_bar"),
+            # the lambda colour also depends on rpm (engine-off suppression)
+            lambda_val=state.lambda_afr if changed("lambda_afr", "rpm") else None,
+            # boost only; vacuum clamps to 0.00
+            boost_bar=max(0.0, state.map) if changed("map") else None,
+            fuel_level=pick("fuel_level"),
+            fuel_press_bar=pick("fuel_pressure_bar"),
+            gear=pick("gear_label"),
             rpm=state.rpm,
-            oil_temp=state.oil_temp,
+            oil_temp=pick("oil_temp"),
         )
-        self.center_info.set_egt((state.egt1, state.egt2, state.egt3, state.egt4))
-
-        self.top_alerts.set_state(state)
+        if self.peaks is not None:
+            # boost peak of the last pull, held after lifting
+            self.center_info.set_boost_peak(self.peaks.max("map", "pull"))
+        if changed("egt1", "egt2", "egt3", "egt4"):
+            self.center_info.set_egt((state.egt1, state.egt2, state.egt3, state.egt4),
+                                     state.egt_avg, state.egt_median)
+
+        if state.stale != self._stale:
+            self._stale = state.stale
+            self.rpm_gauge.set_stale(state.is_stale("rpm"))
+            self.speed_gauge.set_stale(state.is_stale("wheel_speed_fl_kmh"))
+            self.center_info.set_stale(state)
+
+        active = self.alarms.active
+        self.top_alerts.set_state(state, self.alarms.names("telltale", active))
         self.night_dim.set_night(state.night)
-        self.alarm_bar.set_alarms(self._alarms(state))
+        self.alarm_bar.set_alarms(self.alarms.names("alarm", active))
 
-    @staticmethod
-    def _alarms(state):
-        """Active critical alarms for the bottom banner."""
-        alarms = []
-        # engine not running (off / cranking) — these readings aren't meaningful
-        # (lambda pegs lean on ambient O2, etc.), so keep the banner clear.
-        if state.rpm < 500:
-            return alarms
-        if state.lambda_afr > ALARM_LEAN_LAMBDA:
-            alarms.append("LEAN")
-        if state.engine_temp > ALARM_OVERHEAT_C:
-            alarms.append("OVERHEAT")
-        # low oil pressure, but only above idle (idle naturally runs lower)
-        if state.rpm > ALARM_OIL_PRESS_RPM and state.oil_pressure_bar < ALARM_OIL_PRESS_BAR:
-            alarms.append("OIL PRESSURE")
-        if max(state.egt1, state.egt2, state.egt3, state.egt4) > ALARM_EGT_C:
-            alarms.append("EGT")
-        return alarms
+    def update_trends(self, now, dt):
+        """Trend alerts from the rolling history (a DATA hook every ``TREND_EVERY``)."""
+        latest = self.history.latest("engine_temp")
+        slope = self.history.slope("engine_temp", ENGINE_CLIMB_WINDOW)
+        self.center_info.set_climbing(
+            "engine", latest is not None and latest[1] >= ENGINE_CLIMB_FROM
+            and slope is not None and slope * 60 >= ENGINE_CLIMB_WARN)
 
 
 # ============================================================================
@@ -212,65 +249,105 @@ class Dashboard(Widget):
 class CarClusterApp(App):
     """Main Kivy application for the car cluster dashboard."""
 
-    def __init__(self, state=None):
+    def __init__(self, state=None, history=None):
         super().__init__()
         self.state = state or SensorState()
+        # optional history.History; fed by the state's write path when local,
+        # from the frame's snapshots when the state is another process's
+        self.history = history
+        # a shm_state.SharedState is a read-only view of another process's state:
+        # that process runs the deriver, the alarm rules, the peak tracker and
+        # the no-CAN demo
+        self._local = isinstance(self.state, SensorState)
+        if self._local:
+            # derived channels (EGT avg/median, AFR, calc gear, slip) computed on write
+            self.state.set_deriver(Deriver())
+            # full-rate min/max hold, fed on the CAN thread; read O(1) from the UI
+            self.peaks = PeakTracker()
+            self.state.add_listener(self.peaks.record)
+            # alarm / tell-tale rules, evaluated at CAN rate with hysteresis + debounce
+            self.alarms = AlarmEngine()
+            self.state.add_listener(self.alarms.record)
+        else:
+            self.peaks = self.state.peaks
+            self.alarms = self.state.alarms
         self.dashboard = None
         self._demo_t0 = None  # monotonic time the demo loop engaged
+        self._seen = -1       # state version of the last rendered snapshot
+        if history is not None and not self._local:
+            # slots the history records, and the stamps of the writes already fed
+            self._history_slots = [FIELD_NAMES.index(name) for name in history.fields]
+            self._history_stamps = [0.0] * len(FIELD_NAMES)
 
     def build(self):
         """Build and return the main dashboard widget."""
-        self.dashboard = Dashboard()
+        self.dashboard = Dashboard(alarms=self.alarms, peaks=self.peaks, history=self.history)
         return self.dashboard
 
     def on_start(self):
         """Start the render loop once the gauges have finished their intro sweep."""
         Clock.schedule_once(
-            lambda _: Clock.schedule_interval(self.update_values, 1 / 30), RENDER_START_DELAY
+            lambda _: scheduler.add(DATA, self.update_values, every=1 / RENDER_RATE),
+            RENDER_START_DELAY
         )
-
-    def update_values(self, _):
+        if self._local:
+            # the rules also run on every write; this catches inputs that stop
+            scheduler.add(DATA, lambda now, dt: self.alarms.tick(now), every=ALARM_TICK)
+        if self.history is not None:
+            scheduler.add(DATA, self.dashboard.update_trends, every=TREND_EVERY)
+        if FRAME_STATS:
+            scheduler.add(PAINT, self._frame_stats, every=FRAME_STATS_EVERY)
+
+    def update_values(self, *_):
         """Render the current state, falling back to the demo loop with no CAN."""
         if not self.dashboard:
             return
-        if self.state.since_can() > NO_CAN_DEMO_DELAY:
+        if self._local and self.state.since_can() > NO_CAN_DEMO_DELAY:
             self._run_demo()
         else:
             self._demo_t0 = None
-        self.dashboard.update(self.state)
+        snap = self.state.snapshot(since=self._seen)
+        self._seen = snap.version
+        if self.history is not None and not self._local:
+            self._record_history(snap)
+        self.dashboard.update(snap)
+
+    def _record_history(self, snap):
+        """Feed the history every field written since the last frame (SHM:
+        the write path is in the ingest process; frame rate is plenty for trends)."""
+        seen, record = self._history_stamps, self.history.record
+        stamps = snap.stamps
+        for slot in self._history_slots:
+            t = stamps[slot]
+            if t != seen[slot]:
+                seen[slot] = t
+                record(t, ((slot, snap[slot]),))
 
-    def _run_demo(self):
-        """Feed the animated simulation into the state when no CAN is present.
+    @staticmethod
+    def _frame_stats(now, dt):
+        s = scheduler.stats()
+        print(f"[frames] {s['fps']:.1f} fps, frame {s['frame_ms']:.2f} ms "
+              f"(data {s['data_ms']:.2f}, animate {s['animate_ms']:.2f}, "
+              f"paint {s['paint_ms']:.2f}), worst {s['worst_ms']:.2f} ms", flush=True)
 
-        Writes only engine/CAN-derived fields (not GPIO inputs) directly into the
-        state — bypassing ``update()`` so it doesn't reset the CAN-activity clock.
-        Real CAN frames take over automatically the moment they arrive.
-        """
+    def _run_demo(self):
+        """Feed the animated simulation into the state when no CAN is present
+        (see ``demo.feed``). Real CAN frames take over the moment they arrive."""
         if self._demo_t0 is None:
             self._demo_t0 = time.monotonic()
-        vals = simulate(time.monotonic() - self._demo_t0)
-        s = self.state
-        s.rpm = vals["rpm"]
-        s.wheel_speed_fl_kmh = vals["speed"]
-        s.map = vals["map"]
-        s.lambda_afr = vals["lambda_afr"]
-        s.engine_temp = vals["engine_temp"]
-        s.air_temp = vals["air_temp"]
-        s.oil_pressure_bar = vals["oil"]
-        s.oil_temp = vals["oiltemp"]
-        s.fuel_level = vals["fuel"]
-        s.egt1, s.egt2, s.egt3, s.egt4 = vals["egt1"], vals["egt2"], vals["egt3"], vals["egt4"]
-
-
-def run_cluster(state):
+        feed(self.state, time.monotonic() - self._demo_t0)
+
+
+def run_cluster(state, history=None):
     """
     Run the cluster application against the provided sensor state.
 
     Args:
         state: A ``SensorState`` instance to display (and read live updates from).
+        history: Optional ``history.History`` recording ``state`` (trend alerts).
     """
     try:
-        app = CarClusterApp(state)
+        app = CarClusterApp(state, history)
         app.run()
     except Exception as e:
         print(f"Error running cluster: {e}")
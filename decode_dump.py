@@ -2,14 +2,40 @@
 """Decode a candump capture of the FuelTech FTCAN 2.0 bus.
 
 Reassembles the segmented real-time broadcast and prints every DataID found
-with its latest value. Handy for discovering which signals the ECU broadcasts
-(fan output, 2-step, day/night, etc.) without a live capture.
+with its statistics (count, min, max, last value, status bits). Handy for
+discovering which signals the ECU broadcasts (fan output, 2-step, day/night,
+etc.) without a live capture.
 
-Usage:  python decode_dump.py [dump.txt]
+Usage:  python decode_dump.py [dump.txt] [--jobs N] [--split time|id]
 Input lines look like:  can0  140812FF   [8]  00 00 70 00 06 00 AC 00
+(``candump -t a`` timestamps and ``candump -l`` ``ID#DATA`` lines work too.)
+
+The file is memory-mapped and parsed line by line with plain ``split`` and
+``unhexlify`` (no regex, no per-frame lists). Frames go through can_helper's
+own ``Reassembler`` and pair walk, so the capture decodes exactly as the dash
+would, with the same gap and orphan checks. A lost or out-of-order segment
+drops its packet and is counted in ``gaps``, never decoded as shifted pairs.
+Each pair is tallied as soon as it is complete, so a multi-GB dyno-day capture
+runs in constant memory. With
+``--jobs`` the work is spread over a process pool and the partial results are
+merged:
+
+  * ``time`` — the file is cut into contiguous byte ranges on line boundaries.
+    A worker finishes the packets still open at its range end by reading past
+    it, and ignores continuations at its start that belong to the previous
+    range (up to that ID's first segment 0), so the result is identical to a
+    single pass.
+  * ``id`` — every worker scans the whole file but decodes only the
+    arbitration IDs with ``cid % jobs == k``. This suits captures that are few
+    in IDs and heavy in segmented traffic.
 """
-import re
-import sys
+import argparse
+import mmap
+import os
+from binascii import unhexlify
+from concurrent.futures import ProcessPoolExecutor
+
+from can_helper import SIMPLE_BASE, SIMPLE_MASK, Reassembler, _pairs, _payload
 
 # DataID -> name (partial; from the FTCAN 2.0 protocol measure table). Extend as
 # signals are identified. MeasureID = (DataID << 1) | status_bit.
@@ -22,48 +48,214 @@ NAMES = {
 }
 
 ECU_PREFIX = 0x1408  # top 16 bits of this ECU's frame IDs (0x1408xxFF)
+TAIL_LINES = 4096    # lines a time-chunk worker may read past its end to close packets
+
+# per-DataID stats list indices
+COUNT, MIN, MAX, LAST, LAST_STATUS, STATUS_SEEN, LAST_POS = range(7)
+
+
+def _frame(line):
+    """``(cid, hex data)`` from one candump line, or None."""
+    tokens = line.split()
+    if tokens and tokens[0][:1] == b"(":        # -t a / -l timestamp
+        tokens = tokens[1:]
+    if len(tokens) >= 2 and b"#" in tokens[1]:  # candump -l: can0 140812FF#00007000...
+        cid, _, hexdata = tokens[1].partition(b"#")
+    elif len(tokens) >= 3 and tokens[2][:1] == b"[":
+        cid, hexdata = tokens[1], b"".join(tokens[3:])
+    else:
+        return None
+    try:
+        return int(cid, 16), hexdata
+    except ValueError:
+        return None
+
+
+class _Decoder:
+    """can_helper reassembly + per-DataID statistics for one pass."""
 
+    def __init__(self):
+        self.stats = {}        # DataID -> [count, min, max, last, last status, status seen, pos]
+        self.seg = Reassembler()
+        self.frames = 0
+        self.singles = 0       # unsegmented payloads (single packets, standard CAN)
 
-def main(path):
-    seg_buf = {}
-    payloads = []
-    for line in open(path):
-        m = re.match(r"\s*\w+\s+([0-9A-Fa-f]+)\s+\[(\d+)\]\s+(.*)", line)
-        if not m:
-            continue
-        cid = int(m.group(1), 16)
-        data = [int(x, 16) for x in m.group(3).split()]
-        if (cid >> 16) != ECU_PREFIX or not data:
-            continue
-        b0 = data[0]
-        if b0 == 0xFF:                       # single packet
-            payloads.append(bytes(data[1:]))
-        elif b0 == 0x00:                     # segment 0: size (2B) then payload
-            total = (data[1] << 8) | data[2]
-            seg_buf[cid] = [total, bytearray(data[3:])]
-        elif cid in seg_buf:                 # continuation segment
-            seg_buf[cid][1] += bytes(data[1:])
-            total, buf = seg_buf[cid]
-            if len(buf) >= total:
-                payloads.append(bytes(buf[:total]))
-                del seg_buf[cid]
-
-    seen = {}
-    for p in payloads:
-        for i in range(0, len(p) - 3, 4):
-            mid = (p[i] << 8) | p[i + 1]
-            val = (p[i + 2] << 8) | p[i + 3]
+    def feed(self, cid, data, pos):
+        self.frames += 1
+        if not (cid >> 11) & 0x7 or data[0] == 0xFF:
+            self.singles += 1
+        loc = _payload(cid, data, self.seg)
+        if loc is not None:
+            self._decode(_pairs(*loc), pos)
+
+    def _decode(self, pairs, pos):
+        stats = self.stats
+        for mid, val in pairs:
             if mid == 0:
                 continue
-            seen[mid >> 1] = (val, mid & 1)
+            signed = val - 65536 if val >= 32768 else val
+            status = mid & 1
+            s = stats.get(mid >> 1)
+            if s is None:
+                stats[mid >> 1] = [1, signed, signed, val, status, 1 << status, pos]
+                continue
+            s[COUNT] += 1
+            if signed < s[MIN]:
+                s[MIN] = signed
+            if signed > s[MAX]:
+                s[MAX] = signed
+            s[LAST] = val
+            s[LAST_STATUS] = status
+            s[STATUS_SEEN] |= 1 << status
+            s[LAST_POS] = pos
+
+    def result(self):
+        seg = self.seg
+        return {"stats": self.stats, "frames": self.frames,
+                "payloads": self.singles + seg.packets, "orphans": seg.orphans,
+                "gaps": seg.gaps, "incomplete": len(seg.open_ids())}
+
+
+def _lines(mm, start, end):
+    """``(offset, line)`` for every line starting in ``[start, end)``."""
+    pos = start
+    find = mm.find
+    while pos < end:
+        nl = find(b"\n", pos)
+        if nl < 0:
+            nl = len(mm)
+        yield pos, mm[pos:nl]
+        pos = nl + 1
+
+
+def _scan(path, start=0, end=None, part=None, parts=1):
+    """Decode one byte range (``time`` split) or one ID residue class (``id`` split)."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return _Decoder().result()
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    dec = _Decoder()
+    owned = set()      # segmented IDs whose first segment 0 in this range was seen
+    try:
+        if end is None:
+            end = len(mm)
+        for pos, line in _lines(mm, start, end):
+            frame = _frame(line)
+            if frame is None:
+                continue
+            cid, data = frame
+            if cid >> 16 != ECU_PREFIX or not data or cid & SIMPLE_MASK == SIMPLE_BASE:
+                continue                     # simplified packets aren't FTCAN pairs
+            if part is not None and cid % parts != part:
+                continue
+            try:
+                data = unhexlify(data)
+            except ValueError:
+                continue
+            if start and (cid >> 11) & 0x7 and cid not in owned:
+                if data[0] == 0x00:
+                    owned.add(cid)
+                elif data[0] != 0xFF:
+                    continue                 # tail of a packet the previous range owns
+            dec.feed(cid, data, pos)
+        # finish the packets still open at the range end
+        seg = dec.seg
+        still = seg.open_ids()
+        tail = 0
+        for pos, line in _lines(mm, end, len(mm)):
+            if not still or tail >= TAIL_LINES:
+                break
+            tail += 1
+            frame = _frame(line)
+            if frame is None:
+                continue
+            cid, data = frame
+            if cid not in still or not data:
+                continue
+            b0 = data[:2].upper()
+            if b0 == b"00":                  # a new packet: the next range owns it
+                seg.drop(cid)
+            elif b0 != b"FF":                # continuations only; singles are the next range's
+                try:
+                    data = unhexlify(data)
+                except ValueError:
+                    continue
+                dec.feed(cid, data, pos)     # the next range skips this line
+            if not seg.pending(cid):
+                still.discard(cid)
+    finally:
+        mm.close()
+    return dec.result()
+
+
+def _chunks(path, jobs):
+    """Split ``path`` into ``jobs`` byte ranges that start at line boundaries."""
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, "rb") as f:
+        for k in range(1, jobs):
+            f.seek(size * k // jobs)
+            f.readline()
+            bounds.append(max(f.tell(), bounds[-1]))
+    bounds.append(size)
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def merge(results):
+    """Combine partial results (any order) into one."""
+    out = {"stats": {}, "frames": 0, "payloads": 0, "orphans": 0, "gaps": 0, "incomplete": 0}
+    stats = out["stats"]
+    for r in results:
+        for key in ("frames", "payloads", "orphans", "gaps", "incomplete"):
+            out[key] += r[key]
+        for did, s in r["stats"].items():
+            m = stats.get(did)
+            if m is None:
+                stats[did] = list(s)
+                continue
+            m[COUNT] += s[COUNT]
+            m[MIN] = min(m[MIN], s[MIN])
+            m[MAX] = max(m[MAX], s[MAX])
+            if s[LAST_POS] > m[LAST_POS]:
+                m[LAST], m[LAST_STATUS], m[LAST_POS] = s[LAST], s[LAST_STATUS], s[LAST_POS]
+            m[STATUS_SEEN] |= s[STATUS_SEEN]
+    return out
+
+
+def analyse(path, jobs=1, split="time"):
+    """Per-DataID statistics of a candump capture, optionally across ``jobs`` processes."""
+    if jobs <= 1:
+        return _scan(path)
+    with ProcessPoolExecutor(jobs) as pool:
+        if split == "id":
+            futures = [pool.submit(_scan, path, 0, None, k, jobs) for k in range(jobs)]
+        else:
+            futures = [pool.submit(_scan, path, a, b) for a, b in _chunks(path, jobs)]
+        return merge(f.result() for f in futures)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Decode an FTCAN 2.0 candump capture.")
+    ap.add_argument("path", nargs="?", default="dump.txt")
+    ap.add_argument("--jobs", type=int, default=1, help="worker processes (default 1)")
+    ap.add_argument("--split", choices=("time", "id"), default="time",
+                    help="split work by file range (time) or arbitration ID")
+    args = ap.parse_args(argv)
 
-    print(f"{len(payloads)} payloads reassembled, {len(seen)} unique DataIDs\n")
-    for did in sorted(seen):
-        val, status = seen[did]
+    r = analyse(args.path, args.jobs, args.split)
+    stats = r["stats"]
+    print(f"{r['frames']} frames, {r['payloads']} payloads reassembled, "
+          f"{len(stats)} unique DataIDs ({r['orphans']} orphan segments, "
+          f"{r['gaps']} packets lost to gaps, {r['incomplete']} incomplete)\n")
+    for did in sorted(stats):
+        s = stats[did]
+        val = s[LAST]
         signed = val - 65536 if val >= 32768 else val
-        kind = "STATUS" if status else "value"
-        print(f"  DataID 0x{did:04X} {NAMES.get(did, ''):18s} {kind}={signed:6d} (0x{val:04X})")
+        kind = "STATUS" if s[LAST_STATUS] else "value"
+        seen = "/".join(k for bit, k in ((1, "value"), (2, "status")) if s[STATUS_SEEN] & bit)
+        print(f"  DataID 0x{did:04X} {NAMES.get(did, ''):18s} {kind}={signed:6d} (0x{val:04X})"
+              f"  n={s[COUNT]:<7d} min={s[MIN]:<6d} max={s[MAX]:<6d} [{seen}]")
 
 
 if __name__ == "__main__":
-    main(sys.argv[1] if len(sys.argv) > 1 else "dump.txt")
+    main()
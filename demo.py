@@ -69,3 +69,27 @@ def simulate(t):
         "oiltemp": coolant + 8,   # oil runs a little hotter than coolant
         "egt1": egt[0], "egt2": egt[1], "egt3": egt[2], "egt4": egt[3],
     }
+
+
+def feed(state, t):
+    """Write ``simulate(t)`` into a ``SensorState`` as one unstamped update.
+
+    Writes only engine/CAN-derived fields (not GPIO inputs) and doesn't reset
+    the CAN-activity clock, so real CAN frames take over the moment they arrive.
+    """
+    vals = simulate(t)
+    state.update({
+        "rpm": vals["rpm"],
+        "wheel_speed_fl_kmh": vals["speed"],
+        "map": vals["map"],
+        "lambda_afr": vals["lambda_afr"],
+        "engine_temp": vals["engine_temp"],
+        "air_temp": vals["air_temp"],
+        "oil_pressure_bar": vals["oil"],
+        "oil_temp": vals["oiltemp"],
+        "fuel_level": vals["fuel"],
+        "egt1": vals["egt1"],
+        "egt2": vals["egt2"],
+        "egt3": vals["egt3"],
+        "egt4": vals["egt4"],
+    }, stamp=False)
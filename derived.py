@@ -0,0 +1,101 @@
+"""Derived channels: values computed from other SensorState fields.
+
+Each ``Channel`` names its output field (declared in ``model.SENSOR_FIELDS``
+like any native field), the fields it reads, and a pure function of those
+inputs. ``Deriver`` compiles the list once into slot indexes plus an input
+bitmask, and is installed with ``SensorState.set_deriver``: inside every write
+it recomputes only the channels whose inputs changed in that write, and the
+results are committed alongside their inputs. The widgets then read
+``egt_avg`` / ``afr`` / ``calc_gear`` etc. instead of redoing the math per frame.
+"""
+
+from collections import namedtuple
+
+from model import FIELD_NAMES
+
+EGT_FIELDS = ("egt1", "egt2", "egt3", "egt4")
+STOICH_AFR = 14.7   # gasoline; lambda 1.0 = 14.7:1
+
+# Engine rpm per km/h in each gear, 1st..5th: gearbox ratio x final drive over
+# the driven tyre's rolling circumference (MQ box, 4.11 final, 175/70 R13 ≈
+# 1.78 m). Calibrate against the car by logging rpm / wheel_speed_fl_kmh per gear.
+RPM_PER_KMH = (132.8, 74.7, 49.6, 35.0, 27.3)
+GEAR_TOLERANCE = 0.12   # max relative mismatch to call a gear (clutch in / slipping = 0)
+GEAR_MIN_KMH = 5.0      # below this the ratio is too noisy to call a gear
+SLIP_MIN_KMH = 5.0      # below this wheel slip reads 0 (ratio of tiny numbers)
+
+Channel = namedtuple("Channel", "name inputs fn")
+
+
+def _egt_avg(*t):
+    return sum(t) / len(t)
+
+
+def _egt_median(*t):
+    s = sorted(t)
+    n = len(s)
+    mid = n // 2
+    return s[mid] if n % 2 else (s[mid - 1] + s[mid]) / 2.0
+
+
+def _egt_spread(*t):
+    return max(t) - min(t)
+
+
+def _afr(lam):
+    return lam * STOICH_AFR
+
+
+def _calc_gear(rpm, kmh):
+    """Gear whose rpm/speed ratio matches within GEAR_TOLERANCE, else 0."""
+    if kmh < GEAR_MIN_KMH:
+        return 0
+    ratio = rpm / kmh
+    best, best_err = 0, GEAR_TOLERANCE
+    for gear, expect in enumerate(RPM_PER_KMH, 1):
+        err = abs(ratio - expect) / expect
+        if err < best_err:
+            best, best_err = gear, err
+    return best
+
+
+def _wheel_slip(fl, fr, rl, rr):
+    """Front (driven) over rear (free-rolling) wheel speed, in percent."""
+    rear = (rl + rr) / 2.0
+    if rear < SLIP_MIN_KMH:
+        return 0.0
+    return ((fl + fr) / 2.0 - rear) / rear * 100.0
+
+
+CHANNELS = (
+    Channel("egt_avg", EGT_FIELDS, _egt_avg),
+    Channel("egt_median", EGT_FIELDS, _egt_median),
+    Channel("egt_spread", EGT_FIELDS, _egt_spread),
+    Channel("afr", ("lambda_afr",), _afr),
+    Channel("calc_gear", ("rpm", "wheel_speed_fl_kmh"), _calc_gear),
+    Channel("wheel_slip", ("wheel_speed_fl_kmh", "wheel_speed_fr_kmh",
+                           "wheel_speed_rl_kmh", "wheel_speed_rr_kmh"), _wheel_slip),
+)
+
+
+class Deriver:
+    """Compiled ``CHANNELS``, callable as a ``SensorState`` deriver."""
+
+    def __init__(self, channels=CHANNELS):
+        slot = {name: i for i, name in enumerate(FIELD_NAMES)}
+        self._compiled = []
+        for ch in channels:
+            slots = tuple(slot[f] for f in ch.inputs)
+            mask = 0
+            for s in slots:
+                mask |= 1 << s
+            self._compiled.append((ch.name, slots, mask, ch.fn))
+
+    def __call__(self, values, changed):
+        out = None
+        for name, slots, mask, fn in self._compiled:
+            if changed & mask:
+                if out is None:
+                    out = []
+                out.append((name, fn(*[values[s] for s in slots])))
+        return out
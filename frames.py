@@ -0,0 +1,138 @@
+"""One frame scheduler for the whole UI, instead of a Kivy clock per widget.
+
+Every widget used to keep its own ``Clock.schedule_interval``: two needle
+animators, the 30 Hz state pull, the tell-tale and alarm-banner blinkers, the
+shift strobe and the WiFi poll. They woke independently and drifted against
+each other and against the display, so two blinkers beat visibly and nothing
+measured what a whole frame cost.
+
+``FrameScheduler`` runs its hooks on one tick, in three fixed phases:
+
+  * ``DATA``     — pull new values (the state snapshot, the WiFi poll)
+  * ``ANIMATE``  — advance motion (needles) to this frame's time
+  * ``PAINT``    — apply blink / strobe phases and other cosmetic state
+
+A hook is ``fn(now, dt)``. ``now`` is the tick's ``time.monotonic()``, shared by
+every hook in the tick (the same clock as ``SensorState`` stamps). ``dt`` is the
+time since that hook last ran (0 on its first run after waking).
+
+A hook added with ``every`` runs on the first tick at or after each later
+multiple of its period. Any other hook returns when it next needs to run:
+``now`` for the next frame (a needle in motion), a later time (the next edge of
+a blink) or None to sleep until ``wake(fn)``. The tick itself is a one-shot for
+the earliest of those times, so with every needle at rest and nothing blinking
+only the periodic hooks wake the UI.
+
+``blink(period)`` derives a square wave from the same timebase, so every
+blinker with the same period flips in the same tick, and ``next_blink`` is when
+it flips next. ``stats()`` reports the tick rate and per-phase cost since the
+previous call. With ``FRAME_STATS=true`` the cluster prints it every few
+seconds.
+"""
+
+import time
+
+from kivy.clock import Clock
+
+DATA, ANIMATE, PAINT = range(3)
+PHASE_NAMES = ("data", "animate", "paint")
+
+
+class FrameScheduler:
+    """Hooks in DATA → ANIMATE → PAINT order on one monotonic clock, ticking
+    only when one of them is due."""
+
+    def __init__(self):
+        self.now = time.monotonic()
+        self._hooks = ([], [], [])       # per phase: [fn, every, due (None = asleep), last]
+        self._event = None               # the booked tick (a Kivy one-shot)
+        self._ticking = False
+        self._frames = 0
+        self._cost = [0.0, 0.0, 0.0]     # seconds per phase since stats()
+        self._worst = 0.0                # slowest whole tick since stats()
+        self._since = self.now
+
+    def add(self, phase, fn, every=0.0):
+        """Run ``fn(now, dt)`` in ``phase`` every ``every`` s, or, with no
+        ``every``, on the next tick and then whenever it asks to (see above)."""
+        due = (int(time.monotonic() / every) + 1) * every if every else 0.0
+        self._hooks[phase].append([fn, every, due, None])
+        self._book()
+
+    def remove(self, fn):
+        """Drop every hook that calls ``fn``."""
+        for hooks in self._hooks:
+            hooks[:] = [h for h in hooks if h[0] != fn]
+
+    def wake(self, fn):
+        """Run the sleeping hook ``fn`` on the next tick (this one, if its
+        phase is still to come)."""
+        for hooks in self._hooks:
+            for hook in hooks:
+                if hook[0] == fn and not hook[1] and hook[2] != 0.0:
+                    hook[2] = 0.0
+                    hook[3] = None
+                    self._book()
+
+    def blink(self, period):
+        """On/off phase of a square wave toggling every ``period`` s (True first)."""
+        return int(self.now / period) % 2 == 0
+
+    def next_blink(self, period):
+        """Time of the next ``blink(period)`` flip."""
+        return (int(self.now / period) + 1) * period
+
+    def tick(self, _=None):
+        self._event = None
+        self._ticking = True
+        self.now = now = time.monotonic()
+        clock = time.perf_counter
+        start = mark = clock()
+        cost = self._cost
+        for phase, hooks in enumerate(self._hooks):
+            for hook in tuple(hooks):        # a hook may remove itself
+                fn, every, due, last = hook
+                if due is None or now < due:
+                    continue
+                if every:
+                    # next multiple of the period (skipping any missed ones)
+                    hook[2] = (int(now / every) + 1) * every
+                hook[3] = now
+                want = fn(now, now - last if last is not None else 0.0)
+                if not every:
+                    hook[2] = want
+            t = clock()
+            cost[phase] += t - mark
+            mark = t
+        self._worst = max(self._worst, mark - start)
+        self._frames += 1
+        self._ticking = False
+        self._book()
+
+    def _book(self):
+        """(Re)book the tick for the earliest due hook; none due = no tick."""
+        if self._ticking:
+            return                           # the running tick books on its way out
+        due = [h[2] for hooks in self._hooks for h in hooks if h[2] is not None]
+        if self._event is not None:
+            self._event.cancel()
+            self._event = None
+        if due:
+            self._event = Clock.schedule_once(self.tick, max(min(due) - time.monotonic(), 0))
+
+    def stats(self):
+        """{'fps' (ticks/s), per-phase mean ms, 'frame_ms' mean, 'worst_ms'}
+        since the last call."""
+        now = time.monotonic()
+        n = max(self._frames, 1)
+        out = {"fps": self._frames / max(now - self._since, 1e-9)}
+        for name, cost in zip(PHASE_NAMES, self._cost):
+            out[name + "_ms"] = cost / n * 1000
+        out["frame_ms"] = sum(self._cost) / n * 1000
+        out["worst_ms"] = self._worst * 1000
+        self._frames, self._cost, self._worst, self._since = 0, [0.0, 0.0, 0.0], 0.0, now
+        return out
+
+
+# the app's shared scheduler (widgets register with it, like Kivy's ``Clock``)
+scheduler = FrameScheduler()
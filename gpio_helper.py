@@ -1,6 +1,22 @@
+"""Dashboard switches on the GPIO header, read on edges.
+
+Each ``Pin`` is claimed for edge alerts (both edges, pull-up), so ``IoState``
+changes the moment a switch does instead of on the next poll. The kernel
+stamps every edge. ``EdgeReader`` debounces per pin against those stamps: the
+first edge of a transition is taken straight away, and anything inside that
+pin's ``DEBOUNCE`` window after it is contact bounce. When the window closes the
+pin is read again and a level that differs from the one taken is published, so
+a noise pulse shorter than the window can't latch the wrong state. Only real
+changes reach ``IoState`` and the ``[gpio]`` log.
+
+Backends: ``LgpioBackend`` (lgpio alerts; the Pi) and ``MockBackend``, which
+drives edges by hand so the whole path runs on a dev box.
+"""
+
+import os
 import time
 from enum import Enum
-import RPi.GPIO as GPIO
+from threading import Event, Lock, Timer
 
 from model import SensorState
 
@@ -18,31 +34,156 @@ class Pin(Enum):
 # here are wired the opposite way and read active-high (inverted).
 INVERTED = {Pin.CHOKE}
 
-def read_io(state=None):
-    if state is None:
-        state = SensorState()
-    GPIO.setmode(GPIO.BCM)
-    prev = {}
-    try:
-        for pin in Pin:
-            GPIO.setup(pin.value, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+# Seconds after an accepted edge during which further edges on that pin are
+# treated as contact bounce. The indicator relay flashes at ~1.5 Hz, so a short
+# window keeps every blink.
+DEBOUNCE = 0.02
+DEBOUNCE_PIN = {
+    Pin.PARKING_BRAKE: 0.05,   # lever microswitch chatters longer
+}
+
+# /dev/gpiochipN of the header: 0 on the Pi 5 with current kernels, 4 on older ones
+GPIO_CHIP = int(os.environ.get("GPIO_CHIP", "0"))
+
+
+class LgpioBackend:
+    """Edge alerts from lgpio (kernel-timestamped, via rpi-lgpio's lgpio)."""
+
+    def __init__(self, chip=GPIO_CHIP):
+        import lgpio
+        self._lg = lgpio
+        self._handle = lgpio.gpiochip_open(chip)
+        self._callbacks = []
+
+    def read(self, gpio):
+        return self._lg.gpio_read(self._handle, gpio)
+
+    def watch(self, gpios, on_edge):
+        """Call ``on_edge(gpio, level, timestamp_ns)`` on every edge of ``gpios``."""
+        lg = self._lg
+
+        def alert(_chip, gpio, level, ts):
+            if level < 2:                   # 2 = watchdog timeout, not an edge
+                on_edge(gpio, level, ts)
+
+        for gpio in gpios:
+            lg.gpio_claim_alert(self._handle, gpio, lg.BOTH_EDGES, lg.SET_PULL_UP)
+            self._callbacks.append(lg.callback(self._handle, gpio, lg.BOTH_EDGES, alert))
+
+    def close(self):
+        for cb in self._callbacks:
+            cb.cancel()
+        self._lg.gpiochip_close(self._handle)
+
+
+class MockBackend:
+    """Hand-driven pins for a dev box: ``set(gpio, level)`` fires the edge."""
+
+    def __init__(self, levels=None):
+        self._levels = dict(levels or {})
+        self._on_edge = None
 
+    def read(self, gpio):
+        return self._levels.get(gpio, 1)    # pulled up: idle high
+
+    def watch(self, gpios, on_edge):
+        self._on_edge = on_edge
+
+    def set(self, gpio, level, ts=None):
+        """Drive ``gpio`` to ``level``; ``ts`` (ns) defaults to now."""
+        if self._levels.get(gpio, 1) == level:
+            return
+        self._levels[gpio] = level
+        if self._on_edge is not None:
+            self._on_edge(gpio, level, time.monotonic_ns() if ts is None else ts)
+
+    def close(self):
+        self._on_edge = None
+
+
+class EdgeReader:
+    """Debounced edges from a backend, applied to ``SensorState.io``."""
+
+    def __init__(self, state, backend):
+        self.state = state
+        self.backend = backend
+        self._pins = {pin.value: pin for pin in Pin}
+        self._debounce = {pin.value: int(DEBOUNCE_PIN.get(pin, DEBOUNCE) * 1e9) for pin in Pin}
+        self._active = {}                    # gpio -> debounced active state
+        self._edge_ns = {gpio: 0 for gpio in self._pins}   # kernel time of the last accepted edge
+        self._settle = {}                    # gpio -> Timer re-reading it as its window closes
+        self._lock = Lock()                  # alert thread vs settle timers
+        self.bounces = 0
+
+    def start(self):
+        """Seed ``IoState`` from the current levels, then follow edges."""
+        readings = {}
+        for gpio, pin in self._pins.items():
+            active = self._is_active(pin, self.backend.read(gpio))
+            self._active[gpio] = active
+            readings[pin.name.lower()] = active
+            self._log(pin, active)
+        self.state.io.update(readings)
+        self.backend.watch(tuple(self._pins), self._on_edge)
         print("[gpio] watching: " + ", ".join(f"{p.name}=GPIO{p.value}" for p in Pin),
               flush=True)
 
-        while True:
-            readings = {}
-            for pin in Pin:
-                raw = bool(GPIO.input(pin.value))
-                active = raw if pin in INVERTED else not raw
-                readings[pin.name.lower()] = active
-                # log only on change so toggling a switch reveals its pin
-                if prev.get(pin.name) != active:
-                    prev[pin.name] = active
-                    print(f"[gpio] {pin.name} (GPIO{pin.value}) -> {'ON' if active else 'off'}",
-                          flush=True)
-            state.io.update(readings)
-
-            time.sleep(1 / 30)
+    def _on_edge(self, gpio, level, ts):
+        pin = self._pins.get(gpio)
+        if pin is None:
+            return
+        active = self._is_active(pin, level)
+        with self._lock:
+            if active == self._active[gpio]:
+                return
+            if ts - self._edge_ns[gpio] < self._debounce[gpio]:
+                self.bounces += 1
+                return
+            self._accept(pin, active, ts)
+
+    def _accept(self, pin, active, ts):
+        """Publish ``pin``'s new state and re-read it once its window has passed."""
+        gpio = pin.value
+        self._edge_ns[gpio] = ts
+        self._active[gpio] = active
+        self.state.io.update({pin.name.lower(): active})
+        self._log(pin, active)
+        timer = self._settle.get(gpio)
+        if timer is not None:
+            timer.cancel()
+        timer = self._settle[gpio] = Timer(self._debounce[gpio] / 1e9, self._settled, (pin,))
+        timer.daemon = True
+        timer.start()
+
+    def _settled(self, pin):
+        """End of ``pin``'s debounce window: publish the level it settled at."""
+        active = self._is_active(pin, self.backend.read(pin.value))
+        with self._lock:
+            if active != self._active[pin.value]:
+                # stamped at the window's end, on the kernel's edge timebase
+                self._accept(pin, active, self._edge_ns[pin.value] + self._debounce[pin.value])
+
+    def last_edge(self, pin):
+        """Kernel timestamp (s) of ``pin``'s last accepted edge (0 = none yet)."""
+        return self._edge_ns[pin.value] / 1e9
+
+    @staticmethod
+    def _is_active(pin, level):
+        return bool(level) if pin in INVERTED else not level
+
+    @staticmethod
+    def _log(pin, active):
+        # log every change so toggling a switch reveals its pin
+        print(f"[gpio] {pin.name} (GPIO{pin.value}) -> {'ON' if active else 'off'}", flush=True)
+
+
+def read_io(state=None, backend=None):
+    """Follow the dashboard switches into ``state.io`` until the process exits."""
+    if state is None:
+        state = SensorState()
+    try:
+        reader = EdgeReader(state, backend or LgpioBackend())
+        reader.start()
+        Event().wait()
     except Exception as e:
         print("[gpio] error:", e, flush=True)
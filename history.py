@@ -0,0 +1,134 @@
+"""Rolling per-channel history of SensorState, in preallocated NumPy rings.
+
+``SensorState`` only holds the latest value of each field. A ``History`` keeps
+the last ``seconds`` of every numeric field as a fixed-size ring of
+(timestamp, value) samples, written by the CAN ingest thread on every commit
+(see ``SensorState.add_listener``; every decoded value of a burst, stamped
+with the burst's time) and queried from anywhere with vectorised
+helpers: the last N seconds, min / max / mean, slope, and resampling onto a
+fixed-rate grid. It's the backbone for trends, peak hold and derived channels.
+
+The rings are allocated once; recording a sample is two array stores and an
+index bump, so ingest never allocates per sample. Optional — needs NumPy:
+
+    history = History(seconds=30)
+    state.add_listener(history.record)
+    t, v = history.last("map", 10)          # boost over the last 10 s
+"""
+
+import time
+
+import numpy as np
+
+from model import FIELD_NAMES, SENSOR_FIELDS
+
+DEFAULT_SECONDS = 30.0
+DEFAULT_RATE = 200.0   # ring slots per second per channel (ECU broadcasts ≤100 Hz)
+
+
+class History:
+    """Fixed-size (t, value) rings, one per numeric ``SensorState`` field."""
+
+    def __init__(self, seconds=DEFAULT_SECONDS, rate=DEFAULT_RATE, fields=None):
+        if fields is None:
+            # every numeric field (bools record as 0/1); the gear label is text
+            fields = [name for name, default in SENSOR_FIELDS if not isinstance(default, str)]
+        self.fields = tuple(fields)
+        self.capacity = max(2, int(seconds * rate))
+        n = len(self.fields)
+        self._t = np.zeros((n, self.capacity))
+        self._v = np.zeros((n, self.capacity))
+        self._head = [0] * n      # next write position per channel
+        self._count = [0] * n     # samples held per channel (≤ capacity)
+        self._index = {name: row for row, name in enumerate(self.fields)}
+        # SensorState slot -> ring row (-1 = not recorded)
+        self._row = [self._index.get(name, -1) for name in FIELD_NAMES]
+
+    # ---- ingest ----
+
+    def record(self, now, written):
+        """``SensorState`` listener: append each written (slot, value) at ``now``."""
+        rows, t, v = self._row, self._t, self._v
+        head, count, cap = self._head, self._count, self.capacity
+        for slot, value in written:
+            row = rows[slot]
+            if row < 0:
+                continue
+            h = head[row]
+            v[row, h] = value
+            t[row, h] = now
+            head[row] = h + 1 if h + 1 < cap else 0
+            if count[row] < cap:
+                count[row] += 1
+
+    # ---- queries ----
+
+    def last(self, name, seconds=None, now=None):
+        """Samples of ``name`` from the last ``seconds`` (all held if None),
+        oldest first, as ``(t, v)`` arrays of monotonic time and value.
+
+        Until the ring wraps these are views straight into it (no copy); copy
+        them if you keep them across commits."""
+        row = self._index[name]
+        h, n = self._head[row], self._count[row]
+        t, v = self._t[row], self._v[row]
+        if n < self.capacity:
+            t, v = t[:n], v[:n]                 # not wrapped yet: already ordered
+        elif h:
+            t = np.concatenate((t[h:], t[:h]))
+            v = np.concatenate((v[h:], v[:h]))
+        if seconds is not None:
+            if now is None:
+                now = time.monotonic()
+            start = np.searchsorted(t, now - seconds)
+            t, v = t[start:], v[start:]
+        return t, v
+
+    def latest(self, name):
+        """Most recent ``(t, value)`` of ``name``, or None before any sample."""
+        row = self._index[name]
+        if not self._count[row]:
+            return None
+        h = self._head[row] - 1
+        return self._t[row, h], self._v[row, h]
+
+    def min(self, name, seconds=None):
+        _, v = self.last(name, seconds)
+        return float(v.min()) if v.size else None
+
+    def max(self, name, seconds=None):
+        _, v = self.last(name, seconds)
+        return float(v.max()) if v.size else None
+
+    def mean(self, name, seconds=None):
+        _, v = self.last(name, seconds)
+        return float(v.mean()) if v.size else None
+
+    def slope(self, name, seconds=None):
+        """Least-squares rate of change of ``name`` (units per second)."""
+        t, v = self.last(name, seconds)
+        if v.size < 2:
+            return None
+        dt = t - t.mean()
+        denom = float(np.dot(dt, dt))
+        if not denom:
+            return 0.0
+        return float(np.dot(dt, v - v.mean()) / denom)
+
+    def resample(self, name, seconds, rate, now=None):
+        """``name`` over the last ``seconds`` on a fixed ``rate`` Hz grid
+        (linear interpolation, held flat outside the recorded span). Returns
+        ``(t, v)``; both empty before any sample."""
+        if now is None:
+            now = time.monotonic()
+        t, v = self.last(name, seconds, now)
+        if not v.size:
+            return t, v
+        grid = np.arange(now - seconds, now, 1.0 / rate)
+        return grid, np.interp(grid, t, v)
+
+    def clear(self):
+        """Forget every sample (keeps the allocation)."""
+        n = len(self.fields)
+        self._head[:] = [0] * n
+        self._count[:] = [0] * n
@@ -0,0 +1,252 @@
+"""Columnar reader for recorder.py logs: seek by time, get NumPy arrays back.
+
+    log = LogReader(glob.glob("recordings/frames-20260412-*.ftr"))
+    cols = log.columns(("map", "lambda_afr", "egt1"), log.t0 + 3600, log.t0 + 3610)
+    t, boost = cols["map"]
+
+Every segment is memory-mapped read-only and viewed as a 2-D record array
+(blocks × records, strided over the block headers) without copying. Opening a
+log reads one block header per 4 KiB: sealed blocks go into a sparse index
+holding each block's first timestamp. A time range is two ``searchsorted``
+calls on that index, and only the blocks inside are touched — and CRC-checked,
+the first time they are read. A 10-second pull out of a 2-hour drive reads a
+few hundred KiB.
+
+``DELTAS`` logs already hold (time, slot, value). Columns are selected by slot,
+using the field names saved in the segment header. ``FRAMES`` logs hold raw CAN
+frames and are decoded with can_helper's own tables (``MEASURE_MAP`` dispatch,
+``Reassembler``, EGT-4 and simplified layouts), so offline numbers match the
+dash. Needs NumPy.
+
+CLI — export a time range (seconds from the start of the log) to CSV:
+
+    python logreader.py recordings/deltas-*.ftr --fields map,lambda_afr,egt1 \\
+        --from 3600 --to 3610 -o pull.csv
+"""
+
+import argparse
+import mmap
+import sys
+import zlib
+
+import numpy as np
+
+from can_helper import (EGT4_ID, SIMPLE_BASE, SIMPLE_FIELDS, SIMPLE_MASK, Reassembler,
+                        _build_dispatch, _build_simple, _decode_egt4, _decode_into,
+                        _decode_simple)
+from recorder import (BLOCK, BLOCK_SIZE, COMMIT, DELTA, EXTENDED_FLAG, FILE_HEADER,
+                      HEADER_SIZE, KIND_CODE, MAGIC, RECORD_SIZE, RECORDS_PER_BLOCK)
+
+FRAME_DTYPE = np.dtype([("t", "<f8"), ("id", "<u4"), ("dlc", "u1"), ("flags", "u1"),
+                        ("bus", "u1"), ("pad", "u1"), ("data", "u1", 8)])
+DELTA_DTYPE = np.dtype([("t", "<f8"), ("slot", "<u2"), ("pad", "V6"), ("value", "<f8")])
+_HEAD_DTYPE = np.dtype([("marker", "<u4"), ("seq", "<u4"), ("count", "<u2"),
+                        ("reserved", "<u2"), ("crc", "<u4")])
+_KINDS = {code: kind for kind, code in KIND_CODE.items()}
+
+assert FRAME_DTYPE.itemsize == DELTA_DTYPE.itemsize == RECORD_SIZE == DELTA.size
+assert _HEAD_DTYPE.itemsize == BLOCK.size
+
+
+class _Segment:
+    """One segment file: header, record view and committed-block index."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, code, block_size, record_size, self.wall, self.mono = \
+            FILE_HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or block_size != BLOCK_SIZE or record_size != RECORD_SIZE:
+            raise ValueError(f"{path}: not a recorder segment")
+        self.kind = _KINDS[code]
+        table = bytes(self.map[FILE_HEADER.size:HEADER_SIZE]).rstrip(b"\0")
+        self.names = tuple(table.decode().split("\0")) if table else ()
+        nblocks = (len(self.map) - HEADER_SIZE) // BLOCK_SIZE
+        dtype = FRAME_DTYPE if self.kind == "frames" else DELTA_DTYPE
+        self.records = np.ndarray((nblocks, RECORDS_PER_BLOCK), dtype, buffer=self.map,
+                                  offset=HEADER_SIZE + BLOCK.size,
+                                  strides=(BLOCK_SIZE, RECORD_SIZE))
+        # the index comes from the block headers alone (a strided view, no CRC)
+        heads = np.ndarray(nblocks, _HEAD_DTYPE, buffer=self.map, offset=HEADER_SIZE,
+                           strides=(BLOCK_SIZE,))
+        sealed = heads["marker"] == COMMIT
+        if not sealed.all():
+            sealed[np.argmin(sealed):] = False   # blocks are sealed in order: the rest is unused
+        counts = heads["count"].astype(np.int64)
+        good = sealed & (heads["seq"] == np.arange(nblocks)) \
+            & (counts > 0) & (counts <= RECORDS_PER_BLOCK)
+        self.blocks = np.flatnonzero(good)
+        self.counts = counts[self.blocks]
+        self.crcs = heads["crc"][self.blocks]
+        self.first = self.records["t"][self.blocks, 0] if len(self.blocks) else np.empty(0)
+
+    def intact(self, block, count, crc):
+        """CRC check of one block's records (False: torn by a power cut mid-write)."""
+        base = HEADER_SIZE + block * BLOCK_SIZE + BLOCK.size
+        return zlib.crc32(self.map[base:base + count * RECORD_SIZE]) == crc
+
+
+class LogReader:
+    """Time-indexed, columnar access to one recording (one or more segments).
+
+    Blocks are CRC-checked when first read (``verify=False`` skips it), so
+    opening a log costs one header read per block whatever its length."""
+
+    def __init__(self, paths, verify=True, simple=False):
+        if isinstance(paths, str):
+            paths = [paths]
+        segments = [_Segment(p) for p in paths]
+        segments = [s for s in segments if len(s.blocks)]
+        if not segments:
+            raise ValueError("no committed data in " + ", ".join(paths))
+        segments.sort(key=lambda s: s.first[0])
+        kinds = {s.kind for s in segments}
+        if len(kinds) > 1:
+            raise ValueError("mixed frame and delta segments")
+        self.kind = kinds.pop()
+        self.names = segments[0].names
+        self._segments = segments
+        # sparse index: one entry per committed block, in time order
+        self._first = np.concatenate([s.first for s in segments])
+        self._seg = np.concatenate([np.full(len(s.blocks), i) for i, s in enumerate(segments)])
+        self._block = np.concatenate([s.blocks for s in segments])
+        self._count = np.concatenate([s.counts for s in segments])
+        self._crc = np.concatenate([s.crcs for s in segments])
+        # per block: 1 intact, 0 torn, -1 not checked yet
+        self._ok = np.full(len(self._first), -1 if verify else 1, dtype=np.int8)
+        last = len(self._first) - 1
+        while last > 0 and not self._intact(last):
+            last -= 1                   # a torn tail must not set t1
+        seg = self._segments[self._seg[last]]
+        self.t0 = float(self._first[0])
+        self.t1 = float(seg.records["t"][self._block[last], self._count[last] - 1])
+        self._simple = SIMPLE_FIELDS if simple is True else simple
+
+    def _intact(self, i):
+        ok = self._ok[i]
+        if ok < 0:
+            seg = self._segments[self._seg[i]]
+            ok = self._ok[i] = seg.intact(int(self._block[i]), int(self._count[i]),
+                                          int(self._crc[i]))
+        return ok
+
+    def blocks(self, start=None, end=None):
+        """Zero-copy record views, one per committed block overlapping
+        [start, end) (whole blocks: trim by ``t`` yourself). Only these blocks
+        are CRC-checked; torn ones are skipped."""
+        lo = 0 if start is None else max(0, np.searchsorted(self._first, start, "right") - 1)
+        hi = len(self._first) if end is None else np.searchsorted(self._first, end, "left")
+        for i in range(lo, hi):
+            if self._intact(i):
+                seg = self._segments[self._seg[i]]
+                yield seg.records[self._block[i], :self._count[i]]
+
+    def records(self, start=None, end=None):
+        """Records with ``start <= t < end``: a view over the file when they
+        sit in one block, one concatenated copy otherwise."""
+        parts = list(self.blocks(start, end))
+        if not parts:
+            return np.empty(0, self._segments[0].records.dtype)
+        # time only rises within a recording: trim the end blocks by slicing
+        if start is not None:
+            parts[0] = parts[0][np.searchsorted(parts[0]["t"], start, "left"):]
+        if end is not None:
+            parts[-1] = parts[-1][:np.searchsorted(parts[-1]["t"], end, "left")]
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def columns(self, names, start=None, end=None):
+        """``{name: (t, values)}`` float arrays for each field in ``names``.
+
+        A delta field is gathered out of the record view once (one copy per
+        field); the range itself is only copied when it spans blocks."""
+        recs = self.records(start, end)
+        if self.kind == "deltas":
+            slot = {name: i for i, name in enumerate(self.names)}
+            out = {}
+            for name in names:
+                if name not in slot:
+                    raise KeyError(f"field {name!r} not in this log")
+                m = recs["slot"] == slot[name]
+                out[name] = (recs["t"][m], recs["value"][m])
+            return out
+        return self._decode_frames(recs, names)
+
+    def _decode_frames(self, recs, names):
+        """Decode raw frames through can_helper's tables into per-field columns."""
+        wanted = set(names)
+        simple = self._simple
+        table = _build_dispatch(skip=frozenset(simple)) if simple else None
+        layouts = _build_simple(simple) if simple else {}
+        seg = Reassembler()
+        cols = {name: ([], []) for name in names}
+        ids, dlcs, data, times = recs["id"], recs["dlc"], recs["data"], recs["t"]
+        for i in range(len(recs)):
+            cid = int(ids[i])
+            if not cid & EXTENDED_FLAG:
+                continue
+            cid &= 0x1FFFFFFF
+            payload = data[i, :dlcs[i]].tobytes()
+            out = {}
+            if cid == EGT4_ID:
+                _decode_egt4(payload, out)
+            elif cid in layouts:
+                _decode_simple(layouts[cid], payload, out)
+            elif cid & SIMPLE_MASK == SIMPLE_BASE:
+                continue                     # a simplified packet not taken
+            elif table is not None:
+                _decode_into(cid, payload, seg, out, table)
+            else:
+                _decode_into(cid, payload, seg, out)
+            if "lambda" in out:
+                out["lambda_afr"] = out.pop("lambda")
+            for name, value in out.items():
+                if name in wanted:
+                    t, v = cols[name]
+                    t.append(times[i])
+                    v.append(float(value))
+        return {name: (np.array(t), np.array(v)) for name, (t, v) in cols.items()}
+
+
+def _write_csv(out, cols, t0):
+    """Wide CSV: one row per sample time, each column holding its latest value."""
+    names = list(cols)
+    times = np.unique(np.concatenate([cols[n][0] for n in names])) if names else np.empty(0)
+    filled = []
+    for name in names:
+        t, v = cols[name]
+        idx = np.searchsorted(t, times, "right") - 1
+        filled.append((idx, v))
+    out.write(",".join(["time"] + names) + "\n")
+    for row, when in enumerate(times):
+        cells = [f"{when - t0:.6f}"]
+        for idx, v in filled:
+            k = idx[row]
+            cells.append(f"{v[k]:.6g}" if k >= 0 else "")
+        out.write(",".join(cells) + "\n")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Export recorded channels to CSV.")
+    ap.add_argument("paths", nargs="+", help="segment files of one recording")
+    ap.add_argument("--fields", required=True, help="comma-separated SensorState fields")
+    ap.add_argument("--from", dest="start", type=float, help="seconds from the log start")
+    ap.add_argument("--to", dest="end", type=float, help="seconds from the log start")
+    ap.add_argument("--simple", action="store_true",
+                    help="frames log recorded with CAN_SIMPLE (decode the same way)")
+    ap.add_argument("-o", "--output", help="CSV file (default: stdout)")
+    args = ap.parse_args(argv)
+
+    log = LogReader(args.paths, simple=args.simple)
+    start = None if args.start is None else log.t0 + args.start
+    end = None if args.end is None else log.t0 + args.end
+    cols = log.columns(args.fields.split(","), start, end)
+    if args.output:
+        with open(args.output, "w") as f:
+            _write_csv(f, cols, log.t0)
+    else:
+        _write_csv(sys.stdout, cols, log.t0)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,39 @@ The CAN and GPIO reader threads write into a single ``SensorState`` instance;
 the Kivy dashboard reads from it ~30x/s. Centralising the schema here (instead
 of a bare dict of magic string keys) makes the producer/consumer contract
 explicit and turns key typos into attribute errors instead of silent misses.
+
+Values live in one flat list indexed by a fixed slot per field (see
+``SENSOR_FIELDS``). Writers serialise on a lock and bracket every merge with a
+sequence counter (a seqlock): odd while a write is in flight, even when the
+state is whole. Readers never take the lock — ``snapshot()`` copies the list and
+retries if the counter moved, so the renderer gets one consistent, immutable
+frame without ever blocking the CAN thread.
+
+Each slot also remembers the sequence number of the write that last *changed*
+it. A reader that passes the ``version`` of its previous snapshot gets a
+``dirty`` bitmask of the fields that moved since, so the dashboard only pushes
+(and re-rasterises) what actually changed.
+
+A parallel ``array('d')`` holds the monotonic time each slot was last written
+(changed or not), stamped in the same pass as the value. That gives every
+signal its own age, so a wideband or EGT-4 module dropping off the bus reads
+as stale even while the ECU keeps the global CAN clock fresh.
+
+Consumers that need every sample rather than the latest value (history rings,
+peak trackers, recorders) register with ``add_listener``; they are called on the
+writer's thread with the slots written by each commit. A CAN burst commits the
+latest value per field, and hands listeners every decoded value as ``samples``.
+
+Derived channels (EGT average, AFR, calculated gear, … — see derived.py) are
+ordinary slots too. A deriver attached with ``set_deriver`` runs inside the same
+write, only when one of its inputs actually changed, so a snapshot never pairs
+fresh inputs with a stale derived value.
 """
 
 import time
-from dataclasses import dataclass, field, fields
+from array import array
+from collections import namedtuple
+from dataclasses import dataclass, fields
 from threading import Lock
 
 
@@ -27,59 +56,266 @@ class IoState:
             if key in _IO_FIELDS:
                 setattr(self, key, value)
 
+    def snapshot(self):
+        """Immutable copy of the inputs (an ``IoSnapshot``)."""
+        return IoSnapshot(*(getattr(self, name) for name in _IO_NAMES))
 
-@dataclass
-class SensorState:
+
+# SensorState schema: (field, default) in slot order.
+SENSOR_FIELDS = (
     # engine
-    rpm: float = 0.0
-    map: float = 0.0              # manifold pressure / boost (bar)
-    tps: float = 0.0             # throttle position (%)
-    air_temp: float = 0.0        # intake air temperature (°C)
-    engine_temp: float = 0.0     # coolant temperature (°C)
-    oil_temp: float = 0.0        # oil temperature (°C)
-    oil_pressure_bar: float = 0.0
-    fuel_pressure_bar: float = 0.0
-    water_pressure_bar: float = 0.0
-    lambda_afr: float = 1.0      # exhaust O2 / lambda
-    gear: int = 0
-    gear_label: str = "N"
-    pit_limit: bool = False
-    two_step: bool = False       # launch control / 2-step active (FTCAN launch mode)
-    radiator_fan: bool = False   # cooling fan output on
-    night: bool = False          # ECU day/night mode (night = dim the display)
-    battery: float = 0.0         # battery voltage (V)
-    fuel_level: float = 0.0      # %
+    ("rpm", 0.0),
+    ("map", 0.0),                 # manifold pressure / boost (bar)
+    ("tps", 0.0),                 # throttle position (%)
+    ("air_temp", 0.0),            # intake air temperature (°C)
+    ("engine_temp", 0.0),         # coolant temperature (°C)
+    ("oil_temp", 0.0),            # oil temperature (°C)
+    ("oil_pressure_bar", 0.0),
+    ("fuel_pressure_bar", 0.0),
+    ("water_pressure_bar", 0.0),
+    ("lambda_afr", 1.0),          # exhaust O2 / lambda
+    ("gear", 0),
+    ("gear_label", "N"),
+    ("pit_limit", False),
+    ("two_step", False),          # launch control / 2-step active (FTCAN launch mode)
+    ("radiator_fan", False),      # cooling fan output on
+    ("night", False),             # ECU day/night mode (night = dim the display)
+    ("battery", 0.0),             # battery voltage (V)
+    ("fuel_level", 0.0),          # %
     # exhaust gas temperature, per cylinder (°C) — fed by the EGT-4 CAN module
-    egt1: float = 0.0
-    egt2: float = 0.0
-    egt3: float = 0.0
-    egt4: float = 0.0
+    ("egt1", 0.0),
+    ("egt2", 0.0),
+    ("egt3", 0.0),
+    ("egt4", 0.0),
     # wheel speeds (km/h)
-    wheel_speed_fr_kmh: float = 0.0
-    wheel_speed_fl_kmh: float = 0.0
-    wheel_speed_rr_kmh: float = 0.0
-    wheel_speed_rl_kmh: float = 0.0
-    # digital io
-    io: IoState = field(default_factory=IoState)
+    ("wheel_speed_fr_kmh", 0.0),
+    ("wheel_speed_fl_kmh", 0.0),
+    ("wheel_speed_rr_kmh", 0.0),
+    ("wheel_speed_rl_kmh", 0.0),
+    # derived channels, computed from the fields above (see derived.py)
+    ("egt_avg", 0.0),             # mean of egt1..4 (°C)
+    ("egt_median", 0.0),          # median of egt1..4 (°C), the balance reference
+    ("egt_spread", 0.0),          # hottest minus coolest cylinder (°C)
+    ("afr", 14.7),                # air/fuel ratio from lambda
+    ("calc_gear", 0),             # gear from rpm / driven wheel speed (0 = unknown)
+    ("wheel_slip", 0.0),          # driven vs undriven wheel speed (%)
+)
 
-    def __post_init__(self):
-        self._lock = Lock()
-        self._last_can = 0.0  # monotonic time of the last CAN frame (0 = never)
+FIELD_NAMES = tuple(name for name, _ in SENSOR_FIELDS)
+_DEFAULTS = tuple(default for _, default in SENSOR_FIELDS)
 
-    def update(self, values):
-        """Merge a partial mapping (e.g. a decoded CAN frame) into the state.
+# Seconds without a fresh write before a field reads as stale (greyed out on the
+# dash). FuelTech nodes re-broadcast every measure continuously, so silence
+# means the sender is gone. Fields that were never written are never stale.
+STALE_AFTER = 1.5
+STALE_AFTER_FIELD = {
+    "lambda_afr": 1.0,            # wideband: its own node on the bus
+    "egt1": 1.0, "egt2": 1.0, "egt3": 1.0, "egt4": 1.0,   # EGT-4 module
+    # derived channels are only rewritten when an input changes, so their own
+    # stamp says nothing about liveness — check the inputs' staleness instead
+    "egt_avg": float("inf"), "egt_median": float("inf"), "egt_spread": float("inf"),
+    "afr": float("inf"), "calc_gear": float("inf"), "wheel_slip": float("inf"),
+}
+_STALE_AFTER = tuple(STALE_AFTER_FIELD.get(name, STALE_AFTER) for name in FIELD_NAMES)
+
+_IO_NAMES = tuple(f.name for f in fields(IoState))
+_IO_FIELDS = set(_IO_NAMES)
+
+IoSnapshot = namedtuple("IoSnapshot", _IO_NAMES)
+
+
+class Snapshot(namedtuple("Snapshot", FIELD_NAMES + ("io", "version", "dirty", "stale",
+                                                    "stamps"))):
+    """One consistent, read-only view of ``SensorState`` for a rendered frame.
+
+    Same attribute names as ``SensorState`` (``snap.rpm``, ``snap.io.choke``),
+    so widgets can take either. ``version`` is the state's write sequence at the
+    time of the copy; ``dirty`` is a bitmask (bit = slot) of the fields changed
+    since the ``since`` version the snapshot was taken with, and ``stale`` the
+    fields whose last write is older than their ``STALE_AFTER`` limit.
+    ``stamps`` holds each slot's last-write time (see ``stamp``).
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def build(cls, values, io, version, versions, stamps, since=-1):
+        """Assemble a snapshot from copied slot lists, computing the ``dirty``
+        (changed after ``since``) and ``stale`` masks."""
+        now = time.monotonic()
+        dirty = stale = 0
+        for i, ver in enumerate(versions):
+            if ver > since:
+                dirty |= 1 << i
+            t = stamps[i]
+            if t and now - t > _STALE_AFTER[i]:
+                stale |= 1 << i
+        return cls._make(tuple(values) + (io, version, dirty, stale, tuple(stamps)))
+
+    def changed(self, *names):
+        """True if any of the named fields changed since the previous frame."""
+        dirty = self.dirty
+        for name in names:
+            if dirty & _BITS[name]:
+                return True
+        return False
+
+    def stamp(self, name):
+        """Monotonic time the named field was last written (0.0 = never), i.e.
+        when its current value was sampled off the bus."""
+        return self.stamps[_SLOTS[name]]
+
+    def is_stale(self, *names):
+        """True if any of the named fields has stopped arriving."""
+        stale = self.stale
+        for name in names:
+            if stale & _BITS[name]:
+                return True
+        return False
+
+
+class SensorState:
+    """Latest value of every sensor, plus the GPIO inputs (``io``)."""
+
+    __slots__ = ("io", "_values", "_versions", "_stamps", "_seq", "_lock", "_last_can",
+                 "_listeners", "_deriver")
+
+    def __init__(self, io=None, **values):
+        self.io = io if io is not None else IoState()
+        self._values = list(_DEFAULTS)
+        self._versions = [0] * len(_DEFAULTS)   # seq of the write that last changed each slot
+        self._stamps = array("d", bytes(8 * len(_DEFAULTS)))  # monotonic time of each slot's last write
+        self._seq = 0                 # seqlock counter: odd = write in progress
+        self._lock = Lock()           # serialises writers only
+        self._last_can = 0.0          # monotonic time of the last CAN frame (0 = never)
+        self._listeners = ()
+        self._deriver = None
+        for key, value in values.items():
+            if key not in _SLOTS:
+                raise TypeError(f"SensorState has no field {key!r}")
+            self._values[_SLOTS[key]] = value
+
+    def update(self, values, stamp=True, samples=None, now=None):
+        """Merge a partial mapping (e.g. a decoded CAN burst) into the state.
 
         Unknown keys are ignored. The CAN parser's ``lambda`` key is mapped to
         ``lambda_afr`` since ``lambda`` is a reserved word. The whole merge is
-        applied under a lock so the dashboard never reads a half-updated frame.
-        Also stamps the CAN-activity clock (see ``since_can``).
+        one seqlock write, so ``snapshot()`` never sees a half-updated burst.
+        Only slots whose value actually differs get their version bumped, but
+        every written slot gets its freshness stamp (see ``age``). Also stamps
+        the CAN-activity clock (see ``since_can``) unless ``stamp`` is false —
+        the no-CAN demo writes this way.
+
+        ``samples`` is every ``(key, value)`` that was merged into ``values``,
+        in order (``can_helper.Samples``). Listeners then see each of them,
+        not just the last value per field. ``now`` is the commit's timestamp
+        when the caller already read the clock (a drained burst's time).
         """
+        slot_of = _SLOTS.get
+        store = self._values
+        versions = self._versions
+        stamps = self._stamps
+        listeners = self._listeners
+        derive = self._deriver
+        if now is None:
+            now = time.monotonic()
+        if not listeners and derive is None:
+            # nobody to tell and nothing to derive: one pass, no bookkeeping
+            with self._lock:
+                ver = self._seq + 2
+                self._seq = ver - 1
+                for key, value in values.items():
+                    i = slot_of(key)
+                    if i is not None:
+                        stamps[i] = now
+                        if store[i] != value:
+                            store[i] = value
+                            versions[i] = ver
+                self._seq = ver
+            if stamp:
+                self._last_can = now
+            return
+        written = [] if listeners else None
+        record = written
+        if written is not None and samples is not None:
+            written.extend((slot_of(key), value) for key, value in samples if key in _SLOTS)
+            record = None                       # the first pass is already in `written`
+        changed = 0
         with self._lock:
-            for key, value in values.items():
-                attr = _KEY_ALIASES.get(key, key)
-                if attr in _SCALAR_FIELDS:
-                    setattr(self, attr, value)
-        self._last_can = time.monotonic()
+            self._seq += 1
+            ver = self._seq + 1
+            pending = values.items()
+            while pending:
+                for key, value in pending:
+                    i = slot_of(key)
+                    if i is None:
+                        continue
+                    stamps[i] = now
+                    if record is not None:
+                        record.append((i, value))
+                    if store[i] != value:
+                        store[i] = value
+                        versions[i] = ver
+                        changed |= 1 << i
+                # second pass: derived channels whose inputs just changed
+                pending = derive(store, changed) if derive and changed else None
+                derive = None
+                record = written
+            self._seq = ver
+            for listener in listeners:
+                listener(now, written)
+        if stamp:
+            self._last_can = now
+
+    def snapshot(self, since=-1):
+        """Return a consistent ``Snapshot`` of every field without locking.
+
+        Copies the value list and retries if a write started or finished in the
+        meantime (a seqlock read). A reader that lands mid-write yields the GIL
+        so the writer can finish instead of spinning against it.
+
+        ``since`` is the ``version`` of the caller's previous snapshot; fields
+        changed after it are flagged in ``dirty``. The default (-1) marks every
+        field dirty, for a consumer's first frame. Fields past their
+        ``STALE_AFTER`` limit are flagged in ``stale``.
+        """
+        while True:
+            seq = self._seq
+            if not seq & 1:
+                values = tuple(self._values)
+                versions = tuple(self._versions)
+                stamps = self._stamps.tolist()
+                if self._seq == seq:
+                    break
+            time.sleep(0)
+        return Snapshot.build(values, self.io.snapshot(), seq, versions, stamps, since)
+
+    def add_listener(self, listener):
+        """Call ``listener(now, written)`` after every commit.
+
+        ``written`` is a list of ``(slot, value)`` for every field the commit
+        wrote (changed or not) and ``now`` its monotonic timestamp. Listeners
+        run on the writer's thread under the write lock, so they see commits in
+        order and never concurrently — keep them short and allocation-free.
+        """
+        self._listeners = self._listeners + (listener,)
+
+    def set_deriver(self, deriver):
+        """Install ``deriver(values, changed)``, run inside every write.
+
+        ``values`` is the slot-ordered value list and ``changed`` a bitmask of
+        the slots the write changed; it returns ``(field, value)`` pairs for
+        the derived channels to store (or None), which are committed in the
+        same write as their inputs.
+        """
+        self._deriver = deriver
+
+    def age(self, name):
+        """Seconds since ``name`` was last written (``inf`` if never)."""
+        t = self._stamps[_SLOTS[name]]
+        if not t:
+            return float("inf")
+        return time.monotonic() - t
 
     def since_can(self):
         """Seconds since the last CAN frame (``inf`` if none received yet)."""
@@ -87,7 +323,25 @@ class SensorState:
             return float("inf")
         return time.monotonic() - self._last_can
 
+    def __repr__(self):
+        body = ", ".join(f"{n}={v!r}" for n, v in zip(FIELD_NAMES, self._values))
+        return f"SensorState({body}, io={self.io!r})"
+
+
+def _field_property(name, i):
+    def get(self):
+        return self._values[i]
+
+    def set(self, value):
+        self.update({name: value}, stamp=False)
+
+    return property(get, set, doc=f"``{name}`` (slot {i}).")
+
+
+for _i, _name in enumerate(FIELD_NAMES):
+    setattr(SensorState, _name, _field_property(_name, _i))
+del _i, _name
 
-_KEY_ALIASES = {"lambda": "lambda_afr"}
-_IO_FIELDS = {f.name for f in fields(IoState)}
-_SCALAR_FIELDS = {f.name for f in fields(SensorState)} - {"io"}
+_SLOTS = {name: i for i, name in enumerate(FIELD_NAMES)}
+_BITS = {name: 1 << i for i, name in enumerate(FIELD_NAMES)}
+_SLOTS["lambda"] = _SLOTS["lambda_afr"]   # the CAN parser's key; ``lambda`` is reserved
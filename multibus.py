@@ -0,0 +1,141 @@
+"""Several CAN buses read in one asyncio loop.
+
+The car has a second CAN network (EGT-4, PDM) next to the ECU's. Rather than a
+blocking ``read_can`` thread per interface, ``MultiBusIngest`` multiplexes any
+number of python-can buses in one event loop. Each bus is a ``CanFanout``
+port, so it has its own filters, simplified-packet mode, reassembler and
+counters. Subscribers are shared: every port offers its bursts to the same
+state writer / logger, tagged with ``Burst.channel``.
+
+Buses with a file descriptor (socketcan) are watched with ``loop.add_reader``,
+and a readable socket is drained as one burst by ``CanFanout.pump``. Buses
+without one (``virtual``, some USB adapters) are polled every
+``POLL_INTERVAL``. So two ``virtual`` buses in a test exercise the same code
+as ``can0`` + ``can1`` in the car.
+(``can.Notifier`` would hand frames over one by one, from a thread per bus
+in the polled case, which defeats the burst drain.)
+
+    ingest = MultiBusIngest([BusConfig("can0", simple=True), BusConfig("can1")])
+    ingest.subscribe(write_state, maxsize=0, raw=False)
+    ingest.run()
+"""
+
+import asyncio
+from collections import namedtuple
+
+import can
+
+from can_helper import (CAN_FILTERS, DROP_OLDEST, SUBSCRIBER_QUEUE, CanFanout,
+                        RealtimeLog, Subscriber, _state_writer, read_can)
+
+POLL_INTERVAL = 0.002   # seconds between polls of a bus with no file descriptor
+
+BusConfig = namedtuple("BusConfig", "channel interface filters simple",
+                       defaults=("socketcan", CAN_FILTERS, ()))
+BusConfig.__doc__ = """One bus: python-can ``channel`` / ``interface``, its
+    acceptance ``filters`` and ``simple`` (see ``CanFanout``)."""
+
+
+class MultiBusIngest:
+    """One event loop reading every configured bus; a ``CanFanout`` per bus."""
+
+    def __init__(self, buses):
+        self.ports = tuple(CanFanout(b.interface, b.channel, b.filters, b.simple)
+                           for b in buses)
+        self._loop = None
+        self._stop = None
+
+    def subscribe(self, fn, name=None, maxsize=SUBSCRIBER_QUEUE, policy=DROP_OLDEST, raw=True,
+                  frames=False, samples=False):
+        """Register ``fn(burst)`` on every bus; returns its ``Subscriber``."""
+        sub = Subscriber(fn, name or getattr(fn, "__name__", "sub"), maxsize, policy, raw, frames,
+                         samples)
+        for port in self.ports:
+            port.subscribers = port.subscribers + (sub,)
+        return sub
+
+    def stats(self):
+        """Per-channel counters: frames, bursts, read errors and reassembly."""
+        return {
+            port.channel: {
+                "frames": port.frames,
+                "bursts": port.bursts,
+                "errors": port.errors,
+                "packets": port.reassembler.packets,
+                "gaps": port.reassembler.gaps,
+                "orphans": port.reassembler.orphans,
+            }
+            for port in self.ports
+        }
+
+    async def serve(self):
+        """Open every bus and read them until ``stop()``."""
+        loop = self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        opened, fds, polls = [], [], []
+        try:
+            for port in self.ports:
+                bus = port.open()
+                opened.append(bus)
+                try:
+                    fd = bus.fileno()
+                except NotImplementedError:
+                    fd = -1
+                if fd >= 0:
+                    loop.add_reader(fd, self._read, port, bus)
+                    fds.append(fd)
+                else:
+                    polls.append(loop.create_task(self._poll(port, bus)))
+            await self._stop.wait()
+        finally:
+            for fd in fds:
+                loop.remove_reader(fd)
+            for task in polls:
+                task.cancel()
+            for bus in opened:
+                bus.shutdown()
+
+    def _read(self, port, bus):
+        """Pump whatever burst is waiting on ``bus`` (never blocks)."""
+        try:
+            msg = bus.recv(timeout=0)
+        except (can.CanError, OSError) as e:
+            port.errors += 1
+            print(f"[can] {port.channel} read error:", e, flush=True)
+            return
+        if msg is not None:
+            port.pump(bus, msg)
+
+    async def _poll(self, port, bus):
+        while True:
+            self._read(port, bus)
+            await asyncio.sleep(POLL_INTERVAL)
+
+    def stop(self):
+        """Stop ``serve()`` (from any thread)."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+
+    def run(self):
+        """Blocking: ``serve()`` in a fresh event loop."""
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            print("\nStopped.")
+
+
+def read_buses(channels, state, log=False, simple=False, subscribers=()):
+    """``read_can`` across ``channels``. The first one is the ECU's bus, and
+    ``simple`` applies to it alone. A single channel runs plain ``read_can``."""
+    if len(channels) == 1:
+        return read_can(channel=channels[0], state=state, log=log, simple=simple,
+                        subscribers=subscribers)
+    print("Starting FTCAN 2.0 listener on", ", ".join(channels), flush=True)
+    ingest = MultiBusIngest([BusConfig(ch, simple=simple if i == 0 else ())
+                             for i, ch in enumerate(channels)])
+    ingest.subscribe(_state_writer(state), "state", maxsize=0, raw=False, samples=True)
+    if log:
+        ingest.subscribe(RealtimeLog(), "canrt")
+    for sub in subscribers:
+        ingest.subscribe(**sub)
+    ingest.run()
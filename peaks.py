@@ -0,0 +1,100 @@
+"""Full-rate min / max hold for the channels where a short spike matters.
+
+The dashboard samples ``SensorState`` at 30 Hz, so a boost spike or a lean
+blip shorter than a frame never reaches the screen. A ``PeakTracker`` listens
+on the state's write path instead (``SensorState.add_listener``), running on
+the CAN thread at every drained burst. It folds every decoded value into
+min/max accumulators, including a sample that a later frame of the same burst
+overwrote (``can_helper.Samples``), for a few resettable windows:
+
+  * ``session`` — since start-up (or the last ``reset("session")``).
+  * ``pull``    — the last wide-open pull: re-armed each time boost rises past
+    ``PULL_START_BAR`` and held once it drops back under ``PULL_END_BAR``, so
+    the numbers stay readable after you lift.
+
+Reads are O(1) list lookups (``tracker.max("map", "pull")``) and safe from the
+UI thread. Under ``SHM=true`` the tracker runs in the ingest process and the UI
+reads the same interface off the shared block (``shm_state``).
+"""
+
+from model import FIELD_NAMES
+
+PEAK_FIELDS = ("map", "lambda_afr", "rpm", "egt1", "egt2", "egt3", "egt4",
+               "oil_pressure_bar")
+WINDOWS = ("session", "pull")
+
+PULL_START_BAR = 0.3   # boost (bar) that opens a new pull window
+PULL_END_BAR = 0.0     # back under this = pull over (window holds its peaks)
+
+_INF = float("inf")
+
+
+class PeakTracker:
+    """Min/max per (field, window), fed from ``SensorState`` commits."""
+
+    def __init__(self, fields=PEAK_FIELDS):
+        self.fields = tuple(fields)
+        n = len(self.fields)
+        self._index = {name: row for row, name in enumerate(self.fields)}
+        self._row = [self._index.get(name, -1) for name in FIELD_NAMES]
+        self._map_slot = FIELD_NAMES.index("map")
+        # window -> [lows, highs], one entry per tracked field
+        self._acc = {w: [[_INF] * n, [-_INF] * n] for w in WINDOWS}
+        self._session = self._acc["session"]
+        self._pull = self._acc["pull"]
+        self.in_pull = False
+        self.pull_started = None   # monotonic time the current/last pull opened
+
+    def record(self, now, written):
+        """``SensorState`` listener: fold each written (slot, value) in."""
+        rows, map_slot = self._row, self._map_slot
+        s_lo, s_hi = self._session
+        p_lo, p_hi = self._pull
+        for slot, value in written:
+            if slot == map_slot:
+                self._track_pull(now, value)
+            row = rows[slot]
+            if row < 0:
+                continue
+            if value < s_lo[row]:
+                s_lo[row] = value
+            if value > s_hi[row]:
+                s_hi[row] = value
+            if self.in_pull:
+                if value < p_lo[row]:
+                    p_lo[row] = value
+                if value > p_hi[row]:
+                    p_hi[row] = value
+
+    def _track_pull(self, now, boost):
+        if not self.in_pull and boost >= PULL_START_BAR:
+            self.reset("pull")
+            self.in_pull = True
+            self.pull_started = now
+        elif self.in_pull and boost < PULL_END_BAR:
+            self.in_pull = False
+
+    def max(self, name, window="session"):
+        """Highest ``name`` seen in ``window`` (None if nothing yet)."""
+        v = self._acc[window][1][self._index[name]]
+        return None if v == -_INF else v
+
+    def min(self, name, window="session"):
+        """Lowest ``name`` seen in ``window`` (None if nothing yet)."""
+        v = self._acc[window][0][self._index[name]]
+        return None if v == _INF else v
+
+    def flat(self):
+        """Every accumulator: lows then highs per window, in ``WINDOWS`` order."""
+        out = []
+        for window in WINDOWS:
+            lows, highs = self._acc[window]
+            out += lows
+            out += highs
+        return out
+
+    def reset(self, window="session"):
+        """Start ``window`` over (in place, so readers keep valid references)."""
+        lo, hi = self._acc[window]
+        lo[:] = [_INF] * len(lo)
+        hi[:] = [-_INF] * len(hi)
@@ -0,0 +1,294 @@
+"""Flight recorder: raw CAN frames or SensorState deltas in a fixed-record binary log.
+
+Until now the only capture has been a hand-made candump. A ``Recorder`` writes
+one of two record kinds, every record ``RECORD_SIZE`` bytes:
+
+  * ``FRAMES`` — each CAN frame as received: ``FRAME`` (timestamp, id, dlc,
+    flags, bus index, 8 data bytes). The id carries ``EXTENDED_FLAG`` for
+    29-bit frames. Fed by a ``CanFanout`` subscription (``subscription()``).
+  * ``DELTAS`` — each decoded field change: ``DELTA`` (monotonic time, slot,
+    value). Fed by ``SensorState.add_listener(recorder.record)``. Slots are
+    numbered by the field names saved in the file header.
+
+Segments are preallocated files (``posix_fallocate``) mapped with ``mmap``. A
+segment is a ``HEADER_SIZE`` file header followed by ``BLOCK_SIZE`` blocks.
+Each block starts with a ``BLOCK`` header (commit marker, block sequence,
+record count, CRC-32 of the records). The records are written first and the
+header last. A block is sealed when it fills, or, once records have sat unsealed
+for ``FLUSH_INTERVAL``, sealed as far as it goes and left open: later records
+land after the sealed ones and the header is rewritten with the larger count,
+so a slow trickle fills blocks instead of spending one per flush. An idle
+recorder seals nothing. Sealed blocks are ``msync``'d together, at most every
+``FLUSH_INTERVAL``, and the whole segment when it is closed. If the ignition
+cuts power, the loss is at most ``2 * FLUSH_INTERVAL`` of records. A torn block
+fails its marker or CRC check and the reader skips it.
+
+The CAN thread never touches the file. It appends to a ``deque``, an atomic
+append with no lock and no wakeup, and returns. The recorder's own thread packs
+records straight into the mapping with ``struct.pack_into``. If the writer
+falls ``QUEUE_MAX`` bursts behind, new data is dropped and counted in
+``dropped`` rather than stalling ingest.
+"""
+
+import mmap
+import os
+import struct
+import time
+import zlib
+from collections import deque
+from threading import Thread
+
+from model import FIELD_NAMES, SENSOR_FIELDS
+
+FRAMES = "frames"
+DELTAS = "deltas"
+KINDS = (FRAMES, DELTAS)
+
+MAGIC = b"FTREC\x00\x00\x01"
+FILE_HEADER = struct.Struct("<8sHIIdd")   # magic, kind, block size, record size, wall, monotonic
+HEADER_SIZE = 4096                        # file header + NUL-separated names (fields / channels)
+BLOCK_SIZE = 4096
+BLOCK = struct.Struct("<IIHHI")           # commit marker, sequence, count, reserved, crc32
+COMMIT = 0x4B4C4246                       # "FBLK"
+FRAME = struct.Struct("<dIBBBx8s")        # time, can id, dlc, flags, bus index, data
+DELTA = struct.Struct("<dH6xd")           # monotonic time, slot, value
+RECORD_SIZE = 24
+RECORDS_PER_BLOCK = (BLOCK_SIZE - BLOCK.size) // RECORD_SIZE
+EXTENDED_FLAG = 0x80000000
+FLAG_ERROR, FLAG_REMOTE = 0x01, 0x02
+KIND_CODE = {FRAMES: 1, DELTAS: 2}
+
+SEGMENT_BYTES = 64 * 1024 * 1024   # ~2.8M records per file
+FLUSH_INTERVAL = 0.5               # seconds a partly filled block may stay open
+QUEUE_MAX = 4096                   # bursts / commits buffered ahead of the writer
+IDLE_SLEEP = 0.01                  # writer poll period when the queue is empty
+
+assert FRAME.size == DELTA.size == RECORD_SIZE
+
+# Numeric fields only (the gear label is text, re-derived from ``gear``).
+_NUMERIC = tuple(not isinstance(default, str) for _, default in SENSOR_FIELDS)
+
+
+class _Segment:
+    """One preallocated, memory-mapped segment file."""
+
+    def __init__(self, path, kind, size, names):
+        self.path = path
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o644)
+        try:
+            os.posix_fallocate(fd, 0, size)
+            self.map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        FILE_HEADER.pack_into(self.map, 0, MAGIC, KIND_CODE[kind], BLOCK_SIZE, RECORD_SIZE,
+                              time.time(), time.monotonic())
+        table = "\0".join(names).encode()
+        if FILE_HEADER.size + len(table) > HEADER_SIZE:
+            raise ValueError("name table does not fit the segment header")
+        self.map[FILE_HEADER.size:FILE_HEADER.size + len(table)] = table
+        self.map.flush(0, HEADER_SIZE)
+        self.blocks = (size - HEADER_SIZE) // BLOCK_SIZE
+
+    def close(self):
+        self.map.flush()
+        self.map.close()
+
+
+class Recorder:
+    """Background writer of ``FRAMES`` or ``DELTAS`` into rolling segments."""
+
+    def __init__(self, directory, kind=FRAMES, channels=("can0",),
+                 segment_bytes=SEGMENT_BYTES, sync=True, trim=False):
+        if kind not in KINDS:
+            raise ValueError(f"unknown record kind {kind!r}")
+        self.directory = directory
+        self.kind = kind
+        self.channels = tuple(channels)
+        self.segment_bytes = segment_bytes
+        self.sync = sync               # msync sealed blocks (off on a RAM disk)
+        self.trim = trim               # cut the last segment to its used blocks on close
+        self.records = 0
+        self.blocks = 0
+        self.segments = 0
+        self.dropped = 0
+        self._queue = deque()
+        self._session = time.strftime("%Y%m%d-%H%M%S")
+        self._bus_index = {name: i for i, name in enumerate(self.channels)}
+        self._mirror = [None] * len(FIELD_NAMES)
+        self._segment = None
+        self._block = 0                # index of the open block in the segment
+        self._count = 0                # records in the open block
+        self._sealed = 0               # of those, already sealed
+        self._opened = 0.0             # monotonic time of the first unsealed record
+        self._dirty = None             # (start, end) of sealed blocks not yet msync'd
+        self._synced = 0.0             # monotonic time of the last msync
+        self._running = False
+        self._thread = None
+
+    # ---- producer side (CAN thread) ----
+
+    def on_burst(self, burst):
+        """``CanFanout`` subscriber: queue the burst's frames."""
+        if len(self._queue) >= QUEUE_MAX:
+            self.dropped += len(burst.frames)
+            return
+        self._queue.append((burst.channel, burst.frames))
+
+    def record(self, now, written):
+        """``SensorState`` listener: queue the commit's written slots."""
+        if len(self._queue) >= QUEUE_MAX:
+            self.dropped += len(written)
+            return
+        self._queue.append((now, written))
+
+    def subscription(self):
+        """``CanFanout.subscribe`` keywords for a ``FRAMES`` recorder."""
+        return {"fn": self.on_burst, "name": "recorder", "maxsize": 0, "raw": False,
+                "frames": True}
+
+    # ---- writer thread ----
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._running = True
+        self._thread = Thread(target=self._run, name=f"recorder-{self.kind}", daemon=True)
+        self._thread.start()
+        return self
+
+    def write(self, channel, frames):
+        """Pack ``frames`` in the calling thread (offline conversion; no ``start()``)."""
+        self._pack_frames(channel, frames)
+
+    def close(self):
+        """Write out everything queued, commit the open block, close the segment."""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+        else:
+            self._finish()
+
+    def _run(self):
+        queue = self._queue
+        pack = self._pack_frames if self.kind == FRAMES else self._pack_deltas
+        try:
+            while self._running or queue:
+                if not queue:
+                    now = time.monotonic()
+                    if self._count > self._sealed and now - self._opened > FLUSH_INTERVAL:
+                        self._commit()
+                    if self._dirty is not None and now - self._synced > FLUSH_INTERVAL:
+                        self._msync()
+                    time.sleep(IDLE_SLEEP)
+                    continue
+                pack(*queue.popleft())
+        finally:
+            self._finish()
+
+    def _finish(self):
+        if self._segment is None:
+            return
+        if self._count > self._sealed:
+            self._commit()
+        used = self._block + (1 if self._count else 0)
+        segment, self._segment, self._dirty = self._segment, None, None
+        segment.close()
+        if self.trim:
+            os.truncate(segment.path, HEADER_SIZE + used * BLOCK_SIZE)
+
+    def _pack_frames(self, channel, frames):
+        bus = self._bus_index.get(channel, 255)
+        for msg in frames:
+            cid = msg.arbitration_id | EXTENDED_FLAG if msg.is_extended_id else msg.arbitration_id
+            flags = (FLAG_ERROR if msg.is_error_frame else 0) | \
+                    (FLAG_REMOTE if msg.is_remote_frame else 0)
+            off = self._next()
+            FRAME.pack_into(self._segment.map, off,
+                            msg.timestamp, cid, msg.dlc, flags, bus, bytes(msg.data))
+            self._written()
+
+    def _pack_deltas(self, now, written):
+        mirror = self._mirror
+        for slot, value in written:
+            if not _NUMERIC[slot]:
+                continue
+            value = float(value)
+            if mirror[slot] == value:
+                continue
+            mirror[slot] = value
+            off = self._next()
+            DELTA.pack_into(self._segment.map, off, now, slot, value)
+            self._written()
+
+    def _next(self):
+        """Offset of the next free record, rolling to a new segment when full."""
+        if self._segment is None or self._block >= self._segment.blocks:
+            self._roll()
+        if self._count == self._sealed:
+            self._opened = time.monotonic()
+        return HEADER_SIZE + self._block * BLOCK_SIZE + BLOCK.size + self._count * RECORD_SIZE
+
+    def _written(self):
+        """Count the record just packed; seal the block once it is full."""
+        self._count += 1
+        self.records += 1
+        if self._count == RECORDS_PER_BLOCK:
+            self._commit()
+
+    def _roll(self):
+        if self._segment is not None:
+            self._segment.close()          # msyncs the whole segment
+            self._dirty = None
+        self.segments += 1
+        path = os.path.join(self.directory,
+                            f"{self.kind}-{self._session}-{self.segments:03d}.ftr")
+        names = self.channels if self.kind == FRAMES else FIELD_NAMES
+        self._segment = _Segment(path, self.kind, self.segment_bytes, names)
+        self._block = 0
+        self._count = self._sealed = 0
+        self._mirror = [None] * len(FIELD_NAMES)   # each segment stands alone
+        print("[rec] writing", path, flush=True)
+
+    def _commit(self):
+        """Seal the open block's records so far (header after the records);
+        move on to the next block once it is full."""
+        buf = self._segment.map
+        base = HEADER_SIZE + self._block * BLOCK_SIZE
+        start = base + BLOCK.size
+        crc = zlib.crc32(buf[start:start + self._count * RECORD_SIZE])
+        # one write: a block sealed earlier keeps its marker while it grows
+        BLOCK.pack_into(buf, base, COMMIT, self._block, self._count, 0, crc)
+        if not self._sealed:
+            self.blocks += 1
+        if self.sync:
+            first = base if self._dirty is None else self._dirty[0]
+            self._dirty = (first, base + BLOCK_SIZE)
+            if time.monotonic() - self._synced > FLUSH_INTERVAL:
+                self._msync()
+        if self._count == RECORDS_PER_BLOCK:
+            self._block += 1
+            self._count = 0
+        self._sealed = self._count
+
+    def _msync(self):
+        """Flush every block sealed since the last msync in one call."""
+        start, end = self._dirty
+        page = start - start % mmap.PAGESIZE
+        self._segment.map.flush(page, end - page)
+        self._dirty = None
+        self._synced = time.monotonic()
+
+
+def attach(state, kinds, directory, channels=("can0",)):
+    """Start a recorder per kind in ``kinds``: ``DELTAS`` listens on ``state``.
+    Returns the ``CanFanout`` subscriptions to pass to ``read_can`` (``FRAMES``)
+    and the recorders, for the caller to ``close()`` on shutdown."""
+    subscriptions = []
+    recorders = []
+    for kind in kinds:
+        recorder = Recorder(directory, kind, channels).start()
+        recorders.append(recorder)
+        if kind == FRAMES:
+            subscriptions.append(recorder.subscription())
+        else:
+            state.add_listener(recorder.record)
+    return subscriptions, recorders
@@ -0,0 +1,266 @@
+"""Replay recorded CAN traffic into the real ingest path, off the car.
+
+Captures come in three shapes: candump text (``dump.txt``; ``candump -t a`` and
+``candump -l`` lines too), any python-can log (.asc, .blf, .trc, .csv, …), or
+recorder.py ``FRAMES`` segments (.ftr). ``convert`` turns either text form into
+a frame file (the recorder's own format, so ``logreader.py`` reads it as well).
+
+``ReplayBus`` is a python-can bus whose ``recv`` hands back the recorded frames
+paced by their original timestamps: ``speed=1`` is real time, ``speed=10`` ten
+times faster, ``speed=None`` as fast as the decoder can take them. A burst
+stays a burst (``recv(timeout=0)`` returns the next frame only once it is due),
+so ``CanFanout`` drains and commits exactly as it does on ``can0``. Pass it as
+``read_can(bus=...)``, or set ``REPLAY`` for ``start_cluster.py``. ``play``
+instead sends the frames to a real or ``vcan`` interface for another process.
+
+    python replay.py convert dump.txt replays/        # -> replays/frames-….ftr
+    python replay.py play 'replays/*.ftr' --speed 1 --channel vcan0
+    python replay.py bench dump.txt --loops 200        # decoder throughput
+
+Text captures without timestamps (plain ``candump``) get ``FRAME_PERIOD``
+spacing.
+"""
+
+import argparse
+import glob
+import mmap
+import os
+import time
+import zlib
+from binascii import unhexlify
+
+import can
+
+from can_helper import CAN_FILTERS, CanFanout, _state_writer, simple_filters
+from model import SensorState
+from recorder import (BLOCK, BLOCK_SIZE, COMMIT, EXTENDED_FLAG, FILE_HEADER, FLAG_ERROR,
+                      FLAG_REMOTE, FRAME, FRAMES, HEADER_SIZE, KIND_CODE, MAGIC, RECORD_SIZE,
+                      Recorder)
+
+FRAME_PERIOD = 0.0005        # seconds between untimestamped candump lines
+CONVERT_BATCH = 1024         # frames handed to the recorder per write
+_TEXT_SUFFIXES = ("", ".txt", ".dump", ".candump")
+
+
+# ---- reading captures ----
+
+def read_candump(path, period=FRAME_PERIOD):
+    """``can.Message``s from candump text, in file order."""
+    with open(path, "rb") as f:
+        for n, line in enumerate(f):
+            tokens = line.split()
+            ts = n * period
+            if tokens and tokens[0][:1] == b"(":
+                ts = float(tokens[0].strip(b"()"))
+                tokens = tokens[1:]
+            if len(tokens) >= 2 and b"#" in tokens[1]:      # candump -l: can0 140812FF#0000...
+                cid, _, data = tokens[1].partition(b"#")
+                remote = data[:1] in (b"R", b"r")
+                data = b"" if remote else data
+            elif len(tokens) >= 3 and tokens[2][:1] == b"[":
+                cid, data, remote = tokens[1], b"".join(tokens[3:]), False
+            else:
+                continue
+            try:
+                payload = unhexlify(data)
+                yield can.Message(timestamp=ts, arbitration_id=int(cid, 16),
+                                  is_extended_id=len(cid) > 3, is_remote_frame=remote,
+                                  dlc=len(payload), data=payload, channel=tokens[0].decode())
+            except ValueError:
+                continue
+
+
+def read_frames(paths):
+    """``can.Message``s from recorder ``FRAMES`` segments (committed blocks only)."""
+    if isinstance(paths, str):
+        paths = sorted(glob.glob(paths)) or [paths]
+    for path in paths:
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, code, block_size, record_size, _, _ = FILE_HEADER.unpack_from(mm, 0)
+            if magic != MAGIC or code != KIND_CODE[FRAMES] or block_size != BLOCK_SIZE \
+                    or record_size != RECORD_SIZE:
+                raise ValueError(f"{path}: not a recorder frames segment")
+            names = bytes(mm[FILE_HEADER.size:HEADER_SIZE]).rstrip(b"\0").decode().split("\0")
+            for base in range(HEADER_SIZE, len(mm) - BLOCK_SIZE + 1, BLOCK_SIZE):
+                marker, _, count, _, crc = BLOCK.unpack_from(mm, base)
+                if marker != COMMIT:
+                    break
+                records = mm[base + BLOCK.size:base + BLOCK.size + count * RECORD_SIZE]
+                if zlib.crc32(records) != crc:
+                    continue
+                for ts, cid, dlc, flags, bus, data in FRAME.iter_unpack(records):
+                    yield can.Message(timestamp=ts, arbitration_id=cid & ~EXTENDED_FLAG,
+                                      is_extended_id=bool(cid & EXTENDED_FLAG),
+                                      is_error_frame=bool(flags & FLAG_ERROR),
+                                      is_remote_frame=bool(flags & FLAG_REMOTE),
+                                      dlc=dlc, data=data[:dlc],
+                                      channel=names[bus] if bus < len(names) else None)
+        finally:
+            mm.close()
+
+
+def load(path, period=FRAME_PERIOD):
+    """Frames of any supported capture: .ftr segments, candump text or a python-can log."""
+    suffix = os.path.splitext(path)[1].lower()
+    if suffix == ".ftr" or "*" in path:
+        return read_frames(path)
+    if suffix in _TEXT_SUFFIXES:
+        return read_candump(path, period)
+    return iter(can.LogReader(path))
+
+
+def convert(source, directory, period=FRAME_PERIOD, channels=("can0",)):
+    """Write ``source`` as a recorder frame file in ``directory``; returns the frame count."""
+    rec = Recorder(directory, FRAMES, channels, sync=False, trim=True)
+    os.makedirs(directory, exist_ok=True)
+    batch = []
+    channel = None
+    for msg in load(source, period):
+        if msg.channel != channel and batch:
+            rec.write(channel, batch)
+            batch = []
+        channel = msg.channel
+        batch.append(msg)
+        if len(batch) >= CONVERT_BATCH:
+            rec.write(channel, batch)
+            batch = []
+    if batch:
+        rec.write(channel, batch)
+    rec.close()
+    return rec.records
+
+
+# ---- replay ----
+
+class _Pace:
+    """Maps capture timestamps onto ``time.monotonic()`` at ``speed`` (None = no waiting)."""
+
+    def __init__(self, speed):
+        self.speed = speed or None
+        self._origin = None
+
+    def due(self, msg):
+        """Seconds until ``msg`` is due (<= 0: now)."""
+        if self.speed is None:
+            return 0.0
+        now = time.monotonic()
+        if self._origin is None:
+            self._origin = (msg.timestamp, now)
+        t0, start = self._origin
+        return start + (msg.timestamp - t0) / self.speed - now
+
+
+class ReplayBus(can.BusABC):
+    """A bus that receives recorded frames, paced by their original timestamps.
+
+    ``recv()`` returns each frame with its recorded timestamp once it is due.
+    When the capture runs out, a non-blocking ``recv`` returns None (closing the
+    last burst) and a blocking one raises ``can.CanOperationError``, which ends
+    ``CanFanout.run``.
+    """
+
+    def __init__(self, messages, speed=1.0, channel="replay", can_filters=None, **kwargs):
+        self._messages = iter(messages)
+        self._pace = _Pace(speed)
+        self._pending = next(self._messages, None)
+        self.channel_info = f"replay x{speed}" if speed else "replay max"
+        super().__init__(channel, can_filters=can_filters, **kwargs)
+
+    def _recv_internal(self, timeout):
+        msg = self._pending
+        if msg is None:
+            if timeout == 0:
+                return None, False
+            raise can.CanOperationError("replay finished")
+        wait = self._pace.due(msg)
+        if wait > 0:
+            if timeout is not None and timeout < wait:
+                time.sleep(timeout)
+                return None, False
+            time.sleep(wait)
+        self._pending = next(self._messages, None)
+        return msg, False
+
+    def send(self, msg, timeout=None):
+        raise can.CanOperationError("replay bus is receive-only")
+
+
+def replay_can(path, state=None, speed=1.0, log=False, simple=False, subscribers=()):
+    """``read_can`` fed from a capture instead of ``can0``; returns when it ends."""
+    from can_helper import read_can
+
+    filters = CAN_FILTERS + simple_filters() if simple else CAN_FILTERS
+    bus = ReplayBus(load(path), speed, can_filters=filters)
+    print(f"[replay] {path} at", f"x{speed}" if speed else "max speed", flush=True)
+    read_can("virtual", "replay", state, log, simple, subscribers, bus=bus)
+    print("[replay] finished", flush=True)
+
+
+def play(messages, bus, speed=1.0):
+    """Send ``messages`` on ``bus`` at their recorded pace; returns the count sent."""
+    pace = _Pace(speed)
+    n = 0
+    for msg in messages:
+        wait = pace.due(msg)
+        if wait > 0:
+            time.sleep(wait)
+        bus.send(msg)
+        n += 1
+    return n
+
+
+def bench(messages, loops=1, simple=False):
+    """Decode ``messages`` (``loops`` times over) through ``CanFanout`` at max speed.
+
+    Returns (frames, seconds, fanout, state)."""
+    frames = list(messages) * loops
+    state = SensorState()
+    fanout = CanFanout("virtual", "replay", simple=simple)
+    fanout.subscribe(_state_writer(state), "state", maxsize=0, raw=False, samples=True)
+    bus = ReplayBus(frames, None, can_filters=fanout.filters)
+    t = time.perf_counter()
+    fanout.run(bus)
+    return fanout.frames, time.perf_counter() - t, fanout, state
+
+
+def _speed(text):
+    return None if text == "max" else float(text)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Convert and replay CAN captures.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    c = sub.add_parser("convert", help="candump / python-can log -> recorder frame file")
+    c.add_argument("source")
+    c.add_argument("directory", help="output directory for the .ftr segment(s)")
+    c.add_argument("--period", type=float, default=FRAME_PERIOD,
+                   help="frame spacing for captures without timestamps")
+    p = sub.add_parser("play", help="send a capture on a CAN interface")
+    p.add_argument("source")
+    p.add_argument("--speed", type=_speed, default=1.0, help="1 = real time, N = N x, max")
+    p.add_argument("--interface", default="socketcan")
+    p.add_argument("--channel", default="vcan0")
+    b = sub.add_parser("bench", help="decoder throughput at max speed")
+    b.add_argument("source")
+    b.add_argument("--loops", type=int, default=100)
+    b.add_argument("--simple", action="store_true")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "convert":
+        n = convert(args.source, args.directory, args.period)
+        print(f"{n} frames written to {args.directory}")
+    elif args.cmd == "play":
+        with can.Bus(interface=args.interface, channel=args.channel) as bus:
+            n = play(load(args.source), bus, args.speed)
+        print(f"{n} frames sent on {args.channel}")
+    else:
+        frames, seconds, fanout, _ = bench(load(args.source), args.loops, args.simple)
+        r = fanout.reassembler
+        print(f"{frames} frames in {seconds:.3f} s: {frames / seconds:,.0f} frames/s, "
+              f"{fanout.bursts} bursts, {r.packets} packets, {r.gaps} gaps")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,446 @@
+"""SensorState published through shared memory, for a separate ingest process.
+
+By default the CAN / GPIO reader threads share the Kivy process and its GIL, so
+every drained burst competes with rendering. With ``SHM=true`` the readers run
+in their own process instead (``run_ingest``), around an ordinary
+``SensorState`` with the deriver and alarm rules attached. A ``ShmPublisher``
+listener mirrors every commit into a ``multiprocessing.shared_memory`` block,
+and the UI process maps that block read-only through ``SharedState``, which
+offers the reader half of the ``SensorState`` API (``snapshot``, ``since_can``,
+``age``) plus the ingest side's alarm mask and peak hold. The two processes use separate
+cores, and the ingest process can run as its own service
+(``python shm_state.py``) so a UI crash or restart keeps the bus socket open.
+
+Block layout (native byte order, every word 8 bytes):
+
+    header    magic | field count | layout, seq, last CAN time, GPIO bits,
+              alarm bits, writer pid, writer heartbeat, in-pull flag
+    values    float64 per slot (bools / ints stored as numbers)
+    versions  int64 per slot, the ``seq`` of the write that last changed it
+    stamps    float64 per slot, monotonic time of its last write
+    peaks     float64 lows then highs per ``PeakTracker`` window (``PEAK_FIELDS``)
+    text      ``TEXT_BYTES`` per string slot (the gear label)
+
+``seq`` is a seqlock exactly as in ``SensorState``: odd while a commit is being
+copied in, so the reader retries instead of seeing half a burst. Within one
+process the GIL orders those stores; across processes nothing does, and an
+ARM64 core may make them visible out of order. Both sides therefore put a
+``_fence`` between the ``seq`` words and the data. Each header word is written
+with one aligned 8-byte store, so it is never seen half-written. Timestamps are
+``time.monotonic()`` (CLOCK_MONOTONIC, system-wide), so ages and staleness
+compare across the two processes.
+
+The writer stamps its pid at creation and the time on every ``tick``. A
+block whose pid is gone or whose heartbeat stopped (SIGKILL, a crash) is dead.
+``reclaim`` unlinks it, so the next ingest starts clean instead of either
+process attaching to frozen values.
+"""
+
+import mmap
+import os
+import signal
+import sys
+import time
+from array import array
+from multiprocessing import shared_memory
+from threading import Lock
+
+from alarms import AlarmEngine
+from model import FIELD_NAMES, SENSOR_FIELDS, IoSnapshot, Snapshot
+from peaks import PEAK_FIELDS, WINDOWS
+
+SHM_NAME = "can_cluster_state"
+MAGIC = 0x46544353             # "FTCS"
+LAYOUT = 3                     # bumped whenever the block layout changes
+TEXT_BYTES = 8
+PUBLISH_INTERVAL = 1 / 30      # GPIO / CAN-clock publish period of the ingest loop
+NO_CAN_DEMO_DELAY = 3.0        # same as cluster.NO_CAN_DEMO_DELAY
+ATTACH_TIMEOUT = 10.0          # seconds the UI waits for the ingest process's block
+HEARTBEAT_TIMEOUT = 5.0        # a writer silent this long is dead (it beats every tick)
+
+# header words
+_H_ID, _H_SEQ, _H_LAST_CAN, _H_IO, _H_ALARMS, _H_PID, _H_BEAT, _H_PULL = range(8)
+_HEADER = 8 * 8
+
+_N = len(FIELD_NAMES)
+_ID = MAGIC | _N << 32 | LAYOUT << 48
+_TEXT_SLOTS = tuple(i for i, (_, d) in enumerate(SENSOR_FIELDS) if isinstance(d, str))
+_TEXT_OFFSET = {slot: k * TEXT_BYTES for k, slot in enumerate(_TEXT_SLOTS)}
+# non-float slots and the type to turn their stored number back into
+_CASTS = tuple((i, type(d)) for i, (_, d) in enumerate(SENSOR_FIELDS)
+               if isinstance(d, (bool, int)))
+_PEAKS = 2 * len(WINDOWS) * len(PEAK_FIELDS)
+_INF = float("inf")
+SIZE = _HEADER + 3 * 8 * _N + 8 * _PEAKS + TEXT_BYTES * len(_TEXT_SLOTS)
+
+
+_FENCE = Lock()
+
+
+def _fence():
+    """Full memory barrier: accesses before the call stay before accesses after it.
+
+    Python has no fence primitive, but a lock release followed by an acquire
+    acts as one. CPython's locks are atomic read-modify-writes with release /
+    acquire ordering (``sem_t``, or ``PyMutex`` from 3.13). ARMv8 never
+    reorders a store-release with a later load-acquire, so the pair orders
+    everything on either side of it. x86-64 keeps stores in order and loads in
+    order anyway. An uncontended pair costs about 100 ns.
+    """
+    with _FENCE:
+        pass
+    with _FENCE:
+        pass
+
+
+def _path(name):
+    return f"/dev/shm/{name}"
+
+
+def owner(name=SHM_NAME, grace=1.0):
+    """Pid of the live process publishing ``name``, or None if there is no
+    block or its writer is gone (killed, crashed, or its pid now belongs to
+    something else that doesn't beat). A block too new to have its header
+    written yet gets ``grace`` seconds to show one."""
+    deadline = time.monotonic() + grace
+    while True:
+        try:
+            fd = os.open(_path(name), os.O_RDONLY)
+        except FileNotFoundError:
+            return None
+        try:
+            head = os.pread(fd, _HEADER, 0)
+        finally:
+            os.close(fd)
+        if len(head) == _HEADER:
+            words = memoryview(head).cast("Q")
+            pid, beat = words[_H_PID], memoryview(head).cast("d")[_H_BEAT]
+            if pid:
+                try:
+                    os.kill(pid, 0)
+                except ProcessLookupError:
+                    return None
+                except PermissionError:
+                    pass                  # alive, another user's process
+                return pid if time.monotonic() - beat < HEARTBEAT_TIMEOUT else None
+        if time.monotonic() > deadline:
+            return None
+        time.sleep(0.05)
+
+
+def reclaim(name=SHM_NAME):
+    """Unlink ``name`` if its writer is dead. Returns the live owner's pid
+    (the block is left alone) or None (there is no block now)."""
+    pid = owner(name)
+    if pid is None:
+        try:
+            os.unlink(_path(name))
+        except FileNotFoundError:
+            pass
+    return pid
+
+
+def _views(buf):
+    """Typed views of one block: (header Q, header d, values, versions, stamps,
+    peaks, text)."""
+    mv = memoryview(buf)
+    header = mv[:_HEADER]
+    off = _HEADER
+    values = mv[off:off + 8 * _N].cast("d")
+    off += 8 * _N
+    versions = mv[off:off + 8 * _N].cast("q")
+    off += 8 * _N
+    stamps = mv[off:off + 8 * _N].cast("d")
+    off += 8 * _N
+    peaks = mv[off:off + 8 * _PEAKS].cast("d")
+    off += 8 * _PEAKS
+    text = mv[off:off + TEXT_BYTES * len(_TEXT_SLOTS)]
+    return header.cast("Q"), header.cast("d"), values, versions, stamps, peaks, text
+
+
+class ShmPublisher:
+    """Writer side: a ``SensorState`` listener copying each commit into the block.
+
+    Register it after any listener whose result it publishes (the alarm
+    engine, the peak tracker), so each commit goes out with the alarm mask and
+    peaks it produced. Refuses
+    to start while another live process publishes ``name``; a dead one's
+    block is reclaimed.
+    """
+
+    def __init__(self, state, alarms=None, peaks=None, name=SHM_NAME):
+        try:
+            self._shm = shared_memory.SharedMemory(name, create=True, size=SIZE)
+        except FileExistsError:
+            pid = reclaim(name)
+            if pid is not None:
+                raise RuntimeError(f"{name} is already published by pid {pid}") from None
+            self._shm = shared_memory.SharedMemory(name, create=True, size=SIZE)
+        self._hq, self._hd, self._values, self._versions, self._stamps, self._peaks, \
+            self._text = _views(self._shm.buf)
+        self._hq[_H_PID] = os.getpid()
+        self._hd[_H_BEAT] = time.monotonic()
+        self._state = state
+        self._alarms = alarms
+        self._tracker = peaks
+        self._mirror = [default for _, default in SENSOR_FIELDS]
+        self._lock = Lock()           # commits (CAN thread) vs ``tick`` (ingest loop)
+        for slot, (_, default) in enumerate(SENSOR_FIELDS):
+            self._store(slot, default)
+        self._hq[_H_ID] = _ID
+        state.add_listener(self.record)
+
+    def _store(self, slot, value):
+        off = _TEXT_OFFSET.get(slot)
+        if off is None:
+            self._values[slot] = value
+        else:
+            self._text[off:off + TEXT_BYTES] = str(value).encode()[:TEXT_BYTES].ljust(TEXT_BYTES)
+
+    def record(self, now, written):
+        """``SensorState`` listener: publish the written (slot, value) pairs."""
+        hq, mirror, versions, stamps = self._hq, self._mirror, self._versions, self._stamps
+        with self._lock:
+            seq = hq[_H_SEQ] + 1
+            hq[_H_SEQ] = seq          # odd: commit in progress
+            _fence()
+            for slot, value in written:
+                stamps[slot] = now
+                if mirror[slot] != value:
+                    mirror[slot] = value
+                    self._store(slot, value)
+                    versions[slot] = seq + 1
+            if self._alarms is not None:
+                hq[_H_ALARMS] = self._alarms.active
+            if self._tracker is not None:
+                self._publish_peaks()
+            _fence()
+            hq[_H_SEQ] = seq + 1
+
+    def _publish_peaks(self):
+        self._peaks[:] = array("d", self._tracker.flat())
+        self._hq[_H_PULL] = self._tracker.in_pull
+
+    def tick(self):
+        """Beat, and publish the GPIO inputs, the CAN-activity clock and the
+        alarm mask (they change outside the commit path: the alarms on stale
+        inputs; call every ``PUBLISH_INTERVAL``, after ``AlarmEngine.tick``)."""
+        io = 0
+        for bit, on in enumerate(self._state.io.snapshot()):
+            if on:
+                io |= 1 << bit
+        since = self._state.since_can()
+        last_can = time.monotonic() - since if since != float("inf") else 0.0
+        alarms = self._alarms.active if self._alarms is not None else 0
+        hq, hd = self._hq, self._hd
+        hd[_H_BEAT] = time.monotonic()
+        with self._lock:
+            if hq[_H_IO] == io and hd[_H_LAST_CAN] == last_can and hq[_H_ALARMS] == alarms:
+                return
+            seq = hq[_H_SEQ] + 1
+            hq[_H_SEQ] = seq
+            _fence()
+            hq[_H_IO] = io
+            hd[_H_LAST_CAN] = last_can
+            hq[_H_ALARMS] = alarms
+            _fence()
+            hq[_H_SEQ] = seq + 1
+
+    def close(self):
+        """Release and remove the block."""
+        views = (self._hq, self._hd, self._values, self._versions, self._stamps, self._peaks,
+                 self._text)
+        self._hq = self._hd = self._values = self._versions = self._stamps = self._peaks = \
+            self._text = None
+        for view in views:
+            view.release()
+        self._shm.close()
+        self._shm.unlink()
+
+
+class SharedState:
+    """Reader side: the block mapped read-only, with ``SensorState``'s read API.
+
+    Opened straight from ``/dev/shm`` with ``PROT_READ`` rather than through
+    ``SharedMemory``, so the UI physically can't write to it and its exit
+    doesn't unlink the block from under a still-running ingest process.
+    """
+
+    def __init__(self, name=SHM_NAME, timeout=ATTACH_TIMEOUT):
+        path = _path(name)
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fd = os.open(path, os.O_RDONLY)
+                break
+            except FileNotFoundError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.1)
+        try:
+            self._map = mmap.mmap(fd, SIZE, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+        self._hq, self._hd, self._values, self._versions, self._stamps, self._peaks, \
+            self._text = _views(self._map)
+        while not self._hq[_H_ID] and time.monotonic() < deadline:
+            time.sleep(0.01)          # block created, header not written yet
+        if self._hq[_H_ID] != _ID:
+            raise ValueError(f"{path}: not a SensorState block for this schema")
+        self.alarms = _AlarmView(self)
+        self.peaks = _PeakView(self)
+
+    def snapshot(self, since=-1):
+        """Consistent ``Snapshot`` of the block (seqlock read, as in ``SensorState``)."""
+        hq = self._hq
+        while True:
+            seq = hq[_H_SEQ]
+            if not seq & 1:
+                _fence()
+                values = self._values.tolist()
+                versions = self._versions.tolist()
+                stamps = self._stamps.tolist()
+                text = bytes(self._text)
+                io = hq[_H_IO]
+                _fence()
+                if hq[_H_SEQ] == seq:
+                    break
+            time.sleep(0)
+        for slot, cast in _CASTS:
+            values[slot] = cast(values[slot])
+        for slot, off in _TEXT_OFFSET.items():
+            values[slot] = text[off:off + TEXT_BYTES].rstrip().decode()
+        io = IoSnapshot._make(bool(io >> bit & 1) for bit in range(len(IoSnapshot._fields)))
+        return Snapshot.build(values, io, seq, versions, stamps, since)
+
+    def alarm_mask(self):
+        """The ingest process's ``AlarmEngine.active`` as of its last commit."""
+        return self._hq[_H_ALARMS]
+
+    def age(self, name):
+        """Seconds since ``name`` was last written (``inf`` if never)."""
+        t = self._stamps[FIELD_NAMES.index(name)]
+        if not t:
+            return float("inf")
+        return time.monotonic() - t
+
+    def since_can(self):
+        """Seconds since the last CAN frame (``inf`` if none received yet)."""
+        t = self._hd[_H_LAST_CAN]
+        if not t:
+            return float("inf")
+        return time.monotonic() - t
+
+
+class _AlarmView:
+    """``AlarmEngine`` read interface over the published alarm mask."""
+
+    def __init__(self, shared):
+        self._shared = shared
+        self._names = AlarmEngine().names   # same RULES, so the same bit order
+
+    @property
+    def active(self):
+        return self._shared.alarm_mask()
+
+    def names(self, kind, mask=None):
+        return self._names(kind, self.active if mask is None else mask)
+
+
+class _PeakView:
+    """``PeakTracker`` read interface over the published peaks."""
+
+    fields = PEAK_FIELDS
+
+    def __init__(self, shared):
+        self._shared = shared
+        n = len(PEAK_FIELDS)
+        self._index = {name: row for row, name in enumerate(PEAK_FIELDS)}
+        # window -> offset of its lows (its highs follow)
+        self._base = {w: 2 * n * k for k, w in enumerate(WINDOWS)}
+        self._n = n
+
+    @property
+    def in_pull(self):
+        return bool(self._shared._hq[_H_PULL])
+
+    def max(self, name, window="session"):
+        """Highest ``name`` seen in ``window`` (None if nothing yet)."""
+        v = self._shared._peaks[self._base[window] + self._n + self._index[name]]
+        return None if v == -_INF else v
+
+    def min(self, name, window="session"):
+        """Lowest ``name`` seen in ``window`` (None if nothing yet)."""
+        v = self._shared._peaks[self._base[window] + self._index[name]]
+        return None if v == _INF else v
+
+
+def run_ingest(name=SHM_NAME, channels=("can0",), can_debug=True, can_simple=False):
+    """Ingest process body: CAN + GPIO readers feeding a published ``SensorState``.
+
+    The process runs the deriver, the alarm rules and the peak tracker, and
+    plays the no-CAN demo loop itself (the UI's view of the block is
+    read-only). ``RECORD`` and ``REPLAY`` are honoured here as in
+    ``start_cluster.py``. ``HISTORY`` is not: the UI queries those rings, so
+    it keeps them and feeds them from its snapshots.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    from demo import feed
+    from derived import Deriver
+    from gpio_helper import read_io
+    from multibus import read_buses
+    from model import SensorState
+    from peaks import PeakTracker
+
+    state = SensorState()
+    state.set_deriver(Deriver())
+    alarms = AlarmEngine()
+    state.add_listener(alarms.record)
+    peaks = PeakTracker()
+    state.add_listener(peaks.record)
+    subscriptions, recorders = [], []
+    if os.environ.get("RECORD"):
+        from recorder import attach
+        subscriptions, recorders = attach(state, os.environ["RECORD"].split(","),
+                               os.environ.get("RECORD_DIR", "recordings"), channels)
+    # last, so the block's heartbeat starts once the slow setup is done
+    publisher = ShmPublisher(state, alarms=alarms, peaks=peaks, name=name)
+
+    ex = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ftcan")
+    if os.environ.get("REPLAY"):                 # a recorded capture instead of the bus
+        from replay import replay_can
+        speed = os.environ.get("REPLAY_SPEED", "1")
+        ex.submit(replay_can, os.environ["REPLAY"], state=state,
+                  speed=None if speed == "max" else float(speed), log=can_debug,
+                  simple=can_simple, subscribers=subscriptions)
+    else:
+        ex.submit(read_buses, channels, state=state, log=can_debug, simple=can_simple,
+                  subscribers=subscriptions)
+    ex.submit(read_io, state=state)
+
+    # a service stop (SIGTERM) unwinds through ``close`` so the block is unlinked
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    print("[shm] publishing SensorState as", name, flush=True)
+    demo_t0 = None
+    try:
+        while True:
+            if state.since_can() > NO_CAN_DEMO_DELAY:
+                if demo_t0 is None:
+                    demo_t0 = time.monotonic()
+                feed(state, time.monotonic() - demo_t0)
+            else:
+                demo_t0 = None
+            alarms.tick(time.monotonic())
+            publisher.tick()
+            time.sleep(PUBLISH_INTERVAL)
+    finally:
+        publisher.close()
+        for recorder in recorders:           # seal the open blocks
+            recorder.close()
+
+
+if __name__ == "__main__":
+    run_ingest(channels=os.environ.get("CAN_CHANNELS", "can0").split(","),
+               can_debug=os.environ.get("CAN_DEBUG", "true").lower() == "true",
+               can_simple=os.environ.get("CAN_SIMPLE", "false").lower() == "true")
@@ -1,22 +1,89 @@
 import os
+import subprocess
+import sys
 from concurrent.futures import ThreadPoolExecutor
 
-from can_helper import read_can, log_realtime
-from gpio_helper import read_io
 from cluster import run_cluster
 from model import SensorState
 
-if __name__ == '__main__':
+
+def start_readers(channels, can_debug, can_simple, history=None):
+    """CAN + GPIO reader threads in this process, feeding a fresh SensorState
+    (and ``history``, from the CAN thread). Returns the state and the flight
+    recorders to close on shutdown."""
+    from multibus import read_buses
+    from gpio_helper import read_io
+
     state = SensorState()
+    if history is not None:
+        state.add_listener(history.record)
+
+    # can_debug: discovery logger for the FTCAN real-time broadcast ([canrt] in the
+    # journal), fed from the same socket. On by default while we map the
+    # fan/2-step/output signals; set CAN_DEBUG=false in the launcher to turn it off.
+    # Optional flight recorder (RECORD=frames,deltas) into RECORD_DIR; see recorder.py.
+    subscriptions, recorders = [], []
+    if os.environ.get('RECORD'):
+        from recorder import attach
+        subscriptions, recorders = attach(state, os.environ['RECORD'].split(','),
+                               os.environ.get('RECORD_DIR', 'recordings'), channels)
+
+    ex = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ftcan")
+    # REPLAY=<capture>: feed a recorded capture through the CAN path instead of
+    # the bus, at REPLAY_SPEED (1 = real time, N = N x, max); see replay.py.
+    if os.environ.get('REPLAY'):
+        from replay import replay_can
+        speed = os.environ.get('REPLAY_SPEED', '1')
+        ex.submit(replay_can, os.environ['REPLAY'], state=state,
+                  speed=None if speed == 'max' else float(speed), log=can_debug,
+                  simple=can_simple, subscribers=subscriptions)
+    else:
+        ex.submit(read_buses, channels, state=state, log=can_debug, simple=can_simple,
+                  subscribers=subscriptions)
+    ex.submit(read_io, state=state)
+    return state, recorders
 
-    ex = ThreadPoolExecutor(max_workers=3, thread_name_prefix="ftcan")
-    can_reader = ex.submit(read_can, state=state)
-    io_reader = ex.submit(read_io, state=state)
 
-    # Discovery logger for the FTCAN real-time broadcast ([canrt] in the journal).
-    # On by default while we map the fan/2-step/output signals; set CAN_DEBUG=false
-    # in the launcher to turn it off later.
-    if os.environ.get('CAN_DEBUG', 'true').lower() == 'true':
-        ex.submit(log_realtime)
+def attach_ingest(channels, can_debug, can_simple):
+    """Shared-memory view of a separate ingest process (see shm_state.py),
+    spawning one unless a live ingest is already publishing.
 
-    run_cluster(state)
+    The spawned ingest is detached (its own session, not a child the UI takes
+    down with it), so a UI crash or exit leaves it and its CAN socket running,
+    and the restarted UI attaches to the same block. A block whose ingest died
+    (SIGKILL, crash) is unlinked and a new ingest spawned."""
+    import shm_state
+    from shm_state import SharedState, reclaim
+
+    if reclaim() is None:
+        env = dict(os.environ, CAN_CHANNELS=','.join(channels),
+                   CAN_DEBUG=str(can_debug).lower(), CAN_SIMPLE=str(can_simple).lower())
+        subprocess.Popen([sys.executable, shm_state.__file__], env=env,
+                         stdin=subprocess.DEVNULL, start_new_session=True)
+    return SharedState()
+
+
+if __name__ == '__main__':
+    # CAN_CHANNELS=can0,can1: every listed bus read in one event loop (ECU first)
+    channels = os.environ.get('CAN_CHANNELS', 'can0').split(',')
+    can_debug = os.environ.get('CAN_DEBUG', 'true').lower() == 'true'
+    # CAN_SIMPLE=true: RPM / wheel speeds / lambda / oil temp from the ECU's
+    # simplified packets (one frame each) instead of the segmented stream
+    can_simple = os.environ.get('CAN_SIMPLE', 'false').lower() == 'true'
+    # HISTORY=true: rolling history of every channel (NumPy rings) for the
+    # dashboard's trend alerts; see history.py
+    history = None
+    if os.environ.get('HISTORY', 'false').lower() == 'true':
+        from history import History
+        history = History()
+    # SHM=true: ingest runs in its own process, off the UI's GIL
+    recorders = []
+    if os.environ.get('SHM', 'false').lower() == 'true':
+        state = attach_ingest(channels, can_debug, can_simple)
+    else:
+        state, recorders = start_readers(channels, can_debug, can_simple, history)
+    try:
+        run_cluster(state, history)
+    finally:
+        for recorder in recorders:   # seal the open blocks
+            recorder.close()
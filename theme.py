@@ -33,6 +33,7 @@ TT_CYAN = (0.133, 0.827, 0.933, 1.0)     # #22d3ee 2-step
 TT_BOOST = (1.000, 0.231, 0.188, 1.0)    # #ff3b30 over-boost
 PILL_OFF_BORDER = (1.0, 1.0, 1.0, 0.06)  # tell-tale outline when inactive
 PILL_OFF_TEXT = (1.0, 1.0, 1.0, 0.10)    # tell-tale label when inactive
+STALE_VALUE = (1.0, 1.0, 1.0, 0.25)      # greyed-out value whose signal stopped arriving
 
 # lambda value colours
 LAMBDA_RICH = (1.000, 0.541, 0.302, 1.0)   # #ff8a4d
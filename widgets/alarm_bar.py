@@ -9,12 +9,12 @@ from kivy.uix.widget import Widget
 from kivy.uix.label import Label
 from kivy.core.window import Window
 from kivy.graphics import Color, Rectangle
-from kivy.clock import Clock
 
+from frames import PAINT, scheduler
 from theme import FONT_MONO, ALARM_BG, ALARM_TEXT
 
 ALARM_HEIGHT = 60
-ALARM_BLINK = 0.25   # seconds per flash toggle
+ALARM_BLINK = 0.25   # seconds per flash toggle (shared frame timebase)
 FLASH_HI = 1.0
 FLASH_LO = 0.16
 
@@ -29,11 +29,11 @@ class AlarmBar(Widget):
                             color=(*ALARM_TEXT[:3], 0), halign="center", valign="middle")
         self.add_widget(self._label)
         self._alarms = None
-        self._on = True
-        self._ev = None
+        self._on = None
         self._layout()
         Window.bind(size=lambda *_: self._layout(),
                     on_resize=lambda *_: self._layout())
+        scheduler.add(PAINT, self._blink)
 
     def _layout(self, *_):
         self._bg.pos = (0, 0)
@@ -51,16 +51,18 @@ class AlarmBar(Widget):
         if alarms:
             self._layout()   # re-match the current window width (it has settled by now)
             self._label.text = "      ".join(alarms)
-            if self._ev is None:
-                self._ev = Clock.schedule_interval(self._blink, ALARM_BLINK)
+            scheduler.wake(self._blink)
         else:
-            if self._ev is not None:
-                self._ev.cancel()
-                self._ev = None
+            self._on = None
             self._bg_col.a = 0
             self._label.color = (*ALARM_TEXT[:3], 0)
 
-    def _blink(self, _):
-        self._on = not self._on
-        self._bg_col.a = FLASH_HI if self._on else FLASH_LO
-        self._label.color = (*ALARM_TEXT[:3], 1.0 if self._on else 0.55)
+    def _blink(self, now, dt):
+        if not self._alarms:
+            return None
+        on = scheduler.blink(ALARM_BLINK)
+        if on != self._on:
+            self._on = on
+            self._bg_col.a = FLASH_HI if on else FLASH_LO
+            self._label.color = (*ALARM_TEXT[:3], 1.0 if on else 0.55)
+        return scheduler.next_blink(ALARM_BLINK)
@@ -21,6 +21,7 @@ from theme import (
     BOOST_NORMAL, TT_RED, TT_AMBER, CARD_WIDTH, CARD_HEIGHT,
     WINDOW_HEIGHT,
     EGT_BALANCED, EGT_MID, EGT_UNBALANCED, EGT_INACTIVE, EGT_SPREAD_RED, EGT_ACTIVE_MIN,
+    STALE_VALUE,
 )
 from .readout import Readout
 
@@ -34,13 +35,6 @@ EGT_CELL_W = 48       # per-channel cell width
 EGT_CELL_GAP = 14     # gap between channels (centred cluster, kept tight)
 
 
-def _egt_median(vals):
-    s = sorted(vals)
-    n = len(s)
-    mid = n // 2
-    return s[mid] if n % 2 else (s[mid - 1] + s[mid]) / 2.0
-
-
 def _egt_lerp(a, b, k):
     return tuple(a[j] + (b[j] - a[j]) * k for j in range(4))
 
@@ -85,9 +79,30 @@ class CenterInfo(Widget):
         ("oiltemp", "OIL T",  "{:.0f} °C",  lambda v: v > 120, TT_RED),
     ]
 
+    # readout key -> SensorState fields it is drawn from (for stale greying)
+    SOURCES = {
+        "air": ("air_temp",),
+        "engine": ("engine_temp",),
+        "oil": ("oil_pressure_bar",),
+        "egtavg": ("egt1", "egt2", "egt3", "egt4"),
+        "fpress": ("fuel_pressure_bar",),
+        "fuel": ("fuel_level",),
+        "oiltemp": ("oil_temp",),
+    }
+    # the same for the big BOOST / LAMBDA values and the EGT dot row
+    BIG_SOURCES = {
+        "boost": ("map",),
+        "lambda": ("lambda_afr",),
+        "egt": ("egt1", "egt2", "egt3", "egt4"),
+    }
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.readouts = {}
+        self._boost = self._lambda = self._rpm = None
+        self._boost_peak = None
+        self._egt = None
+        self._stale = frozenset()   # big-value / EGT keys currently greyed out
 
         self.size = (CARD_WIDTH, CARD_HEIGHT)
         self._center_vert = (WINDOW_HEIGHT / 2) - (self.size[1] / 2) - CENTER_Y_OFFSET
@@ -118,7 +133,7 @@ class CenterInfo(Widget):
         self.vbox.add_widget(self._hairline())
 
         # --- big BOOST ---
-        self.boost_value = self._big_block("BOOST", "BAR")
+        self.boost_value, self.boost_unit = self._big_block("BOOST", "BAR", with_ref=True)
         self.vbox.add_widget(self._hairline())
 
         # --- big LAMBDA --- (starts at stoich 1.00, blue)
@@ -240,14 +255,41 @@ class CenterInfo(Widget):
 
     # ---- data ----
 
-    def set_egt(self, temps):
+    def set_stale(self, state):
+        """Grey out every readout whose source signals are stale in ``state``
+        (a ``Snapshot``), e.g. the wideband or EGT-4 module dropped off the bus."""
+        for key, names in self.SOURCES.items():
+            self.readouts[key].set_stale(state.is_stale(*names))
+        stale = frozenset(key for key, names in self.BIG_SOURCES.items()
+                          if state.is_stale(*names))
+        if stale == self._stale:
+            return
+        self._stale = stale
+        self._paint_boost()
+        self._paint_lambda()
+        if self._egt is not None:
+            self.set_egt(*self._egt)
+
+    def set_climbing(self, key, climbing):
+        """Amber ``key``'s readout while its value climbs too fast (a trend
+        alert from the rolling history, ahead of its own limit)."""
+        self.readouts[key].set_alert(climbing)
+
+    def set_egt(self, temps, avg, median):
         """Update the 4 EGT dots/readouts; colour each by deviation from the median
-        (green in balance, reddening as a channel drifts from the group)."""
+        (green in balance, reddening as a channel drifts from the group).
+        ``avg`` / ``median`` are the derived ``egt_avg`` / ``egt_median`` channels."""
         temps = list(temps)[:4]
+        self._egt = (temps, avg, median)
         active = bool(temps) and max(temps) > EGT_ACTIVE_MIN
-        ref = _egt_median(temps) if active else 0.0
-        self.readouts["egtavg"].set(sum(temps) / len(temps) if active else None)
+        ref = median if active else 0.0
+        self.readouts["egtavg"].set(avg if active else None)
         for i in range(4):
+            if active and "egt" in self._stale:
+                self._egt_dots[i].set_color(EGT_INACTIVE)
+                self._egt_vals[i].text = f"{int(round(temps[i]))}"
+                self._egt_vals[i].color = STALE_VALUE
+                continue
             if not active:
                 self._egt_dots[i].set_color(EGT_INACTIVE)
                 self._egt_vals[i].text = "—"
@@ -271,20 +313,47 @@ class CenterInfo(Widget):
             self.gear_value.text = str(gear)
 
         if boost_bar is not None:
+            self._boost = boost_bar
             self.boost_value.text = f"{boost_bar:.2f}"
-            self.boost_value.color = TT_RED if boost_bar > 1.32 else BOOST_NORMAL
+            self._paint_boost()
 
         if lambda_val is not None:
+            self._lambda, self._rpm = lambda_val, rpm
             self.lambda_value.text = f"{lambda_val:.2f}"
-            # Below ~500 rpm the engine isn't burning, so lambda reads pegged-lean
-            # on ambient O2 — suppress the RICH/LEAN alert and stay neutral.
-            if rpm is not None and rpm < 500:
-                self.lambda_value.color, self.lambda_tag.text = BOOST_NORMAL, "STOICH"
-            # Match the rest of the cluster's palette: accent blue when safe,
-            # amber when rich, red when lean (lean is the dangerous side).
-            elif lambda_val < 0.85:
-                self.lambda_value.color, self.lambda_tag.text = TT_AMBER, "RICH"
-            elif lambda_val > 1.05:
-                self.lambda_value.color, self.lambda_tag.text = TT_RED, "LEAN"
-            else:
-                self.lambda_value.color, self.lambda_tag.text = BOOST_NORMAL, "STOICH"
+            self._paint_lambda()
+
+    def set_boost_peak(self, peak):
+        """Show the held boost peak of the last pull under BOOST (None: no pull yet)."""
+        if peak is not None:
+            peak = round(max(0.0, peak), 2)
+        if peak == self._boost_peak:
+            return
+        self._boost_peak = peak
+        self.boost_unit.text = "BAR" if peak is None else f"BAR · PEAK {peak:.2f}"
+
+    def _paint_boost(self):
+        if self._boost is None:
+            return
+        if "boost" in self._stale:
+            self.boost_value.color = STALE_VALUE
+        else:
+            self.boost_value.color = TT_RED if self._boost > 1.32 else BOOST_NORMAL
+
+    def _paint_lambda(self):
+        lambda_val, rpm = self._lambda, self._rpm
+        if lambda_val is None:
+            return
+        if "lambda" in self._stale:
+            self.lambda_value.color = STALE_VALUE
+        # Below ~500 rpm the engine isn't burning, so lambda reads pegged-lean
+        # on ambient O2 — suppress the RICH/LEAN alert and stay neutral.
+        elif rpm is not None and rpm < 500:
+            self.lambda_value.color, self.lambda_tag.text = BOOST_NORMAL, "STOICH"
+        # Match the rest of the cluster's palette: accent blue when safe,
+        # amber when rich, red when lean (lean is the dangerous side).
+        elif lambda_val < 0.85:
+            self.lambda_value.color, self.lambda_tag.text = TT_AMBER, "RICH"
+        elif lambda_val > 1.05:
+            self.lambda_value.color, self.lambda_tag.text = TT_RED, "LEAN"
+        else:
+            self.lambda_value.color, self.lambda_tag.text = BOOST_NORMAL, "STOICH"
@@ -1,19 +1,31 @@
 from kivy.uix.widget import Widget
 from kivy.graphics import (
+    Callback,
+    ClearBuffers,
+    ClearColor,
     Color,
     Ellipse,
+    Fbo,
     Line,
+    Rectangle,
     Rotate,
     PushMatrix,
     PopMatrix,
 )
+from kivy.graphics.opengl import (
+    GL_ONE, GL_ONE_MINUS_SRC_ALPHA, GL_SRC_ALPHA, glBlendFuncSeparate,
+)
+from kivy.core.text import Label as CoreLabel
+from kivy.metrics import sp
 from kivy.uix.label import Label
 from kivy.clock import Clock
 
+from . import gauge_shader
+from frames import ANIMATE, PAINT, scheduler
 from theme import (
     FONT_MONO, GAUGE_FACE, GAUGE_RING, GAUGE_TICK, GAUGE_TICK_MINOR, GAUGE_NUM,
     GAUGE_ARC, GAUGE_NEEDLE, GAUGE_REDLINE, GAUGE_SHIFT, GAUGE_SHIFT_TEXT,
-    GAUGE_SHIFT_FLASH, GAUGE_CENTER, GAUGE_SUB, GAUGE_UNIT,
+    GAUGE_SHIFT_FLASH, GAUGE_CENTER, GAUGE_SUB, GAUGE_UNIT, STALE_VALUE,
 )
 
 import math
@@ -22,8 +34,24 @@ DIGIT_FONT = "78sp"
 SHIFT_FONT = "64sp"
 ARC_WIDTH = 5
 SHIFT_ARC_WIDTH = 13      # fat amber arc while shifting
-SHIFT_BLINK = 0.06        # fast strobe (s per toggle)
+SHIFT_BLINK = 0.06        # fast strobe (s per toggle, on the shared frame timebase)
 SHIFT_FLASH_ALPHA = 0.55  # red disc wash intensity on the bright phase
+NUM_BOX = (80, 44)        # layout box of a dial numeral
+NEEDLE_OMEGA = 8.0        # needle spring (rad/s, critically damped: ~0.6 s to settle a step)
+NEEDLE_SETTLE = 0.25      # px at the needle tip under which the animation sleeps
+ANIM_DT = 1 / 60.0        # nominal frame time (the settle test's per-frame motion)
+
+# Latency compensation for timestamped samples (update_value(..., stamp=)):
+# an alpha-beta filter tracks value and rate, and the needle is aimed at the
+# value extrapolated to "now", at most PREDICT_HORIZON past the last sample.
+# With no newer sample (a plateau isn't re-sent) the lead then fades out over
+# PREDICT_DECAY and the needle comes to rest on the last measured value.
+PREDICT_HORIZON = 0.08    # s of dead-reckoning past the newest sample
+PREDICT_DECAY = 0.15      # s over which an unconfirmed lead fades back to the sample
+PREDICT_GAP = 0.25        # s between samples after which the rate estimate restarts
+PREDICT_ALPHA = 0.8       # filter gain on the value residual
+PREDICT_BETA = 0.5        # filter gain on the rate (per residual per sample period)
+PREDICT_MIN_RATE = 0.1    # full scales/s below which there's no lead (idle jitter)
 
 # Startup self-test sweep timing (seconds). The initial delay lets the display
 # finish coming up so the whole sweep is visible, not just its tail.
@@ -31,10 +59,35 @@ INTRO_SWEEP_AT = 2.5   # sweep needle to full scale
 INTRO_RESET_AT = 3.8   # then sweep back to zero
 
 
+def _premultiplied(_instr):
+    # baked layers hold premultiplied colour (what Kivy's blending leaves in an FBO)
+    glBlendFuncSeparate(GL_ONE, GL_ONE_MINUS_SRC_ALPHA, GL_ONE, GL_ONE)
+
+
+def _straight(_instr):
+    # Kivy's default blending, restored after a baked layer
+    glBlendFuncSeparate(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA, GL_ONE, GL_ONE)
+
+
+def _baking(_instr):
+    # inside an FBO: composite alpha "over" too, so the texture is true premultiplied
+    glBlendFuncSeparate(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA, GL_ONE, GL_ONE_MINUS_SRC_ALPHA)
+
+
 class Gauge(Widget):
     """Minimal analog gauge: hairline ticks and a thin Azul Boreal needle on a
     dark disc, with a thin progress arc. At the shift point the arc and needle
-    flash amber and a red SHIFT! pulses over the centre (see ``set_shift``)."""
+    flash amber and a red SHIFT! pulses over the centre (see ``set_shift``).
+
+    Everything that never moves is baked once (and again on resize) into two
+    textures drawn as single quads: ring + ticks + numerals under the arc,
+    redline + titles over it. Per frame Kivy walks only the face, the flash
+    wash, the arc, the needle and the centre digit.
+
+    With ``shader=True`` the face/wash and the arc/needle are two GLSL quads
+    instead (see ``gauge_shader``), so animating them only updates uniforms.
+    It falls back to the ``Line`` drawing if the shader doesn't compile.
+    """
 
     def __init__(
         self,
@@ -48,6 +101,7 @@ class Gauge(Widget):
         show_digital_value=True,
         redline_from=None,
         value_formatter=None,
+        shader=False,
         **kwargs,
     ):
         super().__init__(**kwargs)
@@ -63,17 +117,23 @@ class Gauge(Widget):
         self.value_formatter = value_formatter or (lambda v: f"{int(v)}")
         self.needle_angle = 180
         self.current_angle = 180
+        self._needle_velocity = 0.0   # deg/s
+        self._trend = None            # [value, rate/s, stamp, last sample] when predicting
         self.value = 0
 
         self._shift_active = False
         self._shift_on = False
-        self._shift_ev = None
+        self._stale = False
+        self._baked_size = None
+        self.shader = shader
 
         with self.canvas:
             self.draw_gauge()
 
-        Clock.schedule_once(self.init_needle, 0)
-        Clock.schedule_interval(self.smooth_update, 1 / 60.0)
+        # the needle steps only while moving (woken by update_value)
+        self._moving = False
+        scheduler.add(ANIMATE, self._animate)
+        scheduler.add(PAINT, self._strobe)
 
         self.value_label = Label(
             text="0",
@@ -91,6 +151,9 @@ class Gauge(Widget):
         if show_digital_value:
             self.add_widget(self.value_label)
 
+        self._layout()
+        self.bind(pos=self._layout, size=self._layout)
+
         self.update_value(0, smooth=False)
         Clock.schedule_once(
             lambda _: self.update_value(max_value, update_label=False), INTRO_SWEEP_AT
@@ -98,17 +161,109 @@ class Gauge(Widget):
         Clock.schedule_once(lambda _: self.update_value(0), INTRO_RESET_AT)
 
     def draw_gauge(self):
+        """Canvas, bottom to top: face, shift wash, baked ring/ticks/numerals,
+        arc, baked redline/titles, needle. Geometry is set in ``_layout``."""
+        if self.shader:
+            self._face_layer = gauge_shader.layer(
+                gauge_shader.FACE, face_color=GAUGE_FACE,
+                flash_color=GAUGE_SHIFT_FLASH, flash_alpha=0.0)
+            if self._face_layer is None:
+                print("[gauge] dial shader failed to compile, drawing with Lines")
+                self.shader = False
+        if self.shader:
+            self._draw_shader_layers()
+            return
+
+        # dark dial face (no chrome, no rectangular border)
+        Color(*GAUGE_FACE)
+        self._face = Ellipse()
+        # shift-light red wash over the whole disc (alpha strobed in _apply_flash)
+        self._flash_color = Color(*GAUGE_SHIFT_FLASH[:3], 0)
+        self._flash = Ellipse()
+
+        self._under = self._baked_quad()
+
+        # bold progress arc (filled live in smooth_update)
+        self._arc_color = Color(*GAUGE_ARC)
+        self.arc = Line(circle=(0, 0, 1, 0, 0.01), width=ARC_WIDTH, cap="round")
+
+        self._over = self._baked_quad()
+
+        PushMatrix()
+        self.rot = Rotate(angle=self.needle_angle)
+        self._needle_color = Color(*GAUGE_NEEDLE)
+        # a floating pointer that stops short of the centre, leaving the
+        # digit a clean space (no hub disc).
+        self.needle = Line(points=[0, 0, 0, 0], width=4, cap="round")
+        PopMatrix()
+
+    def _draw_shader_layers(self):
+        """``draw_gauge`` for ``shader=True``: the arc and needle share one
+        quad between the baked layers (the needle never reaches the redline
+        or titles, so it can sit under them). Layers created here land in
+        the active canvas."""
+        self._under = self._baked_quad()
+        self._layer = gauge_shader.layer(
+            gauge_shader.DYNAMIC, arc_color=GAUGE_ARC, arc_width=float(ARC_WIDTH),
+            needle_color=GAUGE_NEEDLE, needle_width=4.0)
+        self._over = self._baked_quad()
+
+    @staticmethod
+    def _baked_quad():
+        Callback(_premultiplied)
+        Color(1, 1, 1, 1)
+        quad = Rectangle()
+        Callback(_straight)
+        return quad
+
+    def _layout(self, *args):
+        """Place the live parts; re-bake the static layers if the size changed."""
         cx, cy = self.center
         radius = min(self.width, self.height) / 2
         self._cx, self._cy = cx, cy
         self._arc_r = radius * 0.92
+        self._tip_r = radius * 0.86
+        if self.shader:
+            for ctx, quad in (self._face_layer, self._layer):
+                quad.pos, quad.size = self.pos, self.size
+                ctx["center"] = (float(cx), float(cy))
+            self._face_layer[0]["radius"] = float(radius)
+            ctx = self._layer[0]
+            ctx["arc_r"] = float(self._arc_r)
+            ctx["arc_start"] = float(self._angle_for_value(0))
+            ctx["needle_inner"] = radius * 0.30
+            ctx["needle_outer"] = radius * 0.86
+        else:
+            self._face.pos = self._flash.pos = self.pos
+            self._face.size = self._flash.size = self.size
+            self.rot.origin = (cx, cy)
+            self.needle.points = [cx, cy + radius * 0.30, cx, cy + radius * 0.86]
+        self._draw_needle()
+        if self._baked_size != tuple(self.size):
+            self._baked_size = tuple(self.size)
+            self._under.texture = self._bake(self._draw_dial)
+            self._over.texture = self._bake(self._draw_labels)
+        for quad in (self._under, self._over):
+            quad.pos = self.pos
+            quad.size = self.size
+        self.value_label.center = self.center
 
-        # dark dial face + faint edge ring (no chrome, no rectangular border)
-        Color(*GAUGE_FACE)
-        Ellipse(pos=self.pos, size=self.size)
-        # shift-light red wash over the whole disc (alpha strobed in _apply_shift)
-        self._flash_color = Color(*GAUGE_SHIFT_FLASH[:3], 0)
-        Ellipse(pos=self.pos, size=self.size)
+    def _bake(self, draw):
+        """Render ``draw(cx, cy, radius)`` once into a transparent texture of
+        the gauge's size (gauge-local coordinates)."""
+        w, h = max(1, int(self.width)), max(1, int(self.height))
+        fbo = Fbo(size=(w, h), with_stencilbuffer=True)   # thick Lines stencil
+        with fbo:
+            ClearColor(0, 0, 0, 0)
+            ClearBuffers()
+            Callback(_baking)
+            draw(w / 2, h / 2, min(w, h) / 2)
+            Callback(_straight)
+        fbo.draw()
+        return fbo.texture
+
+    def _draw_dial(self, cx, cy, radius):
+        """Baked under-layer: faint edge ring, ticks and numerals."""
         Color(*GAUGE_RING)
         Line(circle=(cx, cy, radius * 0.995), width=1)
 
@@ -116,13 +271,9 @@ class Gauge(Widget):
         tick_outer = radius * 0.90
         major_len = radius * 0.10
         minor_len = radius * 0.05
-        num_radius = radius * 0.66
-        num_box = (80, 44)
-        base_angle = -90 - ((360 - self.angle_range) / 2)
-        tick_angle = (-self.angle_range) / (self.ticks - 1)
 
         def tick_line(frac_index, inner_len, color, width):
-            a = math.radians(base_angle + tick_angle * frac_index)
+            a = math.radians(self._tick_angle(frac_index))
             cos_a, sin_a = math.cos(a), math.sin(a)
             Color(*color)
             Line(
@@ -141,29 +292,16 @@ class Gauge(Widget):
             if i < self.ticks - 1:
                 tick_line(i + 0.5, minor_len, GAUGE_TICK_MINOR, 1)
 
-            a = math.radians(base_angle + tick_angle * i)
+        num_radius = radius * 0.66
+        for i in range(self.ticks):
+            a = math.radians(self._tick_angle(i))
             value = int((i / (self.ticks - 1)) * self.max_value)
             label = self.label_map.get(value, value)
-            num = Label(
-                text=str(label),
-                size_hint=(None, None), size=num_box,
-                pos=(cx + num_radius * math.cos(a) - num_box[0] / 2,
-                     cy + num_radius * math.sin(a) - num_box[1] / 2),
-                font_size="30sp", halign="center", valign="middle",
-                color=GAUGE_NUM,
-            )
-            num.text_size = num_box
-            self.add_widget(num)
-
-        # bold progress arc (filled live in smooth_update)
-        self._arc_color = Color(*GAUGE_ARC)
-        self.arc = Line(
-            circle=(cx, cy, self._arc_r, self._angle_for_value(0),
-                    self._angle_for_value(0) + 0.01),
-            width=ARC_WIDTH,
-            cap="round",
-        )
+            self._text(str(label), cx + num_radius * math.cos(a), cy + num_radius * math.sin(a),
+                       sp(30), GAUGE_NUM, box=NUM_BOX)
 
+    def _draw_labels(self, cx, cy, radius):
+        """Baked over-layer: redline arc, title and unit."""
         # redline arc
         if self.redline_from and 0 < self.redline_from < self.max_value:
             start = self._angle_for_value(self.redline_from)
@@ -174,16 +312,38 @@ class Gauge(Widget):
             Line(circle=(cx, cy, radius * 0.92, start, end), width=8, cap="round")
 
         # sub-label (SPEED / RPM) and unit (KM/H / x1000), quiet under the digit
-        self.add_widget(Label(
-            text=self.title, font_name=FONT_MONO, color=GAUGE_SUB,
-            size=(self.width, 30), pos=(self.x, self.y + self.height * 0.24),
-            font_size="36sp", halign="center", valign="middle",
-        ))
-        self.add_widget(Label(
-            text=self.subtitle, font_name=FONT_MONO, color=GAUGE_UNIT,
-            size=(self.width, 24), pos=(self.x, self.y + self.height * 0.165),
-            font_size="24sp", halign="center", valign="middle",
-        ))
+        h = 2 * cy
+        self._text(self.title, cx, h * 0.24 + 15, sp(36), GAUGE_SUB, FONT_MONO)
+        self._text(self.subtitle, cx, h * 0.165 + 12, sp(24), GAUGE_UNIT, FONT_MONO)
+
+    @staticmethod
+    def _text(text, x, y, font_size, color, font_name=None, box=None):
+        """Draw ``text`` centred on (x, y), as a ``Label`` would (colour baked
+        into the glyph texture, drawn under white), optionally laid out in a
+        fixed ``box`` like a Label with ``text_size``.
+
+        Drawn twice: the dial Labels this replaces were added inside
+        ``with self.canvas`` and so rendered twice, and the theme's numeral /
+        title alphas are tuned to that look."""
+        if not text:
+            return
+        options = {"font_name": font_name} if font_name else {}
+        if box:
+            options.update(text_size=box, halign="center", valign="middle")
+        core = CoreLabel(text=text, font_size=font_size, color=color, **options)
+        core.refresh()
+        tex = core.texture
+        Color(1, 1, 1, 1)
+        # drop float dust first (cos(-270°) * r is -4e-14, not 0) so the top
+        # numeral doesn't truncate a pixel off centre
+        pos = (int(round(x - tex.width / 2, 6)), int(round(y - tex.height / 2, 6)))
+        for _ in range(2):
+            Rectangle(texture=tex, size=tex.size, pos=pos)
+
+    def _tick_angle(self, frac_index):
+        """Math angle (deg, counter-clockwise from +x) of tick ``frac_index``."""
+        base_angle = -90 - ((360 - self.angle_range) / 2)
+        return base_angle - self.angle_range / (self.ticks - 1) * frac_index
 
     def _angle_for_value(self, v):
         # Value in [0, max_value] -> Kivy circle angle (deg, clockwise from top),
@@ -191,36 +351,17 @@ class Gauge(Widget):
         v = max(0, min(v, self.max_value))
         return (-self.angle_range / 2.0) + (v / float(self.max_value)) * self.angle_range
 
-    def init_needle(self, *args):
-        self.center_x = self.x + self.width / 2
-        self.center_y = self.y + self.height / 2
-        radius = min(self.width, self.height) / 2
-        with self.canvas:
-            PushMatrix()
-            self.rot = Rotate(origin=(self.center_x, self.center_y), angle=self.needle_angle)
-            self._needle_color = Color(*GAUGE_NEEDLE)
-            # a floating pointer that stops short of the centre, leaving the
-            # digit a clean space (no hub disc).
-            self.needle = Line(
-                points=[self.center_x, self.center_y + radius * 0.30,
-                        self.center_x, self.center_y + radius * 0.86],
-                width=4,
-                cap="round",
-            )
-            PopMatrix()
-        # needle was just appended to the canvas (init_needle runs after
-        # __init__), so keep the centre digit on top of it.
-        if self.value_label.parent:
-            self.remove_widget(self.value_label)
-            self.add_widget(self.value_label)
-
-    def update_value(self, value, smooth=True, update_label=True):
+    def update_value(self, value, smooth=True, update_label=True, stamp=None):
+        """Point the needle at ``value``. With ``stamp`` (the monotonic time it
+        was sampled) the needle leads the samples by their recent rate of
+        change (see ``PREDICT_HORIZON``) instead of trailing them."""
         clamped = max(0, min(value, self.max_value))
         self.value = clamped
-        angle = -self._angle_for_value(clamped)
-        self.needle_angle = angle
-        if not smooth:
-            self.current_angle = angle
+        if stamp is not None and smooth:
+            self._follow(clamped, stamp)
+        else:
+            self._trend = None
+            self._aim(-self._angle_for_value(clamped), smooth)
 
         # while shifting, the centre stays "SHIFT!" — don't write the number
         if update_label and not self._shift_active:
@@ -228,15 +369,87 @@ class Gauge(Widget):
 
         self.value_label.center = self.center
 
+    def _aim(self, angle, smooth):
+        """Set the needle target; jump there unless ``smooth``."""
+        if not smooth:
+            self._moving = False
+            self.current_angle = angle
+            self._needle_velocity = 0.0
+            self._draw_needle()
+        elif angle != self.needle_angle or angle != self.current_angle:
+            self._start()
+        self.needle_angle = angle
+
+    def _follow(self, value, stamp):
+        """Alpha-beta update of the value/rate estimate with a new sample."""
+        trend = self._trend
+        if trend is None or not 0 < stamp - trend[2] <= PREDICT_GAP:
+            self._trend = [value, 0.0, stamp, value]
+        else:
+            x, v, t, last = trend
+            dt = stamp - t
+            if abs(v) >= PREDICT_MIN_RATE * self.max_value and (value - last) * v <= 0:
+                # the signal turned around or levelled off: drop the lead and
+                # the needle's momentum, and pull the needle back onto the
+                # measurement if the lead had carried it past
+                measured = -self._angle_for_value(value)
+                if (measured - self.current_angle) * v > 0:
+                    self.current_angle = measured
+                    self._draw_needle()
+                x, v = value, 0.0
+                self._needle_velocity = 0.0
+            else:
+                x += v * dt
+                residual = value - x
+                x += PREDICT_ALPHA * residual
+                v += PREDICT_BETA * residual / dt
+            self._trend = [x, v, stamp, value]
+        self._start()
+
+    def _predict(self, now):
+        """(needle angle, needle rate in deg/s) of the estimate at ``now``."""
+        x, v, t, last = self._trend
+        if abs(v) < PREDICT_MIN_RATE * self.max_value:
+            return -self._angle_for_value(last), 0.0
+        lead = now - t
+        if lead <= PREDICT_HORIZON:
+            value = x + v * max(lead, 0.0)
+        else:
+            # past the horizon with nothing newer: fade the lead back to the sample
+            fade = (lead - PREDICT_HORIZON) / PREDICT_DECAY
+            ahead = x + v * PREDICT_HORIZON - last
+            if fade >= 1.0:
+                value, v = last, 0.0
+            else:
+                value, v = last + ahead * (1.0 - fade), -ahead / PREDICT_DECAY
+        if not 0 < value < self.max_value:
+            v = 0.0                           # held at the scale end
+        value = max(0, min(value, self.max_value))
+        return -self._angle_for_value(value), -v * self.angle_range / self.max_value
+
     def _show_value(self):
         """Render the numeric value in the centre."""
         self.value_label.font_size = DIGIT_FONT
         self.value_label.text = self.value_formatter(self.value)
-        if self.redline_from and self.value > self.redline_from:
+        if self._stale:
+            self.value_label.color = STALE_VALUE
+        elif self.redline_from and self.value > self.redline_from:
             self.value_label.color = GAUGE_REDLINE
         else:
             self.value_label.color = GAUGE_CENTER
 
+    def set_stale(self, stale):
+        """Grey out the centre digit while the gauge's signal has stopped arriving."""
+        stale = bool(stale)
+        if stale == self._stale:
+            return
+        self._stale = stale
+        if self._trend is not None:
+            self._trend = None
+            self._aim(-self._angle_for_value(self.value), True)   # drop any lead
+        if not self._shift_active:
+            self._show_value()
+
     def set_shift(self, active):
         """Shift light: a steady red SHIFT! in the centre while the disc, arc and
         needle strobe amber. The centre text doesn't blink — only the flash does."""
@@ -249,43 +462,90 @@ class Gauge(Widget):
             self.value_label.text = "SHIFT!"
             self.value_label.color = GAUGE_SHIFT_TEXT
             self.value_label.center = self.center
-            self._shift_ev = Clock.schedule_interval(self._shift_blink, SHIFT_BLINK)
+            scheduler.wake(self._strobe)
         else:
-            if self._shift_ev is not None:
-                self._shift_ev.cancel()
-                self._shift_ev = None
             self._shift_on = False
             self._apply_flash(False)
             self._show_value()
             self.value_label.center = self.center
 
-    def _shift_blink(self, _):
-        self._shift_on = not self._shift_on
-        self._apply_flash(self._shift_on)
+    def _strobe(self, now, dt):
+        """PAINT hook: the shift flash follows the shared ``SHIFT_BLINK`` phase."""
+        if not self._shift_active:
+            return None
+        on = scheduler.blink(SHIFT_BLINK)
+        if on != self._shift_on:
+            self._shift_on = on
+            self._apply_flash(on)
+        return scheduler.next_blink(SHIFT_BLINK)
 
     def _apply_flash(self, on):
         """Strobe only the disc wash, arc and needle — never the centre text."""
-        if on:
+        if self.shader:
+            ctx = self._layer[0]
+            ctx["arc_color"] = GAUGE_SHIFT if on else GAUGE_ARC
+            ctx["arc_width"] = float(SHIFT_ARC_WIDTH if on else ARC_WIDTH)
+            ctx["needle_color"] = GAUGE_SHIFT if on else GAUGE_NEEDLE
+            self._face_layer[0]["flash_alpha"] = SHIFT_FLASH_ALPHA if on else 0.0
+        elif on:
             self._arc_color.rgba = GAUGE_SHIFT
             self.arc.width = SHIFT_ARC_WIDTH
             self._flash_color.a = SHIFT_FLASH_ALPHA
-            if hasattr(self, "_needle_color"):
-                self._needle_color.rgba = GAUGE_SHIFT
+            self._needle_color.rgba = GAUGE_SHIFT
         else:
             self._arc_color.rgba = GAUGE_ARC
             self.arc.width = ARC_WIDTH
             self._flash_color.a = 0
-            if hasattr(self, "_needle_color"):
-                self._needle_color.rgba = GAUGE_NEEDLE
-
-    def smooth_update(self, dt):
-        smoothing_speed = 5
-        diff = self.needle_angle - self.current_angle
-        self.current_angle += diff * smoothing_speed * dt
-
-        if hasattr(self, "rot"):
+            self._needle_color.rgba = GAUGE_NEEDLE
+
+    def _start(self):
+        """Wake the needle animation."""
+        self._moving = True
+        scheduler.wake(self._animate)
+
+    def _animate(self, now, dt):
+        """ANIMATE hook: step the needle every frame until it settles."""
+        if self._moving:
+            self.smooth_update(dt, now)
+        return now if self._moving else None
+
+    def smooth_update(self, dt, now=None):
+        """Advance the needle spring by ``dt`` to ``now``; stop once settled.
+
+        Uses the exact critically damped solution, so a long frame lands
+        further along the same curve instead of overshooting. A predicted
+        target moves at its own rate, and the spring works relative to it,
+        so a steady sweep is tracked without lag."""
+        rate = 0.0
+        if self._trend is not None:
+            self.needle_angle, rate = self._predict(scheduler.now if now is None else now)
+        w = NEEDLE_OMEGA
+        x = self.current_angle - (self.needle_angle - rate * dt)
+        v = self._needle_velocity - rate
+        c = v + w * x
+        decay = math.exp(-w * dt)
+        x = (x + c * dt) * decay
+        v = (v - w * c * dt) * decay
+        px = math.radians(self._tip_r)      # px per degree at the needle tip
+        if not rate and abs(x) * px < NEEDLE_SETTLE and abs(v) * px * ANIM_DT < NEEDLE_SETTLE:
+            x = v = 0.0
+            self._moving = False
+        angle = self.needle_angle + x
+        stop = self.angle_range / 2.0
+        if abs(angle) > stop:               # the needle's stop pins
+            angle, v, rate = math.copysign(stop, angle), 0.0, 0.0
+        self.current_angle = angle
+        self._needle_velocity = v + rate
+        self._draw_needle()
+
+    def _draw_needle(self):
+        """Needle at ``current_angle`` and the arc filled up to it."""
+        start = self._angle_for_value(0)
+        end = max(start + 0.01, -self.current_angle)
+        if self.shader:
+            ctx = self._layer[0]
+            ctx["needle_angle"] = float(self.current_angle)
+            ctx["arc_end"] = float(end)
+        else:
             self.rot.angle = self.current_angle
-        if hasattr(self, "arc"):
-            start = self._angle_for_value(0)
-            end = max(start + 0.01, -self.current_angle)
             self.arc.circle = (self._cx, self._cy, self._arc_r, start, end)
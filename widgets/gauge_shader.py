@@ -0,0 +1,119 @@
+"""GLSL layers for the Gauge's moving parts (``Gauge(shader=True)``).
+
+The stock gauge draws its arc and needle as thick ``Line``s, so every frame the
+needle moves Kivy re-tessellates the arc on the CPU. Here both dynamic parts
+are a single quad each, shaded per pixel from a handful of uniforms (needle
+angle, arc span and width, colours, flash alpha). Moving the needle, growing
+the arc or strobing the shift light only rewrites floats.
+
+Two layers, so the baked dial keeps its place in between:
+
+    FACE      the dark disc + shift-light red wash (``flash_alpha``)
+    DYNAMIC   the progress arc + needle
+
+Geometry mirrors Kivy's ``Line``: ``width`` is the half thickness, caps are
+round, angles are in degrees clockwise from the top (``Line(circle=...)``)
+and the needle angle is a ``Rotate`` angle (counter-clockwise).
+"""
+
+from kivy.graphics import Color, Rectangle, RenderContext
+
+FACE, DYNAMIC = 0.0, 1.0   # layer ``mode`` uniform
+
+VERTEX = """
+$HEADER$
+uniform vec2 center;
+varying vec2 p;        // pixel position relative to the gauge centre
+
+void main(void) {
+    frag_color = color * vec4(1.0, 1.0, 1.0, opacity);
+    tex_coord0 = vTexCoords0;
+    p = vPosition.xy - center;
+    gl_Position = projection_mat * modelview_mat * vec4(vPosition.xy, 0.0, 1.0);
+}
+"""
+
+FRAGMENT = """
+$HEADER$
+varying vec2 p;
+
+uniform float mode;
+uniform float radius;
+uniform vec4 face_color;
+uniform vec4 flash_color;
+uniform float flash_alpha;
+
+uniform float arc_r;
+uniform float arc_start;
+uniform float arc_end;
+uniform float arc_width;
+uniform vec4 arc_color;
+
+uniform float needle_angle;
+uniform float needle_inner;
+uniform float needle_outer;
+uniform float needle_width;
+uniform vec4 needle_color;
+
+// 1 inside a stroke of half width ``w`` at distance ``d``, a one-pixel ramp at the edge
+float cover(float d, float w) {
+    return clamp(w - d + 0.5, 0.0, 1.0);
+}
+
+// "top over bottom", straight alpha in and out
+vec4 over(vec4 top, vec4 bottom) {
+    float a = top.a + bottom.a * (1.0 - top.a);
+    if (a <= 0.0)
+        return vec4(0.0);
+    return vec4((top.rgb * top.a + bottom.rgb * bottom.a * (1.0 - top.a)) / a, a);
+}
+
+vec2 on_circle(float deg) {
+    float r = radians(deg);
+    return arc_r * vec2(sin(r), cos(r));
+}
+
+void main(void) {
+    vec4 c;
+    if (mode < 0.5) {
+        float disc = cover(length(p), radius);
+        c = over(vec4(flash_color.rgb, flash_alpha * disc),
+                 vec4(face_color.rgb, face_color.a * disc));
+    } else {
+        float t = degrees(atan(p.x, p.y));
+        float d = t >= arc_start && t <= arc_end
+            ? abs(length(p) - arc_r)
+            : min(distance(p, on_circle(arc_start)), distance(p, on_circle(arc_end)));
+        vec4 arc = vec4(arc_color.rgb, arc_color.a * cover(d, arc_width));
+
+        float s = sin(radians(needle_angle));
+        float k = cos(radians(needle_angle));
+        vec2 q = vec2(k * p.x + s * p.y, k * p.y - s * p.x);     // undo the rotation
+        float dn = length(vec2(q.x, q.y - clamp(q.y, needle_inner, needle_outer)));
+        vec4 needle = vec4(needle_color.rgb, needle_color.a * cover(dn, needle_width));
+        c = over(needle, arc);
+    }
+    gl_FragColor = c * frag_color;
+}
+"""
+
+
+def layer(mode, **uniforms):
+    """A ``RenderContext`` drawing one quad with the dial shader in ``mode``.
+
+    Returns (context, quad), or None if the shader doesn't compile here. Place
+    the quad over the gauge and set the remaining uniforms with ``ctx[name]``.
+    """
+    ctx = RenderContext(use_parent_projection=True, use_parent_modelview=True,
+                        use_parent_frag_modelview=True)
+    ctx.shader.vs = VERTEX
+    ctx.shader.fs = FRAGMENT
+    if not ctx.shader.success:
+        return None
+    ctx["mode"] = mode
+    for name, value in uniforms.items():
+        ctx[name] = value
+    with ctx:
+        Color(1, 1, 1, 1)
+        quad = Rectangle()
+    return ctx, quad
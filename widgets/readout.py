@@ -1,26 +1,60 @@
 """Reusable value readout whose colour reflects a threshold.
 
 Drives a value Label's text and colour from a sensor reading: the value turns
-``warn_color`` when ``warn(value)`` is true, otherwise ``base_color``. The
+``warn_color`` when ``warn(value)`` is true, ``alert_color`` while the caller
+flags a trend alert (``set_alert``), otherwise ``base_color``, and greys out
+(``stale_color``) while its signal has stopped arriving. The
 accompanying title label is static (the caller sets it once), matching the
 minimal design where only the value reacts.
 """
 
-from theme import VALUE, WARNING
+from theme import VALUE, WARNING, STALE_VALUE, TT_AMBER
 
 
 class Readout:
     def __init__(self, value_label, fmt="{:.0f}", warn=None,
-                 base_color=VALUE, warn_color=WARNING):
+                 base_color=VALUE, warn_color=WARNING, stale_color=STALE_VALUE,
+                 alert_color=TT_AMBER):
         self.value = value_label
         self.fmt = fmt
         self.warn = warn or (lambda v: False)
         self.base_color = base_color
         self.warn_color = warn_color
+        self.stale_color = stale_color
+        self.alert_color = alert_color
+        self.stale = False
+        self.alert = False
+        self._last = None
 
     def set(self, value):
         """Update the displayed value; ``None`` leaves the readout unchanged."""
         if value is None:
             return
+        self._last = value
         self.value.text = self.fmt.format(value)
-        self.value.color = self.warn_color if self.warn(value) else self.base_color
+        self._paint()
+
+    def set_stale(self, stale):
+        """Grey the value out while its signal is stale (keeps the last text)."""
+        stale = bool(stale)
+        if stale == self.stale:
+            return
+        self.stale = stale
+        self._paint()
+
+    def set_alert(self, alert):
+        """Flag a trend alert (``alert_color``; the value's own warning wins)."""
+        alert = bool(alert)
+        if alert == self.alert:
+            return
+        self.alert = alert
+        self._paint()
+
+    def _paint(self):
+        if self.stale:
+            self.value.color = self.stale_color
+        elif self._last is not None:
+            if self.warn(self._last):
+                self.value.color = self.warn_color
+            else:
+                self.value.color = self.alert_color if self.alert else self.base_color
@@ -14,8 +14,8 @@ from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.label import Label
 from kivy.graphics import Color, Line, RoundedRectangle, Triangle
 from kivy.core.window import Window
-from kivy.clock import Clock
 
+from frames import DATA, PAINT, scheduler
 from theme import (
     FONT_MONO, WINDOW_HEIGHT,
     TT_GREEN, TT_BLUE, TT_RED, TT_AMBER, TT_CYAN, TT_BOOST,
@@ -29,7 +29,7 @@ CHAR_W = 11          # approx glyph advance at the label font size
 PILL_PAD = 14        # horizontal padding inside a pill
 ARROW_WIDTH = 52
 ROW_TOP_MARGIN = 24  # gap between the window top and the pill row
-BLINK_PERIOD = 0.4   # seconds per blink toggle
+BLINK_PERIOD = 0.4   # seconds per blink toggle (shared frame timebase)
 WIFI_MARGIN_X = 40   # left inset of the standalone WiFi tell-tale
 WIFI_POLL = 3.0      # seconds between WiFi status checks
 
@@ -84,6 +84,7 @@ class TellTale(Widget):
             )
             self.add_widget(self._label)
 
+        self._lit = None
         self.bind(pos=self._layout, size=self._layout)
         self.set_lit(False)
 
@@ -106,6 +107,10 @@ class TellTale(Widget):
             self._label.text_size = self.size
 
     def set_lit(self, lit):
+        lit = bool(lit)
+        if lit == self._lit:
+            return   # unchanged: skip the colour writes (and label re-render)
+        self._lit = lit
         if lit:
             r, g, b, _ = self.on_color
             self._fill_col.rgba = (r, g, b, 0.10)
@@ -143,9 +148,14 @@ class TopAlerts(Widget):
         ("right", {"arrow": "right"},  TT_GREEN, False),
     ]
 
+    # sensor fields read directly (thresholds come from the alarm engine's rules)
+    STATE_FIELDS = ("radiator_fan", "two_step")
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self._active = {}
+        self._io = None
+        self._telltales = None
         self._blink_on = True
 
         self.row = BoxLayout(orientation="horizontal", size_hint=(None, None),
@@ -167,45 +177,57 @@ class TopAlerts(Widget):
 
         self._reposition()
         Window.bind(on_resize=lambda *_: self._reposition())
-        Clock.schedule_interval(self._blink, BLINK_PERIOD)
-        Clock.schedule_once(self._check_wifi, 1)
-        Clock.schedule_interval(self._check_wifi, WIFI_POLL)
+        scheduler.add(PAINT, self._blink)
+        scheduler.add(DATA, self._check_wifi, every=WIFI_POLL)
 
     def _reposition(self, *_):
         top_y = WINDOW_HEIGHT - PILL_HEIGHT - ROW_TOP_MARGIN
         self.row.pos = ((Window.width - self.row.width) / 2, top_y)
         self.wifi_pill.pos = (WIFI_MARGIN_X, top_y)
 
-    def _blink(self, _):
-        self._blink_on = not self._blink_on
-        self._refresh()
-
-    def _check_wifi(self, _):
+    def _blink(self, now, dt):
+        """PAINT hook: blinking pills follow the shared ``BLINK_PERIOD`` phase
+        (asleep while none of them is on)."""
+        if not any(self._active.get(key) for key, pill in self.pills.items() if pill.blinks):
+            return None
+        on = scheduler.blink(BLINK_PERIOD)
+        if on != self._blink_on:
+            self._blink_on = on
+            self._refresh()
+        return scheduler.next_blink(BLINK_PERIOD)
+
+    def _check_wifi(self, now, dt):
         if _wifi_connected():
             self.wifi_pill.opacity = 1
             self.wifi_pill.set_lit(True)
         else:
             self.wifi_pill.opacity = 0
 
-    def set_state(self, state):
-        """Recompute which tell-tales are active from the sensor state.
+    def set_state(self, state, telltales=()):
+        """Recompute which tell-tales are active from a state ``Snapshot``.
 
-        Only signals we actually have are wired; the rest (BATT/CEL/BRAKE/2-STEP)
-        stay dark until a source exists, which keeps the cluster calm rather than
-        showing warnings we can't substantiate.
+        ``telltales`` are the pill keys raised by the alarm engine's threshold
+        rules (TEMP / OIL / FUEL / BOOST, with hysteresis — see alarms.py); the
+        rest come straight from the GPIO inputs and ECU flags. Skipped entirely
+        unless one of those changed since the last frame. Only signals we
+        actually have are wired; the rest (BATT/CEL/BRAKE/2-STEP) stay dark
+        until a source exists, which keeps the cluster calm rather than showing
+        warnings we can't substantiate.
         """
-        io = state.io
-        fuel = state.fuel_level
+        if (state.io == self._io and telltales == self._telltales
+                and not state.changed(*self.STATE_FIELDS)):
+            return
+        self._io = io = state.io
+        self._telltales = telltales
         self._active = {
             "left":  io.left_indicator,
             "right": io.right_indicator,
             "high":  io.high_beam,
             "choke": io.choke,
-            "temp":  state.engine_temp > 100,
-            # genuine loss of oil pressure only (avoid false alarms at rest)
-            "oil":   state.rpm > 500 and 0 < state.oil_pressure_bar < 0.8,
-            "fuel":  0 < fuel < 15,
-            "boost": state.map > 1.32,
+            "temp":  "temp" in telltales,
+            "oil":   "oil" in telltales,
+            "fuel":  "fuel" in telltales,
+            "boost": "boost" in telltales,
             "fan":   state.radiator_fan,
             "2step": state.two_step,
             "brake": io.parking_brake,
@@ -213,6 +235,7 @@ class TopAlerts(Widget):
             "cel":   False,
         }
         self._refresh()
+        scheduler.wake(self._blink)
 
     def _refresh(self):
         for key, pill in self.pills.items():